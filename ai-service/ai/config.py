@@ -5,10 +5,106 @@ load_dotenv()
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
 GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
+# Threads for blocking work (PDF extraction, cache I/O) off the event loop in /parse_resume.
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", "4"))
+
+# Components (embedding model, ranker, parser, job store) load lazily on first use.
+# With WARMUP_ON_STARTUP they are loaded and exercised in the background at startup;
+# /ready reports 503 until that finishes.
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "1") not in ("0", "false", "False", "")
+
+# Bulk resume ingestion (/parse_resumes and `python -m ai.parsing.bulk_ingest`).
+BULK_EXTRACT_PROCESSES = int(os.getenv("BULK_EXTRACT_PROCESSES", str(os.cpu_count() or 2)))
+BULK_LLM_CONCURRENCY = int(os.getenv("BULK_LLM_CONCURRENCY", "8"))
+BULK_LLM_RATE_PER_SEC = float(os.getenv("BULK_LLM_RATE_PER_SEC", "5"))
+BULK_EMBED_BATCH = int(os.getenv("BULK_EMBED_BATCH", "256"))
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(BASE_DIR, "data")
 TRAINED_MODELS_DIR = os.path.join(BASE_DIR, "trained_models")
 RANKER_PATH = os.path.join(TRAINED_MODELS_DIR, "ranker.json")
+# train_ranker.py: feature-building processes, source CSV rows read per chunk
+# (one task and one checkpoint each), texts per embed_many call, and where
+# chunk checkpoints go. Peak memory of the build scales with TRAIN_CHUNK_ROWS.
+TRAIN_PROCESSES = int(os.getenv("TRAIN_PROCESSES", str(os.cpu_count() or 1)))
+TRAIN_CHUNK_ROWS = int(os.getenv("TRAIN_CHUNK_ROWS", "2000"))
+TRAIN_EMBED_CHUNK = int(os.getenv("TRAIN_EMBED_CHUNK", "4096"))
+TRAIN_CHECKPOINT_DIR = os.getenv("TRAIN_CHECKPOINT_DIR", os.path.join(DATA_DIR, "train_checkpoints"))
+# Training set written by train_ranker.py: float32 feature / label / group
+# shards of TRAIN_SHARD_ROWS rows plus meta.json (see ai/ranker/interactions.py).
+# Training streams the shards into xgboost one at a time.
+INTERACTIONS_DIR = os.getenv("INTERACTIONS_DIR", os.path.join(DATA_DIR, "interactions"))
+TRAIN_SHARD_ROWS = int(os.getenv("TRAIN_SHARD_ROWS", "500000"))
+# Fraction of training-set groups (students / job titles) train_ranker leaves
+# out, picked by hash so ai/ranker/evaluate.py scores every model on the same
+# split. 0 (default) trains on everything, as a model to ship should; set it
+# (or --holdout) for evaluation runs.
+TRAIN_HOLDOUT = float(os.getenv("TRAIN_HOLDOUT", "0"))
+# Page cache for `train_ranker --external-memory` (ExtMemQuantileDMatrix).
+TRAIN_XGB_CACHE_DIR = os.getenv("TRAIN_XGB_CACHE_DIR", os.path.join(DATA_DIR, "xgb_cache"))
+# Ranker inference: "xgboost" (Booster.inplace_predict), "numpy" (array-backed
+# tree evaluator built from ranker.json, no xgboost needed at serve time) or
+# "auto" (numpy up to RANKER_FAST_PATH_ROWS rows, where it is faster, xgboost above).
+RANKER_BACKEND = os.getenv("RANKER_BACKEND", "auto").lower()
+RANKER_FAST_PATH_ROWS = int(os.getenv("RANKER_FAST_PATH_ROWS", "64"))
+# XGBoost predict threads. Requests score tens to hundreds of rows, where one
+# thread beats a pool (and several workers don't oversubscribe the cores).
+XGB_NTHREAD = int(os.getenv("XGB_NTHREAD", "1"))
 SKILL_MAP_PATH = os.path.join(BASE_DIR, "skills", "skill_map.json")
+# Precompiled skill matcher emitted by build_stackoverflow_skill_map.py;
+# rebuilt from skill_map.json at startup when missing or stale.
+SKILL_AUTOMATON_PATH = os.path.join(BASE_DIR, "skills", "skill_automaton.pkl")
+
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-mpnet-base-v2")
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+
+# Embedding backend: "torch" (SentenceTransformer), "onnx" or "onnx-int8"
+# (ONNX Runtime, exported on first use; see ai/embeddings/onnx_backend.py).
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+EMBEDDING_ONNX_DIR = os.getenv("EMBEDDING_ONNX_DIR", os.path.join(TRAINED_MODELS_DIR, "onnx"))
+EMBEDDING_ONNX_THREADS = int(os.getenv("EMBEDDING_ONNX_THREADS", "0"))  # 0 = onnxruntime default
+
+# Encoding of embeddings the service returns: "list" (JSON floats), "f16" or
+# "i8" (compact base64 strings, see ai/embeddings/codec.py). Both forms are accepted as input.
+EMBEDDING_WIRE_FORMAT = os.getenv("EMBEDDING_WIRE_FORMAT", "f16").lower()
+
+# Cross-request micro-batching of single-text embeds: a batch is flushed at
+# EMBED_BATCHER_MAX_BATCH texts or EMBED_BATCHER_MAX_WAIT_MS after its first text.
+EMBED_BATCHER_ENABLED = os.getenv("EMBED_BATCHER_ENABLED", "1") not in ("0", "false", "False", "")
+EMBED_BATCHER_MAX_BATCH = int(os.getenv("EMBED_BATCHER_MAX_BATCH", "64"))
+EMBED_BATCHER_MAX_WAIT_MS = float(os.getenv("EMBED_BATCHER_MAX_WAIT_MS", "5"))
+
+# Embedding cache: in-process LRU (entries) + on-disk SQLite tier. Empty path disables the disk tier.
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "1") not in ("0", "false", "False", "")
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "20000"))
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", os.path.join(DATA_DIR, "embedding_cache.sqlite"))
+
+# /parse_resume result cache keyed by PDF bytes / extracted text (SQLite, size-bounded).
+PARSE_CACHE_ENABLED = os.getenv("PARSE_CACHE_ENABLED", "1") not in ("0", "false", "False", "")
+PARSE_CACHE_PATH = os.getenv("PARSE_CACHE_PATH", os.path.join(DATA_DIR, "parse_cache.sqlite"))
+PARSE_CACHE_MAX_ENTRIES = int(os.getenv("PARSE_CACHE_MAX_ENTRIES", "50000"))
+
+# Job vector index for /recommend retrieval mode ("exact" or "hnsw"; hnsw needs `pip install hnswlib`).
+JOB_INDEX_DIR = os.getenv("JOB_INDEX_DIR", os.path.join(DATA_DIR, "job_index"))
+JOB_INDEX_MODE = os.getenv("JOB_INDEX_MODE", "exact")
+# Map the saved job vectors read-only so worker processes share one copy.
+JOB_INDEX_MMAP = os.getenv("JOB_INDEX_MMAP", "1") not in ("0", "false", "False", "")
+
+# Pre-fork multi-worker serving (`python -m ai.serving.prefork`): models are
+# loaded once in the parent and shared copy-on-write by SERVE_WORKERS workers.
+SERVE_HOST = os.getenv("SERVE_HOST", "0.0.0.0")
+SERVE_PORT = int(os.getenv("SERVE_PORT", "8000"))
+SERVE_WORKERS = int(os.getenv("SERVE_WORKERS", str(os.cpu_count() or 1)))
+# Workers share /metrics through per-worker snapshots in METRICS_DIR (a fresh
+# temp directory per server when unset), rewritten every METRICS_FLUSH_INTERVAL seconds.
+METRICS_DIR = os.getenv("METRICS_DIR", "")
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "1"))
 
+# Hot reload of the ranker (RANKER_PATH and its sidecar) and the skill map
+# (ai/serving/reloader.py). POST /admin/reload needs an X-Admin-Token header
+# equal to ADMIN_TOKEN and is disabled while ADMIN_TOKEN is unset. With
+# RELOAD_WATCH_INTERVAL > 0 every worker also polls the files that often (seconds).
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+RELOAD_WATCH_INTERVAL = float(os.getenv("RELOAD_WATCH_INTERVAL", "0"))
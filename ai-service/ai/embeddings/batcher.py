@@ -0,0 +1,180 @@
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from functools import lru_cache
+from typing import List, Optional
+
+import numpy as np
+
+from ai.config import EMBED_BATCHER_ENABLED, EMBED_BATCHER_MAX_BATCH, EMBED_BATCHER_MAX_WAIT_MS
+from ai.logging_config import get_logger
+from ai.metrics import EMBED_BATCH_SIZE, EMBED_QUEUE_WAIT
+
+logger = get_logger("embeddings.batcher")
+
+
+class EmbeddingBatcher:
+    """
+    Cross-request micro-batching for single-text embeds.
+
+    Callers from any thread or event loop enqueue one text and wait for its
+    vector. A worker thread takes the first queued text, keeps collecting
+    until `max_batch` texts or `max_wait_ms` after that first text, runs one
+    encode (duplicates encoded once) and resolves every caller's future.
+    Each text is looked up in the embedder's cache once, before queueing:
+    hits are answered directly, and the batch encodes the misses with
+    `Embedder.encode_many`, which stores them without a second lookup.
+
+    `embed` is the sync front-end (request threads), `embed_async` the async
+    one (event loops; the SQLite lookup runs in the default executor). With
+    enabled=False both call the embedder directly.
+    """
+
+    def __init__(self, embedder, max_batch: int = EMBED_BATCHER_MAX_BATCH,
+                 max_wait_ms: float = EMBED_BATCHER_MAX_WAIT_MS, enabled: bool = True):
+        self.embedder = embedder
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.enabled = enabled
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    # ---------- front-ends ----------
+
+    def submit(self, text: str) -> Future:
+        """Queue one text; the returned future resolves to its vector."""
+        text = text or ""
+        hit = self._cached(text)
+        if hit is not None:
+            fut: Future = Future()
+            fut.set_result(hit)
+            return fut
+        return self._enqueue(text)
+
+    def _enqueue(self, text: str) -> Future:
+        fut: Future = Future()
+        self._ensure_worker()
+        self._queue.put((text, fut, time.perf_counter()))
+        return fut
+
+    def embed(self, text: str) -> np.ndarray:
+        if not self.enabled:
+            return self.embedder.embed(text)
+        return self.submit(text).result()
+
+    async def embed_async(self, text: str) -> np.ndarray:
+        loop = asyncio.get_running_loop()
+        if not self.enabled:
+            return await loop.run_in_executor(None, self.embedder.embed, text)
+        text = text or ""
+        if self._cache is not None:
+            hit = await loop.run_in_executor(None, self._cached, text)
+            if hit is not None:
+                return hit
+        return await asyncio.wrap_future(self._enqueue(text))
+
+    def close(self) -> None:
+        """Stop the worker after the texts already queued are embedded."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            if self._thread is not None:
+                self._queue.put(None)
+        if self._thread is not None:
+            self._thread.join()
+
+    # ---------- worker ----------
+
+    @property
+    def _cache(self):
+        return getattr(self.embedder, "cache", None)
+
+    def _cached(self, text: str) -> Optional[np.ndarray]:
+        cache = self._cache
+        if cache is None:
+            return None
+        return cache.get_many([text])[0]
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        if self._cache is None:
+            return self.embedder.embed_many(texts)
+        return self.embedder.encode_many(texts)  # already missed in submit
+
+    def _ensure_worker(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("EmbeddingBatcher is closed")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="embed-batcher", daemon=True)
+                self._thread.start()
+
+    def _collect(self, first) -> tuple:
+        """Gather up to max_batch items until the deadline; (batch, saw_close)."""
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        stop = False
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                stop = True
+                break
+            batch.append(item)
+        return batch, stop
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            first = self._queue.get()
+            if first is None:
+                break
+            batch, stop = self._collect(first)
+            self._flush(batch)
+        # drain anything queued before close()
+        leftover: List = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                leftover.append(item)
+        for i in range(0, len(leftover), self.max_batch):
+            self._flush(leftover[i:i + self.max_batch])
+
+    def _flush(self, batch: List) -> None:
+        started = time.perf_counter()
+        for _, _, enqueued in batch:
+            EMBED_QUEUE_WAIT.observe(started - enqueued)
+        EMBED_BATCH_SIZE.observe(len(batch))
+        try:
+            mat = self._encode([text for text, _, _ in batch])
+        except Exception as e:
+            logger.warning("Batched embedding of %d texts failed: %s", len(batch), e)
+            for _, fut, _ in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        for (_, fut, _), vec in zip(batch, mat):
+            if not fut.done():
+                fut.set_result(vec)
+
+
+@lru_cache(maxsize=1)
+def get_embedding_batcher() -> EmbeddingBatcher:
+    # imported here so importing the batcher (e.g. in extraction worker
+    # processes via bulk_ingest) does not load the model stack
+    from ai.embeddings.embedder import get_embedder
+
+    return EmbeddingBatcher(get_embedder(), enabled=EMBED_BATCHER_ENABLED)
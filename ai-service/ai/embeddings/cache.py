@@ -0,0 +1,173 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from ai.config import EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_SIZE
+
+
+class EmbeddingCache:
+    """
+    Content-addressed embedding cache.
+
+    Keys are sha256(model name + whitespace-normalized text), so a job posting
+    is only re-embedded when its text (or the model) actually changes.
+    Two tiers:
+    - an in-process LRU of up to `max_items` vectors
+    - an optional SQLite file of float32 blobs that survives restarts
+    """
+
+    _SQL_CHUNK = 500  # stay well below SQLite's bound-parameter limit
+
+    def __init__(self, model_name: str, path: Optional[str] = EMBEDDING_CACHE_PATH,
+                 max_items: int = EMBEDDING_CACHE_SIZE):
+        self.model_name = model_name
+        self.path = path or None
+        self.max_items = max(0, int(max_items))
+        self._lru: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_pid: Optional[int] = None
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0}
+
+        if self.path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._conn  # create the table now so a bad path fails at startup
+
+    @property
+    def _conn(self) -> Optional[sqlite3.Connection]:
+        """This process's connection, reopened in a forked worker (SQLite handles must not cross fork)."""
+        if self.path is None:
+            return None
+        if self._db is None or self._db_pid != os.getpid():
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " key TEXT PRIMARY KEY,"
+                " dim INTEGER NOT NULL,"
+                " vec BLOB NOT NULL)"
+            )
+            conn.commit()
+            self._db, self._db_pid = conn, os.getpid()
+        return self._db
+
+    def close(self) -> None:
+        """Close the disk tier connection (e.g. before forking); it reopens on next use."""
+        with self._lock:
+            if self._db is not None and self._db_pid == os.getpid():
+                self._db.close()
+            self._db = None
+
+    # ---------- keys ----------
+
+    @staticmethod
+    def normalize_text(text: str) -> str:
+        return " ".join((text or "").split())
+
+    def key(self, text: str) -> str:
+        payload = f"{self.model_name}\x00{self.normalize_text(text)}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    # ---------- LRU tier ----------
+
+    def _lru_get(self, key: str) -> Optional[np.ndarray]:
+        vec = self._lru.get(key)
+        if vec is not None:
+            self._lru.move_to_end(key)
+        return vec
+
+    def _lru_put(self, key: str, vec: np.ndarray) -> None:
+        if self.max_items == 0:
+            return
+        self._lru[key] = vec
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_items:
+            self._lru.popitem(last=False)
+
+    # ---------- disk tier ----------
+
+    def _disk_get(self, keys: Sequence[str]) -> Dict[str, np.ndarray]:
+        found: Dict[str, np.ndarray] = {}
+        if self._conn is None or not keys:
+            return found
+        for i in range(0, len(keys), self._SQL_CHUNK):
+            chunk = keys[i:i + self._SQL_CHUNK]
+            marks = ",".join("?" * len(chunk))
+            rows = self._conn.execute(
+                f"SELECT key, dim, vec FROM embeddings WHERE key IN ({marks})", chunk
+            ).fetchall()
+            for key, dim, blob in rows:
+                vec = np.frombuffer(blob, dtype=np.float32)
+                if vec.size == dim:
+                    found[key] = vec
+        return found
+
+    def _disk_put(self, items: Dict[str, np.ndarray]) -> None:
+        if self._conn is None or not items:
+            return
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO embeddings (key, dim, vec) VALUES (?, ?, ?)",
+            [(k, int(v.size), v.tobytes()) for k, v in items.items()],
+        )
+        self._conn.commit()
+
+    # ---------- public API ----------
+
+    def get_many(self, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """
+        Look up vectors for `texts`. Returns a list aligned with `texts`
+        holding a read-only float32 vector for hits and None for misses.
+        """
+        keys = [self.key(t) for t in texts]
+        out: List[Optional[np.ndarray]] = [None] * len(keys)
+        with self._lock:
+            pending = []
+            for i, k in enumerate(keys):
+                vec = self._lru_get(k)
+                if vec is not None:
+                    out[i] = vec
+                    self._counters["memory_hits"] += 1
+                else:
+                    pending.append(i)
+
+            disk = self._disk_get(list({keys[i] for i in pending}))
+            for i in pending:
+                vec = disk.get(keys[i])
+                if vec is not None:
+                    out[i] = vec
+                    self._lru_put(keys[i], vec)
+                    self._counters["disk_hits"] += 1
+                else:
+                    self._counters["misses"] += 1
+        return out
+
+    def put_many(self, texts: Sequence[str], vectors) -> None:
+        items: Dict[str, np.ndarray] = {}
+        for text, vec in zip(texts, vectors):
+            arr = np.ascontiguousarray(vec, dtype=np.float32).reshape(-1)
+            arr.setflags(write=False)
+            items[self.key(text)] = arr
+        with self._lock:
+            for k, v in items.items():
+                self._lru_put(k, v)
+            self._disk_put(items)
+            self._counters["writes"] += len(items)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            counters = dict(self._counters)
+            memory_items = len(self._lru)
+        lookups = counters["memory_hits"] + counters["disk_hits"] + counters["misses"]
+        hits = counters["memory_hits"] + counters["disk_hits"]
+        return {
+            **counters,
+            "hit_rate": (hits / lookups) if lookups else 0.0,
+            "memory_items": memory_items,
+            "disk_enabled": self.path is not None,
+        }
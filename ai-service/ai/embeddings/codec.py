@@ -0,0 +1,121 @@
+"""
+Compact wire / storage encoding for embedding vectors.
+
+A 768-dim vector as a JSON list of floats is ~15 KB of text that has to be
+parsed on every request. The compact forms are ASCII strings with a version
+tag, safe to embed in JSON and to store in Mongo as-is:
+
+    emb1:f16:<base64 little-endian float16>:<model tag>
+    emb1:i8:<base64 float32 scale + int8 codes>:<model tag>     (x ~= code * scale)
+
+The model tag (`model_tag`, a short hash of Embedder.model_id) records
+which model and backend produced the vector. `decode_embedding(value,
+model=...)` rejects compact strings whose tag is missing or differs, so
+after a model change stored vectors are re-embedded instead of being
+compared with vectors from another space. Plain lists carry no tag and
+are accepted as they are.
+
+`decode_embedding` accepts either a compact string or a plain list, so
+vectors stored before the switch keep working. Strings with an unknown tag
+decode to None and are treated like a missing embedding (re-embedded).
+"""
+
+import base64
+import hashlib
+from typing import Any, Optional, Sequence
+
+import numpy as np
+
+from ai.config import EMBEDDING_WIRE_FORMAT
+
+FORMAT_VERSION = "emb1"
+WIRE_FORMATS = ("list", "f16", "i8")
+
+_F16 = np.dtype("<f2")
+_F32 = np.dtype("<f4")
+
+
+def model_tag(model: str) -> str:
+    return hashlib.sha256(model.encode("utf-8")).hexdigest()[:8]
+
+
+def encode_embedding(vec, fmt: str = EMBEDDING_WIRE_FORMAT, model: Optional[str] = None):
+    """
+    Vector -> list of floats ("list") or a compact tagged string ("f16" /
+    "i8"), the latter tagged with `model` when given.
+    """
+    arr = np.asarray(vec, dtype=np.float32).ravel()
+    if fmt == "f16":
+        payload = arr.astype(_F16).tobytes()
+    elif fmt == "i8":
+        peak = float(np.abs(arr).max()) if arr.size else 0.0
+        scale = peak / 127.0 if peak > 0 else 1.0
+        codes = np.clip(np.rint(arr / scale), -127, 127).astype(np.int8)
+        payload = np.array([scale], dtype=_F32).tobytes() + codes.tobytes()
+    elif fmt == "list":
+        return arr.tolist()
+    else:
+        raise ValueError(f"Unknown embedding wire format {fmt!r}; expected one of {WIRE_FORMATS}")
+    out = f"{FORMAT_VERSION}:{fmt}:{base64.b64encode(payload).decode('ascii')}"
+    return f"{out}:{model_tag(model)}" if model else out
+
+
+def _decode_compact(value: str, model: Optional[str] = None) -> Optional[np.ndarray]:
+    parts = value.split(":")
+    if len(parts) not in (3, 4):
+        return None
+    version, fmt, b64 = parts[:3]
+    if version != FORMAT_VERSION:
+        return None
+    if model is not None and (len(parts) != 4 or parts[3] != model_tag(model)):
+        return None  # from another (or an unrecorded) model
+    try:
+        raw = base64.b64decode(b64, validate=True)
+    except (ValueError, TypeError):
+        return None
+    if fmt == "f16":
+        if len(raw) % _F16.itemsize:
+            return None
+        return np.frombuffer(raw, dtype=_F16).astype(np.float32)
+    if fmt == "i8":
+        if len(raw) <= _F32.itemsize:
+            return None
+        scale = np.frombuffer(raw, dtype=_F32, count=1)[0]
+        return np.frombuffer(raw, dtype=np.int8, offset=_F32.itemsize).astype(np.float32) * scale
+    return None
+
+
+def decode_embedding(value: Any, model: Optional[str] = None) -> Optional[np.ndarray]:
+    """
+    Compact string or list of numbers -> 1-D finite float32 array, else None.
+    With `model`, compact strings must carry that model's tag.
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        arr = _decode_compact(value, model)
+    else:
+        try:
+            arr = np.asarray(value, dtype=np.float32)
+        except Exception:
+            return None
+    if arr is None or arr.ndim != 1 or arr.size == 0 or not np.all(np.isfinite(arr)):
+        return None
+    return arr
+
+
+def decode_into(values: Sequence[Any], out: np.ndarray, model: Optional[str] = None) -> list:
+    """
+    Bulk-decode values into the rows of a preallocated (n, dim) matrix.
+    Returns the indices whose value was missing, malformed, of another
+    dimension or (with `model`) of another model; those rows are left untouched.
+    """
+    dim = out.shape[1]
+    missing = []
+    for i, value in enumerate(values):
+        arr = decode_embedding(value, model)
+        if arr is None or arr.size != dim:
+            missing.append(i)
+        else:
+            out[i] = arr
+    return missing
@@ -1,30 +1,136 @@
-﻿from sentence_transformers import SentenceTransformer
-import numpy as np
+﻿import numpy as np
 from functools import lru_cache
+from typing import List, Optional
+
+from ai.config import EMBEDDING_MODEL, EMBED_BATCH_SIZE, EMBEDDING_CACHE_ENABLED, EMBEDDING_BACKEND
+from ai.embeddings.cache import EmbeddingCache
+from ai.logging_config import get_logger
+from ai.metrics import STAGE_LATENCY
+
+logger = get_logger("embeddings")
+
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+
+def _load_model(model_name: str, backend: str):
+    if backend == "torch":
+        from sentence_transformers import SentenceTransformer
+
+        return SentenceTransformer(model_name)
+    if backend in ("onnx", "onnx-int8"):
+        from ai.embeddings.onnx_backend import load_onnx_encoder
+
+        return load_onnx_encoder(model_name, quantized=backend == "onnx-int8")
+    raise ValueError(f"Unknown embedding backend {backend!r}, expected one of {BACKENDS}")
 
 
 class Embedder:
     """
     Wrapper for all-mpnet-base-v2 embeddings.
+    `backend` picks PyTorch SentenceTransformer or the ONNX Runtime export
+    (optionally int8); both take the same texts and return the same shape.
+    When a cache is attached, texts that were embedded before are served from it.
     """
 
-    def __init__(self, model_name="sentence-transformers/all-mpnet-base-v2"):
-        self.model = SentenceTransformer(model_name)
+    def __init__(self, model_name=EMBEDDING_MODEL, cache: Optional[EmbeddingCache] = None,
+                 backend: str = EMBEDDING_BACKEND):
+        self.model_name = model_name
+        self.backend = backend
+        self.model = _load_model(model_name, backend)
+        self.cache = cache
+
+    @property
+    def model_id(self) -> str:
+        """model_name plus backend when not PyTorch; keys caches so backends don't mix."""
+        return self.model_name if self.backend == "torch" else f"{self.model_name}#{self.backend}"
+
+    @property
+    def dim(self) -> int:
+        return int(self.model.get_sentence_embedding_dimension())
 
     def embed(self, text: str) -> np.ndarray:
         if not text:
             text = ""
-        vec = self.model.encode(
-            text,
-            convert_to_numpy=True,
-            normalize_embeddings=False  # keep raw magnitudes for stronger signal
-        )
-        print("DEBUG: Embedding length:", len(vec))
-        print("DEBUG: Embedding sample:", vec[:5])
+        if self.cache is not None:
+            hit = self.cache.get_many([text])[0]
+            if hit is not None:
+                return hit
+        with STAGE_LATENCY.time(stage="embedding"):
+            vec = self.model.encode(
+                text,
+                convert_to_numpy=True,
+                normalize_embeddings=False  # keep raw magnitudes for stronger signal
+            )
+        logger.debug("Embedding length=%d sample=%s", len(vec), vec[:5])
+        if self.cache is not None:
+            self.cache.put_many([text], [vec])
         return vec
 
+    def embed_many(self, texts: List[str], batch_size: Optional[int] = None) -> np.ndarray:
+        """
+        Embed many texts at once. SentenceTransformer pads each chunk of
+        `batch_size` texts into a single forward pass, which is far cheaper
+        than one `embed` call per text. Returns an (N, dim) float32 matrix
+        whose rows line up with `texts`. Cached texts are not re-encoded.
+        """
+        texts = [t or "" for t in texts]
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        if self.cache is None:
+            return self._encode(texts, batch_size)
+
+        cached = self.cache.get_many(texts)
+        miss = [i for i, vec in enumerate(cached) if vec is None]
+        if miss:
+            fresh = self.encode_many([texts[i] for i in miss], batch_size)
+            for i, vec in zip(miss, fresh):
+                cached[i] = vec
+        return np.vstack(cached).astype(np.float32, copy=False)
+
+    def encode_many(self, texts: List[str], batch_size: Optional[int] = None) -> np.ndarray:
+        """
+        Encode `texts` without a cache lookup, for callers that already
+        missed, and store the vectors in the cache. Duplicate texts are
+        encoded once. Returns an (N, dim) float32 matrix like embed_many.
+        """
+        texts = [t or "" for t in texts]
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        if self.cache is None:
+            return self._encode(texts, batch_size)
+        index = {}  # cache key -> row of `unique`
+        unique, rows = [], []
+        for text in texts:
+            key = self.cache.key(text)
+            if key not in index:
+                index[key] = len(unique)
+                unique.append(text)
+            rows.append(index[key])
+        fresh = self._encode(unique, batch_size)
+        self.cache.put_many(unique, fresh)
+        return fresh[rows]
+
+    def warmup(self) -> None:
+        """One dummy forward pass (bypassing the cache) so the first real request isn't the slow one."""
+        self._encode(["warmup"], 1)
+
+    def _encode(self, texts: List[str], batch_size: Optional[int]) -> np.ndarray:
+        with STAGE_LATENCY.time(stage="embedding"):
+            mat = self.model.encode(
+                texts,
+                batch_size=batch_size or EMBED_BATCH_SIZE,
+                convert_to_numpy=True,
+                normalize_embeddings=False,  # same raw magnitudes as embed()
+                show_progress_bar=False,
+            )
+        return np.asarray(mat, dtype=np.float32).reshape(len(texts), -1)
+
 
 @lru_cache(maxsize=1)
 def get_embedder() -> Embedder:
-    return Embedder()
+    embedder = Embedder()
+    if EMBEDDING_CACHE_ENABLED:
+        embedder.cache = EmbeddingCache(embedder.model_id)
+    return embedder
 
@@ -0,0 +1,210 @@
+"""
+ONNX Runtime backend for the sentence embedder (EMBEDDING_BACKEND=onnx or
+onnx-int8).
+
+The SentenceTransformer's transformer is exported once to ONNX (optionally
+with dynamic int8 weight quantization). At runtime only onnxruntime and the
+`tokenizers` fast tokenizer are needed, so a worker does not load PyTorch.
+Tokenization (same tokenizer.json, same max_seq_length) and pooling (the
+model's own Pooling / Normalize modules, replayed in numpy) match the
+PyTorch pipeline.
+
+Optional dependencies: `pip install onnxruntime tokenizers` to serve, plus
+`onnx` (and the usual torch / sentence-transformers stack) to export.
+
+Export ahead of time (run from ai-service/):
+    python -m ai.embeddings.onnx_backend --quantize
+"""
+
+import argparse
+import json
+import os
+from typing import List, Optional, Union
+
+import numpy as np
+
+from ai.config import EMBEDDING_MODEL, EMBEDDING_ONNX_DIR, EMBEDDING_ONNX_THREADS
+from ai.logging_config import get_logger
+
+logger = get_logger("embeddings.onnx")
+
+MODEL_FILE = "model.onnx"
+QUANTIZED_MODEL_FILE = "model.int8.onnx"
+CONFIG_FILE = "embedder_config.json"
+
+
+def default_model_dir(model_name: str = EMBEDDING_MODEL) -> str:
+    return os.path.join(EMBEDDING_ONNX_DIR, model_name.replace("/", "__"))
+
+
+def _pooling_mode(pooling) -> str:
+    if getattr(pooling, "pooling_mode_mean_tokens", False):
+        return "mean"
+    if getattr(pooling, "pooling_mode_cls_token", False):
+        return "cls"
+    if getattr(pooling, "pooling_mode_max_tokens", False):
+        return "max"
+    raise ValueError("Only mean / cls / max pooling can be exported to the ONNX backend")
+
+
+def export_onnx(model_name: str = EMBEDDING_MODEL, out_dir: Optional[str] = None,
+                quantize: bool = True, opset: int = 17) -> str:
+    """
+    Export `model_name`'s transformer to out_dir/model.onnx (token embeddings
+    out), save its tokenizer and pooling config, and optionally write a
+    dynamically int8-quantized copy. Needs torch + sentence-transformers.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    out_dir = out_dir or default_model_dir(model_name)
+    os.makedirs(out_dir, exist_ok=True)
+
+    st = SentenceTransformer(model_name, device="cpu")
+    transformer = st[0]
+    tokenizer = transformer.tokenizer
+    pooling = next(m for m in st if type(m).__name__ == "Pooling")
+    normalize = any(type(m).__name__ == "Normalize" for m in st)
+
+    sample = tokenizer(["An example resume sentence."], return_tensors="pt")
+    input_names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in sample]
+
+    class _TokenEmbeddings(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, *inputs):
+            out = self.model(**dict(zip(input_names, inputs)), return_dict=True)
+            return out.last_hidden_state
+
+    wrapper = _TokenEmbeddings(transformer.auto_model).eval()
+    model_path = os.path.join(out_dir, MODEL_FILE)
+    dynamic_axes = {n: {0: "batch", 1: "seq"} for n in input_names}
+    dynamic_axes["token_embeddings"] = {0: "batch", 1: "seq"}
+    with torch.no_grad():
+        torch.onnx.export(
+            wrapper,
+            tuple(sample[n] for n in input_names),
+            model_path,
+            input_names=input_names,
+            output_names=["token_embeddings"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+            do_constant_folding=True,
+        )
+
+    tokenizer.save_pretrained(out_dir)  # writes tokenizer.json for fast tokenizers
+    config = {
+        "model_name": model_name,
+        "dim": int(st.get_sentence_embedding_dimension()),
+        "max_seq_length": int(st.max_seq_length),
+        "do_lower_case": bool(getattr(transformer, "do_lower_case", False)),
+        "input_names": input_names,
+        "pad_token": tokenizer.pad_token,
+        "pad_token_id": int(tokenizer.pad_token_id),
+        "pooling": _pooling_mode(pooling),
+        "normalize": normalize,
+    }
+    with open(os.path.join(out_dir, CONFIG_FILE), "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2)
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(model_path, os.path.join(out_dir, QUANTIZED_MODEL_FILE), weight_type=QuantType.QInt8)
+
+    logger.info("Exported %s to %s (quantized=%s)", model_name, out_dir, quantize)
+    return out_dir
+
+
+class OnnxSentenceEncoder:
+    """
+    Drop-in for the parts of SentenceTransformer that Embedder uses:
+    `encode(...)` and `get_sentence_embedding_dimension()`.
+    """
+
+    def __init__(self, model_dir: str, quantized: bool = False, threads: int = EMBEDDING_ONNX_THREADS):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        with open(os.path.join(model_dir, CONFIG_FILE), "r", encoding="utf-8") as f:
+            self.config = json.load(f)
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=self.config["max_seq_length"])
+        self.tokenizer.enable_padding(pad_id=self.config["pad_token_id"], pad_token=self.config["pad_token"])
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads > 0:
+            opts.intra_op_num_threads = threads
+        model_file = QUANTIZED_MODEL_FILE if quantized else MODEL_FILE
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, model_file), sess_options=opts, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = self.config["input_names"]
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return int(self.config["dim"])
+
+    def _pool(self, token_embeddings: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        mode = self.config["pooling"]
+        if mode == "cls":
+            return token_embeddings[:, 0]
+        m = mask[..., None].astype(np.float32)
+        if mode == "max":
+            return np.where(m > 0, token_embeddings, -1e9).max(axis=1)
+        summed = (token_embeddings * m).sum(axis=1)
+        return summed / np.clip(m.sum(axis=1), 1e-9, None)
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        if self.config["do_lower_case"]:
+            texts = [t.lower() for t in texts]
+        encodings = self.tokenizer.encode_batch(texts)
+        feeds = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        (token_embeddings,) = self.session.run(None, {n: feeds[n] for n in self.input_names})
+        return self._pool(token_embeddings, feeds["attention_mask"])
+
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = 32, convert_to_numpy: bool = True,
+               normalize_embeddings: bool = False, show_progress_bar: bool = False) -> np.ndarray:
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        dim = self.get_sentence_embedding_dimension()
+        out = np.zeros((len(texts), dim), dtype=np.float32)
+
+        # like SentenceTransformer: sort by length so each batch pads little
+        order = sorted(range(len(texts)), key=lambda i: -len(texts[i]))
+        for start in range(0, len(order), batch_size):
+            idx = order[start:start + batch_size]
+            out[idx] = self._encode_batch([texts[i] for i in idx])
+
+        if self.config["normalize"] or normalize_embeddings:
+            norms = np.linalg.norm(out, axis=1, keepdims=True)
+            out = out / np.clip(norms, 1e-12, None)
+        return out[0] if single else out
+
+
+def load_onnx_encoder(model_name: str = EMBEDDING_MODEL, quantized: bool = False,
+                      model_dir: Optional[str] = None) -> OnnxSentenceEncoder:
+    """Load the exported model, exporting it first if it is not on disk yet."""
+    model_dir = model_dir or default_model_dir(model_name)
+    model_file = QUANTIZED_MODEL_FILE if quantized else MODEL_FILE
+    if not os.path.exists(os.path.join(model_dir, model_file)):
+        logger.info("No ONNX export of %s in %s, exporting now", model_name, model_dir)
+        export_onnx(model_name, model_dir, quantize=quantized)
+    return OnnxSentenceEncoder(model_dir, quantized=quantized)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the embedding model to ONNX")
+    parser.add_argument("--model", default=EMBEDDING_MODEL)
+    parser.add_argument("--out-dir", default=None)
+    parser.add_argument("--quantize", action="store_true", help="also write a dynamic int8 model")
+    parser.add_argument("--opset", type=int, default=17)
+    args = parser.parse_args()
+    print(export_onnx(args.model, args.out_dir, quantize=args.quantize, opset=args.opset))
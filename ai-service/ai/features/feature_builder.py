@@ -1,8 +1,12 @@
 ﻿
+import logging
 import re
 import numpy as np
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 from ai.features.domain_map import DOMAIN_KEYWORDS_TEXT, DOMAIN_KEYWORDS_SKILLS
+from ai.logging_config import get_logger
+
+logger = get_logger("features")
 
 
 def cosine_similarity(a, b):
@@ -25,6 +29,128 @@ def _normalize_skill(val: str) -> str:
     return re.sub(r"[^a-z0-9]+", "", val.lower()).strip()
 
 
+def batch_cosine_similarity(vec, matrix, n: int) -> np.ndarray:
+    """
+    Cosine similarity of `vec` against every row of `matrix` as one
+    matrix-vector product. Rows (or a vec) with zero norm score 0.0, like
+    cosine_similarity. Returns n zeros when either side is missing.
+    """
+    if vec is None or matrix is None or n == 0:
+        return np.zeros(n, dtype=float)
+    mat = np.asarray(matrix, dtype=float).reshape(n, -1)
+    v = np.asarray(vec, dtype=float).reshape(-1)
+    denom = np.linalg.norm(mat, axis=1) * np.linalg.norm(v)
+    dots = mat @ v
+    out = np.zeros(n, dtype=float)
+    np.divide(dots, denom, out=out, where=denom != 0.0)
+    return out
+
+
+def _clean_list(val):
+    if not val:
+        return []
+    if isinstance(val, str):
+        return [v.strip() for v in val.split(",") if v.strip()]
+    if isinstance(val, list):
+        return [str(v).strip() for v in val if str(v).strip()]
+    return []
+
+
+# Columns of the vector returned by FeatureBuilder.build (see index comments there).
+FEATURE_NAMES = (
+    "semantic_sim",
+    "required_skill_coverage",
+    "related_skill_coverage",
+    "tool_overlap",
+    "missing_required",
+    "domain_match",
+    "title_overlap",
+    "role_match",
+    "degree_match",
+    "experience_match",
+    "gpa_norm",
+)
+NUM_FEATURES = len(FEATURE_NAMES)
+
+
+class SkillMatchIndex:
+    """
+    Lookup tables over a set of student skills that answer
+    "does t loosely match any of them" with the same semantics as
+    FeatureBuilder.loose_match, without comparing t to every skill.
+
+    - t inside some skill (covers exact and t-is-prefix): set of the
+      substrings of every skill up to `max_substring` characters, so a skill
+      of length L adds O(L * max_substring) entries instead of O(L^2);
+      longer targets are checked against each skill
+    - some skill inside t (covers skill-is-prefix): substrings of t whose
+      length is one of the skill lengths
+    - space-insensitive equality: set of space-stripped skills
+    - first-token equality: set of first tokens
+    """
+
+    # longer than nearly every skill name, so the scan fallback is rare
+    MAX_SUBSTRING = 32
+
+    def __init__(self, skills, max_substring: int = MAX_SUBSTRING):
+        self.has_any = False
+        self._max_substring = max_substring
+        self._substrings = set()
+        self._norms = set()
+        self._lengths = set()
+        self._stripped = set()
+        self._first_tokens = set()
+
+        for s in skills:
+            if not s:
+                continue
+            self.has_any = True
+            norm = s.replace("_", " ").strip()
+            self._norms.add(norm)
+            self._lengths.add(len(norm))
+            self._stripped.add(norm.replace(" ", ""))
+            tokens = norm.split()
+            if tokens:
+                self._first_tokens.add(tokens[0])
+            n = len(norm)
+            self._substrings.update(
+                norm[i:j] for i in range(n) for j in range(i + 1, min(i + max_substring, n) + 1)
+            )
+
+        # sorted so the shortest (cheapest, most likely) windows are tried first
+        self._lengths = sorted(self._lengths)
+
+    def matches(self, t: str) -> bool:
+        if not t or not self.has_any:
+            return False
+
+        t_norm = t.replace("_", " ").strip()
+        n = len(t_norm)
+        if not t_norm:
+            return True
+        if n <= self._max_substring:
+            if t_norm in self._substrings:
+                return True
+        elif any(t_norm in norm for norm in self._norms):
+            return True
+
+        norms = self._norms
+        for size in self._lengths:
+            if size > n:
+                break
+            if any(t_norm[i:i + size] in norms for i in range(n - size + 1)):
+                return True
+
+        if t_norm.replace(" ", "") in self._stripped:
+            return True
+        tokens = t_norm.split()
+        return bool(tokens) and tokens[0] in self._first_tokens
+
+    def matched(self, targets) -> set:
+        """The subset of targets that loosely match some indexed skill."""
+        return {t for t in targets if self.matches(t)}
+
+
 class FeatureBuilder:
     """
     Builds numerical feature vector + explanation reasons for (student, job).
@@ -83,6 +209,108 @@ class FeatureBuilder:
         b_first = b_norm.split()[0] if b_norm.split() else ""
         return bool(a_first) and a_first == b_first
 
+    @staticmethod
+    def _student_profile(student: Dict) -> Dict:
+        """
+        Everything FeatureBuilder needs from the student that does not depend
+        on the job. Computed once per request by build_batch.
+        """
+        raw_s_skills = [s for s in student.get("skills", []) if isinstance(s, str)]
+        norm_s = { _normalize_skill(s): s for s in raw_s_skills if _normalize_skill(s) }
+
+        student_domains = [d.lower() for d in student.get("domains", [])]
+        if not student_domains:
+            student_domains = FeatureBuilder._infer_domains_from_skills(student.get("skills", []))
+        if not student_domains:
+            student_domains = FeatureBuilder._infer_domains_from_text(student.get("resume_text", ""))
+
+        positions = _clean_list(student.get("positions") or [])
+        pos_tokens = []
+        if positions:
+            pos_text = " ".join(positions).lower()
+            pos_tokens = [tok for tok in re.split(r"[^a-z0-9]+", pos_text) if tok]
+
+        edu_entries = student.get("education") or []
+
+        stud_resp = str(student.get("responsibilities", "") or "")
+        stud_tokens = set(re.split(r"[^a-z0-9]+", stud_resp.lower())) if stud_resp else set()
+        stud_tokens.discard("")
+
+        gpa = float(student.get("gpa") or 0.0)
+
+        return {
+            "skills": student.get("skills"),
+            "raw_s_skills": raw_s_skills,
+            "norm_s": norm_s,
+            "skill_index": SkillMatchIndex(norm_s.keys()),
+            "norm_s_joined": " ".join(norm_s.keys()),
+            "domains": set(student_domains),
+            "resume_text": student.get("resume_text", "").lower(),
+            "positions": positions,
+            "pos_tokens": pos_tokens,
+            "has_education": bool(edu_entries),
+            "edu_text": " ".join(str(e) for e in edu_entries).lower(),
+            "exp_count": len(student.get("experience") or []),
+            "has_responsibilities": bool(stud_resp),
+            "resp_tokens": stud_tokens,
+            "gpa_norm": min(max(gpa / 10.0, 0.0), 1.0),
+        }
+
+    @staticmethod
+    def job_profile(job: Dict) -> Dict:
+        """
+        Everything FeatureBuilder needs from the job that does not depend on
+        the student. Computed per call by build/build_batch, or once per job
+        version by the service's job profile store.
+        """
+        raw_req_skills = _clean_list(job.get("skills_required") or job.get("skills") or [])
+        raw_related_skills = _clean_list(job.get("related_skills_in_job") or [])
+        raw_job_skills = _clean_list(job.get("skills") or [])
+        raw_job_tools = _clean_list(job.get("tools") or [])
+
+        norm_req = { _normalize_skill(s): s for s in raw_req_skills if _normalize_skill(s) }
+        norm_related = { _normalize_skill(s): s for s in raw_related_skills if _normalize_skill(s) }
+        norm_tools = { _normalize_skill(s): s for s in raw_job_tools if _normalize_skill(s) }
+        norm_job = { _normalize_skill(s): s for s in raw_job_skills if _normalize_skill(s) }
+
+        job_text = f"{job.get('title','')} {job.get('description','')}"
+        job_domains = [d.lower() for d in job.get("domains", [])] if job.get("domains") else []
+        if not job_domains:
+            job_domains = FeatureBuilder._infer_domains_from_skills(job.get("skills", []))
+        if not job_domains:
+            job_domains = FeatureBuilder._infer_domains_from_text(job_text)
+
+        title_tokens = [tok for tok in re.split(r"[^a-z0-9]+", job.get("title", "").lower()) if tok]
+
+        edu_req = str(job.get("education_requirement", "") or job.get("educationaL_requirements", "") or "").lower()
+
+        exp_req_text = str(job.get("experience_requirement", "") or job.get("experiencere_requirement", "") or "").lower()
+        req_years = 0.0
+        m = re.search(r"(\d+)\s*(\+)?\s*(year|yr)", exp_req_text)
+        if m:
+            req_years = float(m.group(1))
+
+        job_resp = str(job.get("responsibilities_text", "") or "")
+        resp_tokens = set(re.split(r"[^a-z0-9]+", job_resp.lower())) if job_resp else set()
+        resp_tokens.discard("")
+
+        return {
+            "title": job.get("title"),
+            "skills": job.get("skills"),
+            "has_skills": bool(raw_job_skills),
+            "norm_req": norm_req,
+            "norm_related": norm_related,
+            "norm_tools": norm_tools,
+            "norm_job": norm_job,
+            "skill_keys": norm_req.keys() | norm_related.keys() | norm_tools.keys() | norm_job.keys(),
+            "domains": set(job_domains),
+            "title_tokens": title_tokens,
+            "edu_req_tokens": edu_req.split(),
+            "req_years": req_years,
+            "has_responsibilities": bool(job_resp),
+            "resp_tokens": resp_tokens,
+        }
+
     def build(
         self,
         student: Dict,
@@ -90,11 +318,72 @@ class FeatureBuilder:
         student_vec,
         job_vec
     ) -> Tuple[np.ndarray, List[str]]:
+        sim = cosine_similarity(student_vec, job_vec)
+        return self._build_from_profile(self._student_profile(student), self.job_profile(job), sim)
+
+    def build_batch(
+        self,
+        student: Dict,
+        jobs: List[Dict],
+        student_vec,
+        job_matrix,
+        job_profiles: Optional[List[Optional[Dict]]] = None,
+    ) -> Tuple[np.ndarray, List[List[str]]]:
+        """
+        Features for one student against N jobs. Student-side work is done
+        once and all semantic similarities come from one matrix-vector
+        product. Precomputed job_profiles (from job_profile) skip the
+        job-side work. Row i (and reasons[i]) equals build(student, jobs[i], ...).
+        """
+        profile = self._student_profile(student)
+        sims = batch_cosine_similarity(student_vec, job_matrix, len(jobs))
+
+        features = np.zeros((len(jobs), NUM_FEATURES), dtype=float)
+        reasons: List[List[str]] = []
+        for i, job in enumerate(jobs):
+            jp = job_profiles[i] if job_profiles is not None else None
+            if jp is None:
+                jp = self.job_profile(job)
+            features[i], job_reasons = self._build_from_profile(profile, jp, float(sims[i]))
+            reasons.append(job_reasons)
+        return features, reasons
+
+    def build_for_students(
+        self,
+        students: List[Dict],
+        job: Dict,
+        student_matrix,
+        job_vec,
+        job_profile: Optional[Dict] = None,
+    ) -> Tuple[np.ndarray, List[List[str]]]:
+        """
+        Features for N students against one job (ranking applicants). Job-side
+        work is done once and all similarities come from one matrix-vector
+        product. Row i (and reasons[i]) equals build(students[i], job, ...).
+        """
+        jp = job_profile if job_profile is not None else self.job_profile(job)
+        sims = batch_cosine_similarity(job_vec, student_matrix, len(students))
+
+        features = np.zeros((len(students), NUM_FEATURES), dtype=float)
+        reasons: List[List[str]] = []
+        for i, student in enumerate(students):
+            features[i], student_reasons = self._build_from_profile(
+                self._student_profile(student), jp, float(sims[i])
+            )
+            reasons.append(student_reasons)
+        return features, reasons
+
+    def _build_from_profile(
+        self,
+        profile: Dict,
+        job: Dict,
+        sim: float,
+    ) -> Tuple[np.ndarray, List[str]]:
+        """Features + reasons from a student profile and a job profile."""
 
         reasons: List[str] = []
 
         # semantic similarity
-        sim = cosine_similarity(student_vec, job_vec)
         if sim > 0.55:
             reasons.append("Strong semantic similarity with the job description.")
         elif sim > 0.35:
@@ -102,64 +391,40 @@ class FeatureBuilder:
         elif sim > 0.20:
             reasons.append("Weak semantic similarity to the job description.")
 
-        # Helpers for list cleaning
-        def _clean_list(val):
-            if not val:
-                return []
-            if isinstance(val, str):
-                return [v.strip() for v in val.split(",") if v.strip()]
-            if isinstance(val, list):
-                return [str(v).strip() for v in val if str(v).strip()]
-            return []
-
-        raw_s_skills = [s for s in student.get("skills", []) if isinstance(s, str)]
-        raw_req_skills = _clean_list(job.get("skills_required") or job.get("skills") or [])
-        raw_related_skills = _clean_list(job.get("related_skills_in_job") or [])
-        raw_job_skills = _clean_list(job.get("skills") or [])
-        raw_job_tools = _clean_list(job.get("tools") or [])
+        raw_s_skills = profile["raw_s_skills"]
+        norm_s = profile["norm_s"]
+        norm_req = job["norm_req"]
+        norm_related = job["norm_related"]
+        norm_tools = job["norm_tools"]
+        norm_job = job["norm_job"]
 
-        norm_s = { _normalize_skill(s): s for s in raw_s_skills if _normalize_skill(s) }
-        norm_req = { _normalize_skill(s): s for s in raw_req_skills if _normalize_skill(s) }
-        norm_related = { _normalize_skill(s): s for s in raw_related_skills if _normalize_skill(s) }
-        norm_tools = { _normalize_skill(s): s for s in raw_job_tools if _normalize_skill(s) }
-        norm_job = { _normalize_skill(s): s for s in raw_job_skills if _normalize_skill(s) }
+        # every job-side skill checked against the student once; the
+        # coverage features and reasons below all reuse this set
+        matched_keys = profile["skill_index"].matched(job["skill_keys"])
 
-        def _coverage(src: set, tgt: set) -> float:
+        def _coverage(tgt) -> float:
             if not tgt:
                 return 0.0
-            hits = sum(1 for t in tgt if any(self.loose_match(t, s) for s in src))
+            hits = sum(1 for t in tgt if t in matched_keys)
             return (hits / len(tgt)) ** 0.5
 
-        required_cov = _coverage(set(norm_s.keys()), set(norm_req.keys()))
-        related_cov = _coverage(set(norm_s.keys()), set(norm_related.keys()))
-        tool_overlap = _coverage(set(norm_s.keys()), set(norm_tools.keys()))
+        required_cov = _coverage(norm_req)
+        related_cov = _coverage(norm_related)
+        tool_overlap = _coverage(norm_tools)
         missing_required = 0.0
+        matched = [norm_req[k] for k in norm_req if k in matched_keys]
         if norm_req:
-            matched = sum(1 for t in norm_req if any(self.loose_match(t, s) for s in norm_s))
-            missing_required = max(0.0, (len(norm_req) - matched) / len(norm_req))
+            missing_required = max(0.0, (len(norm_req) - len(matched)) / len(norm_req))
         # general skill overlap as backup
-        general_overlap = _coverage(set(norm_s.keys()), set(norm_job.keys()))
-        if matched := [norm_req[k] for k in norm_req if any(self.loose_match(k, s) for s in norm_s)]:
+        general_overlap = _coverage(norm_job)
+        if matched:
             reasons.append("Matching required skills: " + ", ".join(sorted(set(matched))))
         elif general_overlap > 0:
             reasons.append("Some skills match the role requirements.")
 
         # domain match
         domain_match = 0.0
-        job_text = f"{job.get('title','')} {job.get('description','')}"
-        job_domains = [d.lower() for d in job.get("domains", [])] if job.get("domains") else []
-        if not job_domains:
-            job_domains = self._infer_domains_from_skills(job.get("skills", []))
-        if not job_domains:
-            job_domains = self._infer_domains_from_text(job_text)
-
-        student_domains = [d.lower() for d in student.get("domains", [])]
-        if not student_domains:
-            student_domains = self._infer_domains_from_skills(student.get("skills", []))
-        if not student_domains:
-            student_domains = self._infer_domains_from_text(student.get("resume_text", ""))
-
-        shared_domains = set(job_domains) & set(student_domains)
+        shared_domains = job["domains"] & profile["domains"]
         if shared_domains:
             domain_match = 1.0
             # pick one for messaging
@@ -167,58 +432,44 @@ class FeatureBuilder:
             reasons.append(f"This role matches your preferred domain: {dom}.")
 
         # title overlap (job title vs resume text + skills)
-        title_tokens = [tok for tok in re.split(r"[^a-z0-9]+", job.get("title", "").lower()) if tok]
-        resume_text = student.get("resume_text", "").lower()
-        title_hits = sum(1 for t in title_tokens if t and (t in resume_text or t in " ".join(norm_s.keys())))
+        title_tokens = job["title_tokens"]
+        resume_text = profile["resume_text"]
+        title_hits = sum(1 for t in title_tokens if t and (t in resume_text or t in profile["norm_s_joined"]))
         title_overlap = min(title_hits / len(title_tokens), 1.0) if title_tokens else 0.0
         if title_overlap >= 0.5:
             reasons.append("Your profile mentions key terms from the job title.")
 
         # role title match (student positions vs job title)
-        positions = _clean_list(student.get("positions") or [])
         role_match = 0.0
-        if positions and title_tokens:
-            pos_text = " ".join(positions).lower()
-            pos_tokens = [tok for tok in re.split(r"[^a-z0-9]+", pos_text) if tok]
+        if profile["positions"] and title_tokens:
+            pos_tokens = profile["pos_tokens"]
             hits = sum(1 for t in title_tokens if t in pos_tokens)
             role_match = min(hits / len(title_tokens), 1.0)
 
         # education match
-        edu_entries = student.get("education") or []
-        edu_text = " ".join(str(e) for e in edu_entries).lower()
-        edu_req = str(job.get("education_requirement", "") or job.get("educationaL_requirements", "") or "").lower()
+        edu_text = profile["edu_text"]
         degree_match = 0.0
-        if edu_req and edu_entries:
-            degree_match = 1.0 if any(tok in edu_text for tok in edu_req.split()) else 0.0
+        if job["edu_req_tokens"] and profile["has_education"]:
+            degree_match = 1.0 if any(tok in edu_text for tok in job["edu_req_tokens"]) else 0.0
 
         # experience match (count-based vs requested years in text)
-        exp_entries = student.get("experience") or []
-        exp_req_text = str(job.get("experience_requirement", "") or job.get("experiencere_requirement", "") or "").lower()
+        exp_count = profile["exp_count"]
         exp_match = 0.0
-        req_years = 0.0
-        m = re.search(r"(\d+)\s*(\+)?\s*(year|yr)", exp_req_text)
-        if m:
-            req_years = float(m.group(1))
+        req_years = job["req_years"]
         if req_years > 0:
-            exp_match = min(len(exp_entries) / max(req_years, 1.0), 1.0)
-        elif exp_entries:
+            exp_match = min(exp_count / max(req_years, 1.0), 1.0)
+        elif exp_count:
             exp_match = 1.0
 
         # responsibilities overlap (student responsibilities vs job responsibilities text)
-        job_resp = str(job.get("responsibilities_text", "") or "")
-        stud_resp = str(student.get("responsibilities", "") or "")
         resp_overlap = 0.0
-        if job_resp and stud_resp:
-            job_tokens = set(re.split(r"[^a-z0-9]+", job_resp.lower()))
-            stud_tokens = set(re.split(r"[^a-z0-9]+", stud_resp.lower()))
-            job_tokens.discard("")
-            stud_tokens.discard("")
+        if job["has_responsibilities"] and profile["has_responsibilities"]:
+            job_tokens = job["resp_tokens"]
             if job_tokens:
-                resp_overlap = len(job_tokens & stud_tokens) / len(job_tokens)
+                resp_overlap = len(job_tokens & profile["resp_tokens"]) / len(job_tokens)
 
         # GPA normalized (0-10 scale)
-        gpa = float(student.get("gpa") or 0.0)
-        gpa_norm = min(max(gpa / 10.0, 0.0), 1.0)
+        gpa_norm = profile["gpa_norm"]
 
         features = np.array([
             sim,                 # 0
@@ -238,26 +489,23 @@ class FeatureBuilder:
         if not reasons:
             if not raw_s_skills:
                 reasons.append("No skills were extracted from your resume.")
-            if not raw_job_skills:
+            if not job["has_skills"]:
                 reasons.append("This job listing has no skills data.")
             if sim < 0.3:
                 reasons.append("Low semantic similarity between your resume and this job.")
-            if raw_s_skills and raw_job_skills and required_cov == 0.0 and general_overlap == 0.0:
+            if raw_s_skills and job["has_skills"] and required_cov == 0.0 and general_overlap == 0.0:
                 reasons.append("No matching skills found between your profile and this job.")
             if not reasons:
                 reasons.append("No highlights available for this match.")
 
-        print("\n====== DEBUG: FeatureBuilder ======")
-        print("Student skills:", student.get("skills"))
-        print("Job skills:", job.get("skills"))
-        print("Normalized student skills:", norm_s)
-        print("Required skills norm:", norm_req)
-        print("Related skills norm:", norm_related)
-        print("Tool norm:", norm_tools)
-        print("General job skills norm:", norm_job)
-        print("Semantic similarity:", sim)
-        print("Feature vector:", features)
-        print("Reasons:", reasons)
-        print("===================================\n")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "FeatureBuilder job=%r student_skills=%s job_skills=%s norm_student=%s "
+                "norm_required=%s norm_related=%s norm_tools=%s norm_job=%s sim=%.4f "
+                "features=%s reasons=%s",
+                job["title"], profile["skills"], job["skills"], norm_s,
+                norm_req, norm_related, norm_tools, norm_job, sim,
+                features.tolist(), reasons,
+            )
 
         return features, reasons
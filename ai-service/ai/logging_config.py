@@ -1,10 +1,21 @@
 ﻿
 import logging
 
+from ai.config import LOG_LEVEL
+
+ROOT_LOGGER = "ai-service"
+
 
 def setup_logging():
     logging.basicConfig(
         level=logging.INFO,
         format="%(asctime)s [%(levelname)s] %(name)s - %(message)s",
     )
-    return logging.getLogger("ai-service")
+    logger = logging.getLogger(ROOT_LOGGER)
+    logger.setLevel(LOG_LEVEL)
+    return logger
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Child of the service logger, e.g. get_logger("features") -> "ai-service.features"."""
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
@@ -0,0 +1,313 @@
+"""
+In-process Prometheus-style metrics.
+
+A small registry of counters and histograms rendered in the Prometheus text
+exposition format by the /metrics endpoint, so the service can be scraped
+without a client library or a sidecar collector. Everything is thread-safe;
+observations are a lock plus a bisect.
+
+Under the pre-fork server (ai/serving/prefork.py) every worker has its own
+registry, and a scrape reaches whichever worker accepts it. So each worker
+calls REGISTRY.enable_multiprocess(directory): it writes a JSON snapshot of
+its series to <directory>/<pid>.json every METRICS_FLUSH_INTERVAL seconds and
+on exit, and /metrics in any worker renders the sum over all snapshots (its
+own taken fresh). Counters, histograms and callback metrics are summed
+across workers; the snapshots of exited workers are kept, so totals stay
+monotonic across restarts. Other workers' series lag by at most one interval.
+"""
+
+import bisect
+import glob
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+COUNT_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_labels(names: Sequence[str], values: Sequence, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _fmt_value(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict) -> Tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type_name}"]
+
+    def collect(self) -> Dict[Tuple, object]:
+        """Current series: label value tuple -> value."""
+        raise NotImplementedError
+
+    @staticmethod
+    def merge(a, b):
+        """Sum of two values of one series, from different workers."""
+        return a + b
+
+    def render(self, series: Optional[Dict[Tuple, object]] = None) -> List[str]:
+        """Exposition lines for `series` (default: this process's own)."""
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def __init__(self, name, help_text, labelnames=()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def collect(self) -> Dict[Tuple, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def render(self, series=None) -> List[str]:
+        items = sorted((self.collect() if series is None else series).items())
+        if not items and not self.labelnames:
+            items = [((), 0.0)]
+        return self.header() + [
+            f"{self.name}{_fmt_labels(self.labelnames, k)} {_fmt_value(v)}" for k, v in items
+        ]
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets: Iterable[float] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: [bucket counts..., +Inf count], sum
+        self._series: Dict[Tuple, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._series.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[idx] += 1
+            total[0] += value
+
+    @contextmanager
+    def time(self, **labels):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, **labels)
+
+    def collect(self) -> Dict[Tuple, Tuple[List[int], float]]:
+        with self._lock:
+            return {k: (list(c), s[0]) for k, (c, s) in self._series.items()}
+
+    @staticmethod
+    def merge(a, b):
+        return [x + y for x, y in zip(a[0], b[0])], a[1] + b[1]
+
+    def render(self, series=None) -> List[str]:
+        lines = self.header()
+        for key, (counts, total) in sorted((self.collect() if series is None else series).items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_fmt_value(float(bound))}"'
+                lines.append(f"{self.name}_bucket{_fmt_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_fmt_labels(self.labelnames, key)} {_fmt_value(total)}")
+            lines.append(f"{self.name}_count{_fmt_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class CallbackMetric(_Metric):
+    """
+    Metric whose values are read from `fn` at scrape time, for state that
+    already lives elsewhere (e.g. EmbeddingCache counters).
+    `fn` returns {label value tuple: number}.
+    """
+
+    def __init__(self, name, help_text, type_name: str, fn: Callable[[], Dict[Tuple, float]], labelnames=()):
+        super().__init__(name, help_text, labelnames)
+        self.type_name = type_name
+        self.fn = fn
+
+    def collect(self) -> Dict[Tuple, float]:
+        try:
+            return {tuple(str(v) for v in k): float(n) for k, n in (self.fn() or {}).items()}
+        except Exception:
+            return {}
+
+    def render(self, series=None) -> List[str]:
+        values = self.collect() if series is None else series
+        return self.header() + [
+            f"{self.name}{_fmt_labels(self.labelnames, k)} {_fmt_value(v)}"
+            for k, v in sorted(values.items())
+        ]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+        self._dir: Optional[str] = None  # shared snapshot directory in multiprocess mode
+        self._stop = threading.Event()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, help_text, labelnames=()) -> Counter:
+        return self._register(Counter(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def callback(self, name, help_text, type_name, fn, labelnames=()) -> CallbackMetric:
+        with self._lock:
+            metric = CallbackMetric(name, help_text, type_name, fn, labelnames)
+            self._metrics[name] = metric  # re-registering replaces the callback
+            return metric
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def snapshot(self) -> Dict[str, List]:
+        """name -> [[label values, value], ...] of this process, JSON-serializable."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {m.name: [[list(k), v] for k, v in m.collect().items()] for m in metrics}
+
+    def enable_multiprocess(self, directory: str, interval: float = 1.0) -> None:
+        """Share this process's series through `directory` (see the module docstring)."""
+        self._dir = directory
+        self._stop.clear()
+        self.flush()
+        if interval > 0:
+            threading.Thread(target=self._flush_loop, args=(interval,), name="metrics-flush", daemon=True).start()
+
+    def disable_multiprocess(self) -> None:
+        """Write a last snapshot and stop sharing; called when a worker exits."""
+        if self._dir is not None:
+            self._stop.set()
+            self.flush()
+            self._dir = None
+
+    def flush(self) -> None:
+        directory = self._dir
+        if directory is None:
+            return
+        path = os.path.join(directory, f"{os.getpid()}.json")
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp, path)  # readers never see a half-written snapshot
+
+    def _flush_loop(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            try:
+                self.flush()
+            except Exception:  # a full disk must not kill the worker
+                pass
+
+    def _merged(self) -> Dict[str, Dict[Tuple, object]]:
+        self.flush()
+        merged: Dict[str, Dict[Tuple, object]] = {}
+        for path in glob.glob(os.path.join(self._dir, "*.json")):
+            try:
+                with open(path) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for name, series in snapshot.items():
+                metric = self._metrics.get(name)
+                if metric is None:
+                    continue
+                out = merged.setdefault(name, {})
+                for labels, value in series:
+                    key = tuple(labels)
+                    out[key] = metric.merge(out[key], value) if key in out else value
+        return merged
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        merged = self._merged() if self._dir is not None else None
+        lines: List[str] = []
+        for m in metrics:
+            lines.extend(m.render(None if merged is None else merged.get(m.name, {})))
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+# Pipeline stages: pdf_extract, gemini_call, embedding, feature_build, xgb_predict, simple_ranker
+STAGE_LATENCY = REGISTRY.histogram(
+    "ai_stage_latency_seconds", "Latency of individual pipeline stages.", ("stage",)
+)
+REQUEST_LATENCY = REGISTRY.histogram(
+    "ai_request_latency_seconds", "End-to-end handler latency per endpoint.", ("endpoint",)
+)
+JOBS_PER_REQUEST = REGISTRY.histogram(
+    "ai_recommend_jobs_per_request", "Number of jobs scored per /recommend call.",
+    buckets=COUNT_BUCKETS,
+)
+GEMINI_RETRIES = REGISTRY.counter(
+    "ai_gemini_retries_total", "Gemini calls that failed and were retried."
+)
+GEMINI_FAILURES = REGISTRY.counter(
+    "ai_gemini_failures_total", "Resume parses that gave up after all Gemini retries."
+)
+XGB_FALLBACKS = REGISTRY.counter(
+    "ai_xgb_fallbacks_total", "Requests scored by SimpleRanker instead of XGB.", ("reason",)
+)
+EMBED_BATCH_SIZE = REGISTRY.histogram(
+    "ai_embedding_batch_size", "Texts per batched encode call from the embedding scheduler.",
+    buckets=COUNT_BUCKETS,
+)
+EMBED_QUEUE_WAIT = REGISTRY.histogram(
+    "ai_embedding_queue_wait_seconds", "Time a text waited in the embedding scheduler before its batch ran."
+)
+BULK_RESUMES = REGISTRY.counter(
+    "ai_bulk_resumes_total", "Resumes processed by bulk ingestion, by outcome.", ("status",)
+)
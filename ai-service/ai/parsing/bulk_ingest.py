@@ -0,0 +1,401 @@
+"""
+Bulk resume ingestion shared by the /parse_resumes endpoint and the CLI.
+
+Pipeline per resume: PDF text extraction in a process pool -> Gemini parse
+(bounded concurrency + rate limit) and embedding (collected into large
+batches) in parallel -> one result record. Records are yielded as each
+resume finishes, so callers can stream them out as NDJSON.
+
+CLI (run from ai-service/):
+    python -m ai.parsing.bulk_ingest resumes/ batch.zip extra.pdf -o parsed.ndjson
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import IO, AsyncIterable, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from ai.config import (
+    BULK_EMBED_BATCH,
+    BULK_EXTRACT_PROCESSES,
+    BULK_LLM_CONCURRENCY,
+    BULK_LLM_RATE_PER_SEC,
+)
+from ai.embeddings.batcher import EmbeddingBatcher
+from ai.embeddings.codec import encode_embedding
+from ai.logging_config import get_logger
+from ai.metrics import BULK_RESUMES, STAGE_LATENCY
+from ai.parsing.text_extractor import ResumeTextExtractor
+
+logger = get_logger("bulk_ingest")
+
+
+# ---------- Inputs ----------
+
+def extract_pdf_text(pdf_bytes: bytes) -> str:
+    """Module-level so it can run in a ProcessPoolExecutor worker."""
+    return ResumeTextExtractor().extract_text(pdf_bytes)
+
+
+def _zip_pdf_members(zf: zipfile.ZipFile) -> List[zipfile.ZipInfo]:
+    return [info for info in zf.infolist() if not info.is_dir() and info.filename.lower().endswith(".pdf")]
+
+
+def iter_zip_pdfs(data: Union[bytes, str, IO[bytes]], prefix: str = "") -> Iterator[Tuple[str, bytes]]:
+    """PDF members of a zip (bytes, path or seekable file), read one member at a time."""
+    with zipfile.ZipFile(io.BytesIO(data) if isinstance(data, bytes) else data) as zf:
+        for info in _zip_pdf_members(zf):
+            yield f"{prefix}{info.filename}", zf.read(info)
+
+
+def count_zip_pdfs(data: Union[bytes, str, IO[bytes]]) -> int:
+    """PDF members in a zip; reads only the central directory."""
+    with zipfile.ZipFile(io.BytesIO(data) if isinstance(data, bytes) else data) as zf:
+        return len(_zip_pdf_members(zf))
+
+
+def iter_pdf_paths(paths: Iterable[str]) -> Iterator[Tuple[str, bytes]]:
+    """Yield (name, bytes) for PDFs in files, directories (recursive) and zip archives."""
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for fn in sorted(files):
+                    full = os.path.join(root, fn)
+                    if fn.lower().endswith((".pdf", ".zip")):
+                        yield from iter_pdf_paths([full])
+        elif path.lower().endswith(".zip"):
+            yield from iter_zip_pdfs(path, prefix=f"{path}:")
+        else:
+            with open(path, "rb") as f:
+                yield path, f.read()
+
+
+_extract_pool: Optional[ProcessPoolExecutor] = None
+_extract_pool_lock = threading.Lock()
+
+
+def make_extract_pool(processes: int = BULK_EXTRACT_PROCESSES) -> ProcessPoolExecutor:
+    # spawn, not fork: the service process already runs threads (embedding
+    # batcher, SQLite executors, Gemini client) whose locks a forked child
+    # could inherit in the held state and deadlock on
+    return ProcessPoolExecutor(max_workers=max(1, processes), mp_context=multiprocessing.get_context("spawn"))
+
+
+def get_extract_pool() -> ProcessPoolExecutor:
+    global _extract_pool
+    with _extract_pool_lock:
+        if _extract_pool is None:
+            _extract_pool = make_extract_pool()
+        return _extract_pool
+
+
+def replace_extract_pool(broken: ProcessPoolExecutor) -> ProcessPoolExecutor:
+    """
+    The shared pool, rebuilt if it is still `broken` (a worker died, e.g. OOM
+    on a hostile PDF); callers that all saw the same break get one new pool.
+    """
+    global _extract_pool
+    with _extract_pool_lock:
+        if _extract_pool is broken or _extract_pool is None:
+            broken.shutdown(wait=False, cancel_futures=True)
+            _extract_pool = make_extract_pool()
+            logger.warning("Extraction process pool broke; started a new one")
+        return _extract_pool
+
+
+# ---------- Concurrency helpers ----------
+
+class AsyncRateLimiter:
+    """Token bucket: at most `rate` acquisitions per second, bursts up to `burst`."""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.capacity = float(burst or max(1, int(rate)))
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                await asyncio.sleep((1.0 - self._tokens) / self.rate)
+
+
+async def _aiter(items):
+    if hasattr(items, "__aiter__"):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+# ---------- Ingestor ----------
+
+class BulkResumeIngestor:
+    """
+    Parses many resumes concurrently and yields one record per resume as it
+    finishes, followed by a final summary record.
+    """
+
+    def __init__(
+        self,
+        parser,
+        embedder,
+        cleaner,
+        skill_normalizer,
+        extract_pool=None,
+        parse_cache=None,
+        llm_concurrency: int = BULK_LLM_CONCURRENCY,
+        llm_rate_per_sec: float = BULK_LLM_RATE_PER_SEC,
+        embed_batch: int = BULK_EMBED_BATCH,
+        max_in_flight: Optional[int] = None,
+    ):
+        self.parser = parser
+        self.embedder = embedder
+        self.cleaner = cleaner
+        self.skill_normalizer = skill_normalizer
+        self._owns_pool = extract_pool is not None  # else the shared pool, see replace_extract_pool
+        self.extract_pool = extract_pool or get_extract_pool()
+        self.parse_cache = parse_cache
+        self.llm_concurrency = max(1, llm_concurrency)
+        self.llm_rate_per_sec = llm_rate_per_sec
+        self.embed_batch = embed_batch
+        # bounds how many PDFs are held in memory at once
+        self.max_in_flight = max_in_flight or max(32, 4 * self.llm_concurrency)
+
+    async def _parse_one(self, index, name, data, llm_sem, limiter, batcher) -> Dict:
+        loop = asyncio.get_running_loop()
+        t0 = time.perf_counter()
+        record = {"type": "result", "index": index, "filename": name}
+        try:
+            cache = self.parse_cache
+            hit = await loop.run_in_executor(None, cache.get_by_pdf, data) if cache else None
+            if hit is None or hit["embedding"] is None:  # an entry without a vector is redone in full
+                with STAGE_LATENCY.time(stage="pdf_extract"):
+                    raw_text = await self._extract(data)
+                if not raw_text:
+                    raise ValueError("no text could be extracted from the PDF")
+                if cache:
+                    hit = await loop.run_in_executor(None, cache.get_by_text, data, raw_text)
+            if hit is not None and hit["embedding"] is not None:
+                record.update({
+                    "status": "ok",
+                    "cached": True,
+                    "raw_text": hit["raw_text"],
+                    "parsed": self._normalized(hit["parsed"]),
+                    "embedding": encode_embedding(hit["embedding"], model=self.embedder.model_id),
+                })
+                return self._finish(record, t0)
+
+            async def _llm():
+                async with llm_sem:
+                    await limiter.acquire()
+                    return await self.parser.parse_async(raw_text)
+
+            parsed, embedding = await asyncio.gather(_llm(), batcher.embed_async(raw_text))
+            llm_ok = bool(parsed)
+            parsed = self.cleaner.clean(parsed)
+            if cache and llm_ok:  # cached before skill normalization, see parse_cache.CACHE_FORMAT
+                await loop.run_in_executor(None, cache.put, data, raw_text, parsed, embedding)
+            record.update({
+                "status": "ok",
+                "cached": False,
+                "raw_text": raw_text,
+                "parsed": self._normalized(parsed),
+                "embedding": encode_embedding(embedding, model=self.embedder.model_id),
+            })
+            if not llm_ok:
+                record["warnings"] = ["llm_parse_failed"]
+        except Exception as e:
+            logger.warning("Bulk ingest failed for %s: %s", name, e)
+            record.update({"status": "error", "error": str(e)})
+        return self._finish(record, t0)
+
+    async def _extract(self, data: bytes) -> str:
+        """extract_pdf_text in the process pool; a broken pool is replaced and the PDF retried once."""
+        loop = asyncio.get_running_loop()
+        pool = self.extract_pool
+        try:
+            return await loop.run_in_executor(pool, extract_pdf_text, data)
+        except BrokenProcessPool:
+            if self.extract_pool is pool:  # first item to see this break
+                if self._owns_pool:
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    self.extract_pool = make_extract_pool(getattr(pool, "_max_workers", BULK_EXTRACT_PROCESSES))
+                else:
+                    self.extract_pool = replace_extract_pool(pool)
+            return await loop.run_in_executor(self.extract_pool, extract_pdf_text, data)
+
+    def _normalized(self, parsed: Dict) -> Dict:
+        return {**parsed, "skills": self.skill_normalizer.normalize(parsed.get("skills", []))}
+
+    @staticmethod
+    def _finish(record: Dict, t0: float) -> Dict:
+        record["elapsed_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+        BULK_RESUMES.inc(status=record["status"])
+        return record
+
+    async def run(self, items: Union[Iterable[Tuple[str, bytes]], AsyncIterable[Tuple[str, bytes]]],
+                  total: Optional[int] = None) -> AsyncIterator[Dict]:
+        """
+        Yield result records (with running `done`/`total` progress) as resumes
+        finish, then one summary record with counts and throughput. `items`
+        is consumed lazily, at most max_in_flight PDFs ahead of the results;
+        pass an async iterable when producing an item does blocking I/O.
+        """
+        if total is None and hasattr(items, "__len__"):
+            total = len(items)
+
+        llm_sem = asyncio.Semaphore(self.llm_concurrency)
+        limiter = AsyncRateLimiter(self.llm_rate_per_sec, burst=self.llm_concurrency)
+        slots = asyncio.Semaphore(self.max_in_flight)
+        results: "asyncio.Queue" = asyncio.Queue()
+        # own scheduler so bulk runs get large batches without slowing online requests
+        batcher = EmbeddingBatcher(self.embedder, max_batch=self.embed_batch, max_wait_ms=50)
+        submitted = 0
+        producer_done = asyncio.Event()
+        tasks = set()  # strong refs; the loop only keeps weak ones
+
+        async def _run_one(index, name, data):
+            try:
+                await results.put(await self._parse_one(index, name, data, llm_sem, limiter, batcher))
+            finally:
+                slots.release()
+
+        async def _produce():
+            nonlocal submitted
+            try:
+                async for name, data in _aiter(items):
+                    await slots.acquire()
+                    task = asyncio.create_task(_run_one(submitted, name, data))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                    submitted += 1
+            finally:
+                producer_done.set()
+
+        start = time.perf_counter()
+        producer = asyncio.create_task(_produce())
+        done = ok = errors = 0
+        try:
+            while not (producer_done.is_set() and done == submitted):
+                try:
+                    record = await asyncio.wait_for(results.get(), timeout=0.5)
+                except asyncio.TimeoutError:
+                    continue
+                done += 1
+                if record["status"] == "ok":
+                    ok += 1
+                else:
+                    errors += 1
+                record["done"] = done
+                record["total"] = total
+                yield record
+            await producer  # surfaces input errors (e.g. unreadable zip)
+        finally:
+            # stream abandoned or failed: stop the producer and every resume
+            # still in flight before closing the batcher they submit to
+            producer.cancel()
+            pending = [producer, *tasks]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            await asyncio.get_running_loop().run_in_executor(None, batcher.close)
+
+        elapsed = time.perf_counter() - start
+        yield {
+            "type": "summary",
+            "total": done,
+            "ok": ok,
+            "errors": errors,
+            "elapsed_s": round(elapsed, 3),
+            "resumes_per_s": round(done / elapsed, 3) if elapsed > 0 else 0.0,
+        }
+
+
+# ---------- CLI ----------
+
+async def _cli(args) -> int:
+    from ai.config import PARSE_CACHE_ENABLED
+    from ai.embeddings.embedder import get_embedder
+    from ai.parsing.parse_cache import ParseResultCache
+    from ai.parsing.resume_cleaner import ResumeCleaner
+    from ai.parsing.resume_gemini_parser import ResumeGeminiParser
+    from ai.skills.skill_normalizer import SkillNormalizer
+
+    gemini_parser = ResumeGeminiParser()
+    embedder = get_embedder()
+    parse_cache = None
+    if PARSE_CACHE_ENABLED and not args.no_cache:
+        parse_cache = ParseResultCache(ParseResultCache.make_version(
+            gemini_parser.template, gemini_parser.model_name, embedder.model_id,
+        ))
+
+    ingestor = BulkResumeIngestor(
+        parser=gemini_parser,
+        embedder=embedder,
+        cleaner=ResumeCleaner(),
+        skill_normalizer=SkillNormalizer(),
+        extract_pool=make_extract_pool(args.processes),
+        parse_cache=parse_cache,
+        llm_concurrency=args.llm_concurrency,
+        llm_rate_per_sec=args.llm_rate,
+        embed_batch=args.embed_batch,
+    )
+
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    errors = 0
+    try:
+        async for record in ingestor.run(iter_pdf_paths(args.inputs)):
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            if record["type"] == "summary":
+                print(
+                    f"Done: {record['ok']} ok, {record['errors']} errors in "
+                    f"{record['elapsed_s']}s ({record['resumes_per_s']} resumes/s)",
+                    file=sys.stderr,
+                )
+            else:
+                errors += record["status"] != "ok"
+                detail = record.get("error", "")
+                print(f"[{record['done']}] {record['filename']}: {record['status']} {detail}".rstrip(),
+                      file=sys.stderr)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 1 if errors else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Parse many resume PDFs into NDJSON.")
+    parser.add_argument("inputs", nargs="+", help="PDF files, directories or .zip archives")
+    parser.add_argument("-o", "--output", help="NDJSON output path (default: stdout)")
+    parser.add_argument("--processes", type=int, default=BULK_EXTRACT_PROCESSES)
+    parser.add_argument("--llm-concurrency", type=int, default=BULK_LLM_CONCURRENCY)
+    parser.add_argument("--llm-rate", type=float, default=BULK_LLM_RATE_PER_SEC,
+                        help="max Gemini calls per second (0 = unlimited)")
+    parser.add_argument("--embed-batch", type=int, default=BULK_EMBED_BATCH)
+    parser.add_argument("--no-cache", action="store_true", help="ignore the parse result cache")
+    return asyncio.run(_cli(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,201 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+from ai.config import PARSE_CACHE_MAX_ENTRIES, PARSE_CACHE_PATH
+
+# Part of every version salt; bump when what is stored changes. 2: `parsed`
+# holds the skills as the LLM returned them, callers normalize on read so a
+# rebuilt or hot-reloaded skill map applies to cached resumes too.
+CACHE_FORMAT = "2"
+# entries are recounted from the table every this many writes, so workers
+# sharing one cache file don't drift far from the real count
+_RECOUNT_EVERY = 1000
+
+
+class ParseResultCache:
+    """
+    Persistent cache of /parse_resume results (parsed JSON + embedding).
+
+    Two fingerprints point at the same entry:
+    - sha256 of the uploaded PDF bytes (skips extraction, Gemini and embedding)
+    - sha256 of the extracted text (catches re-exports of the same resume)
+
+    Both are salted with `version`, a hash of the prompt template, the
+    Gemini model and the embedder model, so changing any of them makes old
+    entries unreachable; they are purged when the cache is opened.
+    Skills are stored un-normalized (see CACHE_FORMAT).
+    Entries are evicted least-recently-used once `max_entries` is exceeded.
+    """
+
+    def __init__(self, version: str, path: str = PARSE_CACHE_PATH,
+                 max_entries: int = PARSE_CACHE_MAX_ENTRIES):
+        self.version = version
+        self.path = path
+        self.max_entries = max(1, int(max_entries))
+        self._lock = threading.Lock()
+        self._counters = {"pdf_hits": 0, "text_hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_pid: Optional[int] = None
+        # drop entries written under another prompt/model version
+        self._conn.execute("DELETE FROM results WHERE version != ?", (version,))
+        self._conn.execute("DELETE FROM pdfs WHERE text_key NOT IN (SELECT text_key FROM results)")
+        self._conn.commit()
+        self._entries = self._count()
+        self._writes_since_count = 0
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        """This process's connection, reopened in a forked worker (SQLite handles must not cross fork)."""
+        if self._db is not None and self._db_pid == os.getpid():
+            return self._db
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS results (
+                text_key TEXT PRIMARY KEY,
+                version TEXT NOT NULL,
+                raw_text TEXT NOT NULL,
+                parsed TEXT NOT NULL,
+                embedding BLOB,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS results_last_access ON results (last_access);
+            CREATE TABLE IF NOT EXISTS pdfs (
+                pdf_key TEXT PRIMARY KEY,
+                text_key TEXT NOT NULL
+            );
+            """
+        )
+        self._db, self._db_pid = conn, os.getpid()
+        return conn
+
+    def close(self) -> None:
+        """Close the connection (e.g. before forking); it reopens on next use."""
+        with self._lock:
+            if self._db is not None and self._db_pid == os.getpid():
+                self._db.close()
+            self._db = None
+
+    @staticmethod
+    def make_version(prompt_template: str, llm_model: str, embed_model: str) -> str:
+        payload = "\x00".join([CACHE_FORMAT, prompt_template, llm_model or "", embed_model or ""])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+    def _key(self, data: bytes) -> str:
+        return hashlib.sha256(self.version.encode("ascii") + b"\x00" + data).hexdigest()
+
+    def pdf_key(self, pdf_bytes: bytes) -> str:
+        return self._key(pdf_bytes)
+
+    def text_key(self, text: str) -> str:
+        return self._key(text.encode("utf-8"))
+
+    def _load(self, text_key: str) -> Optional[Dict]:
+        row = self._conn.execute(
+            "SELECT raw_text, parsed, embedding FROM results WHERE text_key = ?", (text_key,)
+        ).fetchone()
+        if row is None:
+            return None
+        self._conn.execute(
+            "UPDATE results SET last_access = ? WHERE text_key = ?", (time.time(), text_key)
+        )
+        self._conn.commit()
+        raw_text, parsed, blob = row
+        return {
+            "raw_text": raw_text,
+            "parsed": json.loads(parsed),
+            "embedding": np.frombuffer(blob, dtype=np.float32) if blob else None,
+        }
+
+    def get_by_pdf(self, pdf_bytes: bytes) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT text_key FROM pdfs WHERE pdf_key = ?", (self.pdf_key(pdf_bytes),)
+            ).fetchone()
+            entry = self._load(row[0]) if row else None
+            if entry is not None:
+                self._counters["pdf_hits"] += 1
+            return entry
+
+    def get_by_text(self, pdf_bytes: bytes, raw_text: str) -> Optional[Dict]:
+        """Lookup by extracted text; on a hit, also remember these PDF bytes."""
+        text_key = self.text_key(raw_text)
+        with self._lock:
+            entry = self._load(text_key)
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+            self._counters["text_hits"] += 1
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pdfs (pdf_key, text_key) VALUES (?, ?)",
+                (self.pdf_key(pdf_bytes), text_key),
+            )
+            self._conn.commit()
+            return entry
+
+    def put(self, pdf_bytes: bytes, raw_text: str, parsed: Dict, embedding) -> None:
+        text_key = self.text_key(raw_text)
+        blob = None
+        if embedding is not None:
+            blob = np.ascontiguousarray(embedding, dtype=np.float32).tobytes()
+        with self._lock:
+            exists = self._conn.execute("SELECT 1 FROM results WHERE text_key = ?", (text_key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (text_key, version, raw_text, parsed, embedding, last_access)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (text_key, self.version, raw_text, json.dumps(parsed), blob, time.time()),
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pdfs (pdf_key, text_key) VALUES (?, ?)",
+                (self.pdf_key(pdf_bytes), text_key),
+            )
+            self._counters["writes"] += 1
+            self._entries += exists is None
+            self._writes_since_count += 1
+            if self._writes_since_count >= _RECOUNT_EVERY:
+                self._entries, self._writes_since_count = self._count(), 0
+            self._evict()
+            self._conn.commit()
+
+    def _count(self) -> int:
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()
+        return count
+
+    def _evict(self) -> None:
+        # running count, not COUNT(*): that is a full scan on every write
+        excess = self._entries - self.max_entries
+        if excess <= 0:
+            return
+        self._conn.execute(
+            "DELETE FROM results WHERE text_key IN "
+            "(SELECT text_key FROM results ORDER BY last_access ASC LIMIT ?)",
+            (excess,),
+        )
+        self._conn.execute("DELETE FROM pdfs WHERE text_key NOT IN (SELECT text_key FROM results)")
+        self._counters["evictions"] += excess
+        self._entries -= excess
+
+    def stats(self) -> Dict:
+        with self._lock:
+            counters = dict(self._counters)
+            entries = self._entries
+        lookups = counters["pdf_hits"] + counters["text_hits"] + counters["misses"]
+        hits = counters["pdf_hits"] + counters["text_hits"]
+        return {
+            **counters,
+            "hit_rate": (hits / lookups) if lookups else 0.0,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "version": self.version,
+        }
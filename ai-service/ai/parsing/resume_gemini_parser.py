@@ -1,10 +1,15 @@
 ﻿
+import asyncio
 import json
 import re
 import time
 from google import genai
 
 from ai.config import GEMINI_API_KEY, GEMINI_MODEL, BASE_DIR
+from ai.logging_config import get_logger
+from ai.metrics import GEMINI_FAILURES, GEMINI_RETRIES, STAGE_LATENCY
+
+logger = get_logger("parsing")
 
 
 class ResumeGeminiParser:
@@ -12,13 +17,15 @@ class ResumeGeminiParser:
     Uses Google Gemini to parse resume text into structured JSON.
     """
 
+    MAX_RETRIES = 4
+
     def __init__(self):
         if not GEMINI_API_KEY:
             raise ValueError("GEMINI_API_KEY not set in environment")
 
         self.client = genai.Client(api_key=GEMINI_API_KEY)
         self.model_name = GEMINI_MODEL or "gemini-2.5-flash"
-        print(f"[AI] USING GEMINI PARSER model={self.model_name}")
+        logger.info("Using Gemini parser model=%s", self.model_name)
 
         prompt_path = f"{BASE_DIR}/parsing/resume_prompt.txt"
         with open(prompt_path, "r", encoding="utf-8") as f:
@@ -52,27 +59,63 @@ class ResumeGeminiParser:
         json_str = match.group(0)
         return json.loads(json_str)
 
-    def parse(self, text: str) -> dict:
-        prompt = self.template.replace("{{TEXT}}", text)
+    def _build_prompt(self, text: str) -> str:
+        return self.template.replace("{{TEXT}}", text)
+
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        return 1.0 * (attempt + 1)
 
-        MAX_RETRIES = 4
-        last_error = None
+    def _on_failure(self, attempt: int, error: Exception) -> bool:
+        """Record a failed attempt; returns True when another attempt should follow."""
+        logger.warning("Gemini attempt %d/%d failed: %s", attempt + 1, self.MAX_RETRIES, error)
+        if attempt + 1 < self.MAX_RETRIES:
+            GEMINI_RETRIES.inc()
+            return True
+        logger.error("Gemini parsing failed after retries: %s", error)
+        GEMINI_FAILURES.inc()
+        return False
+
+    def _handle_response(self, response) -> dict:
+        raw = self._extract_text(response)
+        logger.debug("Gemini raw output (truncated): %s", raw[:300])
+        return self._parse_json(raw)
+
+    def parse(self, text: str) -> dict:
+        prompt = self._build_prompt(text)
 
-        for attempt in range(MAX_RETRIES):
+        for attempt in range(self.MAX_RETRIES):
             try:
-                response = self.client.models.generate_content(
-                    model=self.model_name,
-                    contents=prompt,
-                )
-                raw = self._extract_text(response)
-                print("[AI] Gemini raw output (truncated):", raw[:300])
-                data = self._parse_json(raw)
-                return data
+                with STAGE_LATENCY.time(stage="gemini_call"):
+                    response = self.client.models.generate_content(
+                        model=self.model_name,
+                        contents=prompt,
+                    )
+                return self._handle_response(response)
             except Exception as e:
-                print(f"[Gemini] Attempt {attempt+1}/{MAX_RETRIES} failed:", e)
-                last_error = e
-                time.sleep(1 * (attempt + 1))
+                if self._on_failure(attempt, e):
+                    time.sleep(self._backoff(attempt))
 
-        print("Gemini parsing failed after retries:", last_error)
         # return empty structure; upper layer will clean
         return {}
+
+    async def parse_async(self, text: str) -> dict:
+        """
+        Same as parse(), but uses the SDK's async client and async backoff so
+        a slow or retrying Gemini call never blocks the event loop.
+        """
+        prompt = self._build_prompt(text)
+
+        for attempt in range(self.MAX_RETRIES):
+            try:
+                with STAGE_LATENCY.time(stage="gemini_call"):
+                    response = await self.client.aio.models.generate_content(
+                        model=self.model_name,
+                        contents=prompt,
+                    )
+                return self._handle_response(response)
+            except Exception as e:
+                if self._on_failure(attempt, e):
+                    await asyncio.sleep(self._backoff(attempt))
+
+        return {}
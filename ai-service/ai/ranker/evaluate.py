@@ -0,0 +1,166 @@
+"""
+Held-out ranking evaluation of saved rankers.
+
+Each model is scored on the groups (queries: a student's candidate jobs, or
+one job title's resumes) that train_ranker left out of training, one group
+per predict call, the way /recommend scores one request:
+
+- NDCG@K   exp gain 2^label - 1; groups whose labels are all 0 are skipped
+- MAP      mean average precision; a row is relevant when its label is at
+           least --relevant (default: half the largest label in the split);
+           groups without a relevant row are skipped
+- latency  time per group predict, mean and p95 in ms
+
+The split is read from the first model's ranker.meta.json unless --holdout /
+--seed are given; train the models with `train_ranker --holdout` for a fair
+comparison (models trained on all groups have seen the split).
+SimpleRanker, the service's fallback, is always included.
+
+Run from ai-service/:
+    python -m ai.ranker.evaluate
+    python -m ai.ranker.evaluate --model ai/trained_models/ranker.json \\
+        --model ai/trained_models/ranker_ndcg.json --k 5 10
+"""
+
+import argparse
+import os
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ai.config import INTERACTIONS_DIR, RANKER_PATH
+from ai.logging_config import get_logger
+from ai.ranker.interactions import Interactions, holdout_mask, iter_shards, read_meta
+from ai.ranker.simple_ranker import SimpleRanker
+from ai.ranker.xgb_ranker import XGBRankerWrapper
+
+logger = get_logger("ranker.evaluate")
+
+Scorer = Callable[[np.ndarray], np.ndarray]
+
+
+def ndcg_at_k(labels: np.ndarray, scores: np.ndarray, k: int) -> float:
+    """NDCG@k of one group; nan when no row has a positive label."""
+    gains = np.exp2(np.asarray(labels, dtype=float)) - 1
+    discounts = 1 / np.log2(np.arange(2, min(k, len(gains)) + 2))
+    ideal = np.sort(gains)[::-1][:k] @ discounts
+    if ideal <= 0:
+        return float("nan")
+    order = np.argsort(-np.asarray(scores), kind="stable")[:k]
+    return float(gains[order] @ discounts / ideal)
+
+
+def average_precision(relevant: np.ndarray, scores: np.ndarray) -> float:
+    """Average precision of one group; nan when nothing is relevant."""
+    hits = np.asarray(relevant, dtype=bool)[np.argsort(-np.asarray(scores), kind="stable")]
+    if not hits.any():
+        return float("nan")
+    precision = np.cumsum(hits) / np.arange(1, len(hits) + 1)
+    return float(precision[hits].mean())
+
+
+def load_holdout(directory: str = INTERACTIONS_DIR, fraction: float = 0.2, seed: int = 42) -> Interactions:
+    """The held-out rows of a training set, sorted by group."""
+    meta = read_meta(directory)
+    held = holdout_mask(meta["group_names"], fraction, seed)
+    parts = []
+    for shard in iter_shards(directory, meta=meta):
+        rows = held[shard.groups]
+        if rows.any():
+            parts.append((shard.features[rows], shard.labels[rows], shard.groups[rows]))
+    if not parts:
+        raise ValueError(f"{directory}: no groups held out with fraction={fraction}, seed={seed}")
+    features, labels, groups = (np.concatenate(p) for p in zip(*parts))
+    order = np.argsort(groups, kind="stable")
+    return Interactions(np.ascontiguousarray(features[order]), labels[order], groups[order],
+                        meta["group_names"], meta["feature_names"])
+
+
+def _group_spans(groups: np.ndarray) -> List[Tuple[int, int]]:
+    bounds = np.flatnonzero(groups[1:] != groups[:-1]) + 1
+    edges = [0, *bounds.tolist(), len(groups)]
+    return list(zip(edges[:-1], edges[1:]))
+
+
+def evaluate(scorers: Dict[str, Scorer], data: Interactions, ks: Sequence[int] = (5, 10),
+             relevant: Optional[float] = None) -> Dict[str, Dict[str, float]]:
+    """Per-group metrics averaged over the groups of `data` (sorted by group) for each scorer."""
+    spans = _group_spans(data.groups)
+    if relevant is None:
+        relevant = float(np.max(data.labels)) / 2
+    results = {}
+    for name, scorer in scorers.items():
+        scorer(data.features[: spans[0][1]])  # warm-up: lazy init, first-call allocations
+        ndcg = {k: [] for k in ks}
+        ap, latency = [], []
+        for start, end in spans:
+            X, y = data.features[start:end], data.labels[start:end]
+            t0 = time.perf_counter()
+            scores = np.asarray(scorer(X), dtype=float)
+            latency.append(time.perf_counter() - t0)
+            for k in ks:
+                ndcg[k].append(ndcg_at_k(y, scores, k))
+            ap.append(average_precision(y >= relevant, scores))
+        results[name] = {
+            **{f"ndcg@{k}": float(np.nanmean(v)) if not np.isnan(v).all() else float("nan")
+               for k, v in ndcg.items()},
+            "map": float(np.nanmean(ap)) if not np.isnan(ap).all() else float("nan"),
+            "latency_ms_mean": float(np.mean(latency) * 1e3),
+            "latency_ms_p95": float(np.percentile(latency, 95) * 1e3),
+        }
+    return results
+
+
+def simple_scorer() -> Scorer:
+    ranker = SimpleRanker()
+    return lambda X: np.array([ranker.score(f) for f in X], dtype=float)
+
+
+def model_label(path: str, meta: Dict) -> str:
+    return f"{meta.get('objective', meta.get('model_type'))} ({os.path.basename(path)})"
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", action="append", help="saved ranker (repeatable), default RANKER_PATH")
+    parser.add_argument("--data-dir", default=INTERACTIONS_DIR)
+    parser.add_argument("--k", type=int, nargs="+", default=[5, 10])
+    parser.add_argument("--relevant", type=float, help="label threshold for MAP")
+    parser.add_argument("--holdout", type=float, help="held-out fraction, default from the first model's sidecar")
+    parser.add_argument("--seed", type=int, help="held-out split seed, default from the first model's sidecar")
+    args = parser.parse_args(argv)
+
+    scorers: Dict[str, Scorer] = {}
+    split = None
+    for path in args.model or [RANKER_PATH]:
+        ranker = XGBRankerWrapper(path)
+        if not ranker.available:
+            raise SystemExit(f"{path}: no usable model")
+        holdout = ranker.meta.get("holdout")
+        if split is None:
+            split = holdout or {}
+        elif holdout != split:
+            logger.warning("%s was trained with holdout %s, evaluating on %s", path, holdout, split)
+        scorers[model_label(path, ranker.meta)] = ranker.predict
+    scorers["SimpleRanker"] = simple_scorer()
+
+    fraction = args.holdout if args.holdout is not None else split.get("fraction", 0.2)
+    seed = args.seed if args.seed is not None else split.get("seed", 42)
+    if not split:
+        logger.warning("First model was trained without a holdout; it has seen the evaluation split, "
+                       "so its scores are optimistic (train with --holdout to compare models)")
+    data = load_holdout(args.data_dir, fraction, seed)
+    results = evaluate(scorers, data, args.k, args.relevant)
+
+    print(f"\n{len(data)} held-out rows in {len(_group_spans(data.groups))} groups "
+          f"(holdout {fraction}, seed {seed})\n")
+    columns = [f"ndcg@{k}" for k in args.k] + ["map", "latency_ms_mean", "latency_ms_p95"]
+    width = max(len(n) for n in results)
+    print(f"{'model':<{width}} " + " ".join(f"{c:>15}" for c in columns))
+    for name, row in results.items():
+        print(f"{name:<{width}} " + " ".join(f"{row[c]:>15.4f}" for c in columns))
+
+
+if __name__ == "__main__":
+    main()
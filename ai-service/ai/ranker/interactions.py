@@ -0,0 +1,286 @@
+"""
+On-disk ranker training set ("interactions"): a directory of typed array
+shards plus a header.
+
+    features-00000.npy   float32 (rows, num_features), C order
+    labels-00000.npy     float32 (rows,)
+    groups-00000.npy     int32 (rows,): index into meta["group_names"]
+                         (student id or job title, i.e. the ranking query
+                         a row belongs to)
+    ...                  one triple per shard of up to TRAIN_SHARD_ROWS rows
+    meta.json            {"format", "version", "feature_names", "rows",
+                          "shards": [rows per shard], "group_names", ...}
+
+InteractionsWriter appends rows shard by shard, so a training set never
+has to fit in memory. iter_shards / load_interactions memory-map the
+arrays: opening millions of rows costs no parsing and no copy until
+xgboost reads them. A writer builds the set in a sibling temp directory
+and swaps it in on close, so readers never see a half-written set.
+Version 1 sets (single features.npy / labels.npy / groups.npy) still load.
+
+interactions.csv (JSON feature lists per row, the old format) converts with:
+    python -m ai.ranker.interactions convert ai/data/interactions.csv ai/data/interactions
+"""
+
+import argparse
+import json
+import os
+import shutil
+import zlib
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from ai.config import INTERACTIONS_DIR, TRAIN_SHARD_ROWS
+from ai.features.feature_builder import FEATURE_NAMES
+
+FORMAT = "ranker-interactions"
+FORMAT_VERSION = 2
+_READABLE_VERSIONS = (1, 2)
+
+
+class Interactions:
+    """Feature matrix, labels and group ids of a training set or shard (arrays may be read-only memmaps)."""
+
+    def __init__(self, features: np.ndarray, labels: np.ndarray, groups: np.ndarray,
+                 group_names: List[str], feature_names: Sequence[str] = FEATURE_NAMES,
+                 meta: Optional[Dict] = None):
+        self.features = features
+        self.labels = labels
+        self.groups = groups
+        self.group_names = list(group_names)
+        self.feature_names = list(feature_names)
+        self.meta = meta or {}
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    @classmethod
+    def from_group_ids(cls, features, labels, group_ids: Iterable[str], **kwargs) -> "Interactions":
+        """Build from per-row group names; codes follow first appearance."""
+        codes, names = pd.factorize(pd.Series(list(group_ids), dtype=object), sort=False)
+        return cls(np.ascontiguousarray(features, dtype=np.float32), np.asarray(labels, dtype=np.float32),
+                   codes.astype(np.int32), [str(n) for n in names], **kwargs)
+
+
+def _save_array(path: str, arr: np.ndarray) -> None:
+    tmp = path[:-len(".npy")] + ".tmp.npy"
+    np.save(tmp, arr)
+    os.replace(tmp, path)
+
+
+def _shard_path(directory: str, kind: str, shard: int, version: int = FORMAT_VERSION) -> str:
+    if version == 1:
+        return os.path.join(directory, f"{kind}.npy")
+    return os.path.join(directory, f"{kind}-{shard:05d}.npy")
+
+
+class InteractionsWriter:
+    """
+    Writes a training set shard by shard. Rows passed to append() are
+    buffered until `shard_rows` are pending, so memory stays bounded by the
+    shard size. Use as a context manager: the set appears in `directory`
+    only when the block exits without an exception.
+    """
+
+    def __init__(self, directory: str = INTERACTIONS_DIR, feature_names: Sequence[str] = FEATURE_NAMES,
+                 shard_rows: int = TRAIN_SHARD_ROWS, **meta):
+        self.directory = directory
+        self.feature_names = list(feature_names)
+        self.shard_rows = max(1, int(shard_rows))
+        self.meta = meta
+        self.rows = 0
+        self._tmp = directory.rstrip(os.sep) + ".tmp"
+        self._codes: Dict[str, int] = {}
+        self._shards: List[int] = []
+        self._pending: List[tuple] = []
+        self._pending_rows = 0
+        shutil.rmtree(self._tmp, ignore_errors=True)
+        os.makedirs(self._tmp)
+
+    def __enter__(self) -> "InteractionsWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def append(self, features, labels, group_ids: Iterable[str]) -> None:
+        features = np.asarray(features, dtype=np.float32)
+        labels = np.asarray(labels, dtype=np.float32).reshape(-1)
+        codes = np.fromiter((self._codes.setdefault(str(g), len(self._codes)) for g in group_ids),
+                            dtype=np.int32, count=len(labels))
+        if features.shape != (len(labels), len(self.feature_names)):
+            raise ValueError(f"Expected features of shape ({len(labels)}, {len(self.feature_names)}), "
+                             f"got {features.shape}")
+        self._pending.append((features, labels, codes))
+        self._pending_rows += len(labels)
+        self.rows += len(labels)
+        while self._pending_rows >= self.shard_rows:
+            self._flush(self.shard_rows)
+
+    def _flush(self, rows: int) -> None:
+        features, labels, codes = (np.concatenate(parts) for parts in zip(*self._pending))
+        shard = len(self._shards)
+        _save_array(_shard_path(self._tmp, "features", shard), np.ascontiguousarray(features[:rows]))
+        _save_array(_shard_path(self._tmp, "labels", shard), labels[:rows])
+        _save_array(_shard_path(self._tmp, "groups", shard), codes[:rows])
+        self._shards.append(rows)
+        self._pending = [(features[rows:], labels[rows:], codes[rows:])] if len(labels) > rows else []
+        self._pending_rows = len(labels) - rows
+
+    def close(self) -> None:
+        if self._pending_rows or not self._shards:
+            if self._pending:
+                self._flush(self._pending_rows)
+            else:  # empty set: one empty shard keeps readers simple
+                self._pending = [(np.zeros((0, len(self.feature_names)), dtype=np.float32),
+                                  np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.int32))]
+                self._flush(0)
+        meta = {
+            **self.meta,
+            "format": FORMAT,
+            "version": FORMAT_VERSION,
+            "feature_names": self.feature_names,
+            "rows": self.rows,
+            "shards": self._shards,
+            "group_names": list(self._codes),
+        }
+        with open(os.path.join(self._tmp, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        old = self.directory.rstrip(os.sep) + ".old"
+        shutil.rmtree(old, ignore_errors=True)
+        if os.path.exists(self.directory):
+            os.replace(self.directory, old)
+        os.replace(self._tmp, self.directory)
+        shutil.rmtree(old, ignore_errors=True)
+
+    def abort(self) -> None:
+        shutil.rmtree(self._tmp, ignore_errors=True)
+
+
+def save_interactions(data: Interactions, directory: str = INTERACTIONS_DIR,
+                      shard_rows: int = TRAIN_SHARD_ROWS, **extra_meta) -> None:
+    with InteractionsWriter(directory, data.feature_names, shard_rows, **{**data.meta, **extra_meta}) as writer:
+        names = data.group_names
+        writer.append(data.features, data.labels, (names[g] for g in data.groups))
+
+
+def read_meta(directory: str = INTERACTIONS_DIR,
+              feature_names: Optional[Sequence[str]] = FEATURE_NAMES) -> Dict:
+    """
+    The header of a saved training set. Raises ValueError when it is not a
+    supported version or its feature names differ from `feature_names`
+    (pass None to accept any schema).
+    """
+    with open(os.path.join(directory, "meta.json"), "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("format") != FORMAT or meta.get("version") not in _READABLE_VERSIONS:
+        raise ValueError(f"{directory}: unsupported interactions format "
+                         f"{meta.get('format')!r} v{meta.get('version')}, expected {FORMAT} v{FORMAT_VERSION}")
+    if feature_names is not None and list(meta["feature_names"]) != list(feature_names):
+        raise ValueError(f"{directory}: feature schema {meta['feature_names']} does not match "
+                         f"the current FeatureBuilder {list(feature_names)}; rebuild the training set")
+    meta.setdefault("shards", [meta["rows"]])
+    return meta
+
+
+def iter_shards(directory: str = INTERACTIONS_DIR, mmap: bool = True,
+                feature_names: Optional[Sequence[str]] = FEATURE_NAMES,
+                meta: Optional[Dict] = None) -> Iterator[Interactions]:
+    """Yield each shard as an Interactions; group codes index the set-wide meta["group_names"]."""
+    meta = meta or read_meta(directory, feature_names)
+    mode = "r" if mmap else None
+    for shard, rows in enumerate(meta["shards"]):
+        arrays = [np.load(_shard_path(directory, kind, shard, meta["version"]), mmap_mode=mode)
+                  for kind in ("features", "labels", "groups")]
+        if any(len(a) != rows for a in arrays):
+            raise ValueError(f"{directory}: shard {shard} row counts differ from meta.json")
+        yield Interactions(*arrays, meta["group_names"], meta["feature_names"], meta)
+
+
+def load_interactions(directory: str = INTERACTIONS_DIR, mmap: bool = True,
+                      feature_names: Optional[Sequence[str]] = FEATURE_NAMES) -> Interactions:
+    """
+    The whole training set as one Interactions. A single-shard set is
+    memory-mapped; several shards are concatenated into memory, so use
+    iter_shards for sets that don't fit.
+    """
+    meta = read_meta(directory, feature_names)
+    shards = list(iter_shards(directory, mmap, feature_names, meta))
+    if len(shards) == 1:
+        data = shards[0]
+    else:
+        data = Interactions(*(np.concatenate([getattr(s, k) for s in shards])
+                              for k in ("features", "labels", "groups")),
+                            meta["group_names"], meta["feature_names"])
+    data.meta = {k: v for k, v in meta.items() if k not in ("group_names", "feature_names")}
+    return data
+
+
+def holdout_mask(group_names: Sequence[str], fraction: float, seed: int = 0) -> np.ndarray:
+    """
+    Boolean per group code: True for groups held out of training. Whole
+    groups are held out, picked by a hash of (seed, group name), so the split
+    is the same for every model and every run, and rows of one query never
+    land on both sides.
+    """
+    if fraction <= 0:
+        return np.zeros(len(group_names), dtype=bool)
+    salt = f"{seed}:".encode()
+    buckets = np.fromiter((zlib.crc32(salt + str(name).encode()) for name in group_names),
+                          dtype=np.uint64, count=len(group_names))
+    return buckets < fraction * 2 ** 32
+
+
+def _parse_feature_column(values: Sequence[str], num_features: int) -> np.ndarray:
+    # one json.loads per chunk instead of per row; Python's json reads NaN
+    parsed = json.loads("[" + ",".join(values) + "]")
+    arr = np.asarray(parsed, dtype=np.float32)
+    if arr.shape != (len(values), num_features):
+        raise ValueError(f"Expected {num_features} features per row, got array of shape {arr.shape}")
+    return arr
+
+
+def convert_csv(csv_path: str, directory: str = INTERACTIONS_DIR, chunksize: int = 200_000,
+                feature_names: Sequence[str] = FEATURE_NAMES, shard_rows: int = TRAIN_SHARD_ROWS) -> int:
+    """
+    Convert an interactions.csv (student_id, features as JSON list, label)
+    to the binary format, `chunksize` CSV rows at a time. Returns the row count.
+    """
+    with InteractionsWriter(directory, feature_names, shard_rows, source=os.path.basename(csv_path)) as writer:
+        for chunk in pd.read_csv(csv_path, chunksize=chunksize, dtype={"student_id": str}):
+            writer.append(
+                _parse_feature_column(chunk["features"].tolist(), len(feature_names)),
+                pd.to_numeric(chunk["label"]).to_numpy(dtype=np.float32),
+                chunk["student_id"].fillna(""),
+            )
+    return writer.rows
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Ranker interactions dataset tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    conv = sub.add_parser("convert", help="convert interactions.csv to the binary format")
+    conv.add_argument("csv")
+    conv.add_argument("directory", nargs="?", default=INTERACTIONS_DIR)
+    conv.add_argument("--chunksize", type=int, default=200_000)
+    conv.add_argument("--shard-rows", type=int, default=TRAIN_SHARD_ROWS)
+    info = sub.add_parser("info", help="print the header of a saved training set")
+    info.add_argument("directory", nargs="?", default=INTERACTIONS_DIR)
+    args = parser.parse_args(argv)
+
+    if args.command == "convert":
+        rows = convert_csv(args.csv, args.directory, args.chunksize, shard_rows=args.shard_rows)
+        print(f"Wrote {rows} rows → {args.directory}")
+    else:
+        meta = read_meta(args.directory, feature_names=None)
+        groups = meta.pop("group_names")
+        print(json.dumps({**meta, "groups": len(groups)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,98 @@
-﻿import os
-import json
+﻿"""
+Builds the ranker training set (INTERACTIONS_DIR, see interactions.py) and
+trains the ranker out of core: peak memory is bounded by the chunk and
+shard sizes, not by the size of the dataset.
+
+The training set is built by streaming the source CSV in TRAIN_CHUNK_ROWS chunks:
+1. rows -> vectors: each chunk's distinct student / job texts are
+   batch-embedded with embed_many through the on-disk embedding cache, so
+   texts repeated across chunks or runs are encoded once
+2. rows -> features: chunks are parsed and featurized across a process
+   pool. Finished chunks are checkpointed under TRAIN_CHECKPOINT_DIR and
+   appended in input order to TRAIN_SHARD_ROWS-row shards, so the output
+   matches a serial run and a crashed run resumes where it stopped.
+
+Training reads the shards through an xgboost DataIter. QuantileDMatrix
+keeps only the quantized matrix (one byte per value) in memory;
+--external-memory (ExtMemQuantileDMatrix) pages even that out to
+TRAIN_XGB_CACHE_DIR. --objective picks a pointwise regressor (default) or a
+grouped learning-to-rank model (pairwise / ndcg) over the training set's
+student / job-title groups. --holdout leaves a fraction of the groups out
+for ai/ranker/evaluate.py (off by default: a shipped model trains on
+everything); ranker.meta.json next to the model records the model type,
+feature names and whether, and how, data was held out.
+
+Run from ai-service/:
+    python -m ai.ranker.train_ranker
+    python -m ai.ranker.train_ranker --processes 8 --chunk-rows 5000
+    python -m ai.ranker.train_ranker --reuse      # train on the saved training set
+    python -m ai.ranker.train_ranker --reuse --external-memory
+    python -m ai.ranker.train_ranker --reuse --objective ndcg
+    # compare models on held-out groups, then retrain the winner on all data
+    python -m ai.ranker.train_ranker --reuse --holdout 0.2 --model-path ai/data/eval/ranker_reg.json
+    python -m ai.ranker.train_ranker --reuse --holdout 0.2 --objective ndcg --model-path ai/data/eval/ranker_ndcg.json
+    python -m ai.ranker.evaluate --model ai/data/eval/ranker_reg.json --model ai/data/eval/ranker_ndcg.json
+    python -m ai.ranker.train_ranker --reuse --objective ndcg
+"""
+
+import argparse
 import ast
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from collections import deque
+from datetime import datetime, timezone
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
 import numpy as np
 import pandas as pd
 import xgboost as xgb
-from pathlib import Path
 from tqdm import tqdm
 
-from ai.embeddings.embedder import get_embedder
+from ai.embeddings.cache import EmbeddingCache
+from ai.embeddings.embedder import Embedder, get_embedder
 from ai.skills.skill_normalizer import SkillNormalizer
-from ai.features.feature_builder import FeatureBuilder
-from ai.config import DATA_DIR, TRAINED_MODELS_DIR, RANKER_PATH
-
-
-def parse_features(s: str) -> np.ndarray:
-    return np.array(json.loads(s), dtype=float)
+from ai.features.feature_builder import FEATURE_NAMES, NUM_FEATURES, FeatureBuilder
+from ai.ranker.interactions import InteractionsWriter, holdout_mask, iter_shards, read_meta
+from ai.ranker.xgb_ranker import write_model_meta
+from ai.config import (
+    INTERACTIONS_DIR,
+    RANKER_PATH,
+    TRAIN_HOLDOUT,
+    TRAIN_PROCESSES,
+    TRAIN_CHUNK_ROWS,
+    TRAIN_EMBED_CHUNK,
+    TRAIN_CHECKPOINT_DIR,
+    TRAIN_SHARD_ROWS,
+    TRAIN_XGB_CACHE_DIR,
+)
+
+# same settings as the XGBRegressor this trainer used before
+XGB_PARAMS = {
+    "objective": "reg:squarederror",
+    "eta": 0.1,
+    "max_depth": 6,
+    "colsample_bytree": 0.9,
+    "subsample": 0.9,
+    "tree_method": "hist",
+    "seed": 42,
+}
+NUM_BOOST_ROUND = 400
+# --objective choices. The rank:* ones learn from the groups (queries) of the
+# training set through qid, i.e. what XGBRanker does, on the native API
+# because XGBRanker needs sklearn and can't read a DataIter.
+OBJECTIVES = {
+    "regression": "reg:squarederror",
+    "pairwise": "rank:pairwise",
+    "ndcg": "rank:ndcg",
+}
+# rank:ndcg takes integer relevance grades; fractional labels (matched_score
+# in 0-1) are scaled to 0..RELEVANCE_GRADES and rounded
+RELEVANCE_GRADES = 4
 
 
 def _parse_list(cell):
@@ -32,273 +110,643 @@ def _parse_list(cell):
     return []
 
 
-def load_local_datasets():
+def _sample_csv(path: Path, k: int, required: str, rng: np.random.Generator,
+                chunksize: int) -> Tuple[List[Dict], int]:
+    """
+    k rows drawn uniformly without replacement while reading `chunksize`
+    rows at a time: every row gets a random key and the k smallest keys are
+    kept. Returns (rows, number of rows with `required` set).
+    """
+    kept, total = None, 0
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        chunk = chunk.dropna(subset=[required])
+        if chunk.empty:
+            continue
+        total += len(chunk)
+        chunk = chunk.assign(_sample_key=rng.random(len(chunk)))
+        kept = chunk if kept is None else pd.concat([kept, chunk])
+        kept = kept.nsmallest(k, "_sample_key")
+    if total < k:
+        raise ValueError(f"{path}: cannot sample {k} rows, only {total} have {required!r}")
+    return kept.drop(columns="_sample_key").to_dict("records"), total
+
+
+def load_local_datasets(num_students: int, num_jobs: int, seed: int = 42, chunksize: int = 50_000):
+    """Sample resumes and jobs for generate_interactions without loading the whole CSVs."""
     # Prefer enriched exports if present
     resumes_path = Path("data/enriched_resumes.csv")
     jobs_path = Path("data/enriched_jobs.csv")
+    if not resumes_path.exists():
+        resumes_path = Path("UpdatedResumeDataSet.csv")
+    if not jobs_path.exists():
+        jobs_path = Path("job_title_des.csv")   # use real job dataset
 
-    if resumes_path.exists():
-        resumes = pd.read_csv(resumes_path)
-        print(f"Loaded enriched resumes: {len(resumes)}")
-    else:
-        resumes = pd.read_csv("UpdatedResumeDataSet.csv")
+    rng = np.random.default_rng(seed)
+    resumes, total_resumes = _sample_csv(resumes_path, num_students, "Resume", rng, chunksize)
+    jobs, total_jobs = _sample_csv(jobs_path, num_jobs, "Job Description", rng, chunksize)
 
-    if jobs_path.exists():
-        jobs = pd.read_csv(jobs_path)
-        print(f"Loaded enriched jobs: {len(jobs)}")
-    else:
-        jobs = pd.read_csv("job_title_des.csv")   # use real job dataset
+    print(f"Sampled {len(resumes)} of {total_resumes} resumes ({resumes_path}), "
+          f"{len(jobs)} of {total_jobs} jobs ({jobs_path})")
+    return resumes, jobs, [resumes_path, jobs_path]
+
+
+# ---------- embedding ----------
 
-    resumes = resumes.dropna(subset=["Resume"])
-    jobs = jobs.dropna(subset=["Job Description"])
+def _training_embedder() -> Embedder:
+    embedder = get_embedder()
+    if embedder.cache is None:
+        # training always keeps its vectors, even with EMBEDDING_CACHE_ENABLED=0 for serving
+        embedder.cache = EmbeddingCache(embedder.model_id)
+    return embedder
+
+
+def embed_unique(embedder: Embedder, texts: Sequence[str],
+                 chunk: int = TRAIN_EMBED_CHUNK) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Embed each distinct text once. Returns (unique_vectors, codes) with
+    unique_vectors[codes[i]] the vector of texts[i]. Chunks go through the
+    embedding cache as they finish, so an interrupted run keeps its work.
+    """
+    index: Dict[str, int] = {}
+    codes = np.fromiter((index.setdefault(t, len(index)) for t in texts), dtype=np.int64, count=len(texts))
+    unique = list(index)
+    parts = [embedder.embed_many(unique[start:start + chunk]) for start in range(0, len(unique), chunk)]
+    matrix = np.vstack(parts) if parts else np.zeros((0, embedder.dim), dtype=np.float32)
+    return matrix, codes
+
+
+# ---------- chunked, checkpointed feature building ----------
 
-    print(f"Loaded {len(resumes)} resumes, {len(jobs)} O*NET jobs")
-    return resumes, jobs
+# per-process FeatureBuilder / SkillNormalizer and data shared by every chunk
+_worker_state: Dict = {}
 
 
-def build_interactions_from_structured_csv():
+def _init_worker(shared=None) -> None:
+    _worker_state["shared"] = shared
+
+
+def _worker_tools() -> Tuple[SkillNormalizer, FeatureBuilder]:
+    if "fb" not in _worker_state:
+        _worker_state["skill_norm"] = SkillNormalizer()
+        _worker_state["fb"] = FeatureBuilder()
+    return _worker_state["skill_norm"], _worker_state["fb"]
+
+
+def _checkpoint_dir(root: Optional[str], name: str, inputs: List[Path], **params) -> Optional[str]:
+    """A directory unique to these input files (path, size, mtime) and parameters."""
+    if not root:
+        return None
+    files = []
+    for p in inputs:
+        st = os.stat(p)
+        files.append([os.path.abspath(p), st.st_size, st.st_mtime_ns])
+    payload = json.dumps({"files": files, "feature_names": FEATURE_NAMES, **params}, sort_keys=True)
+    return os.path.join(root, f"{name}-{hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]}")
+
+
+def run_chunks(
+    chunks: Iterable,
+    prepare: Callable[[object], object],
+    worker: Callable[[object], np.ndarray],
+    processes: int = TRAIN_PROCESSES,
+    checkpoint_dir: Optional[str] = None,
+    shared=None,
+    desc: str = "Features",
+) -> Iterator[Tuple[object, np.ndarray]]:
+    """
+    Yield (chunk, worker(prepare(chunk))) for every chunk, in input order.
+    `chunks` is consumed lazily. prepare runs in this process (embedding),
+    worker in a process pool when processes > 1, with at most 2 chunks per
+    process in flight, so memory stays bounded by the chunk size. Each
+    result is saved to checkpoint_dir/chunk_<i>.npy; chunks already saved
+    there are loaded instead of prepared and recomputed.
+    """
+    def _path(i: int) -> Optional[str]:
+        return os.path.join(checkpoint_dir, f"chunk_{i:06d}.npy") if checkpoint_dir else None
+
+    def _saved(i: int) -> Optional[np.ndarray]:
+        path = _path(i)
+        return np.load(path) if path and os.path.exists(path) else None
+
+    def _save(i: int, arr: np.ndarray) -> None:
+        path = _path(i)
+        if path:
+            tmp = path + ".tmp.npy"
+            np.save(tmp, arr)
+            os.replace(tmp, path)  # a crash never leaves a half-written chunk behind
+
+    if checkpoint_dir:
+        os.makedirs(checkpoint_dir, exist_ok=True)
+    bar = tqdm(desc=desc, unit="chunk")
+    reused = 0
+    try:
+        if processes <= 1:
+            _init_worker(shared)
+            for i, chunk in enumerate(chunks):
+                arr = _saved(i)
+                if arr is None:
+                    arr = worker(prepare(chunk))
+                    _save(i, arr)
+                else:
+                    reused += 1
+                bar.update()
+                yield chunk, arr
+        else:
+            with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                                     initargs=(shared,)) as pool:
+                window: deque = deque()  # (i, chunk, saved array or Future), in input order
+
+                def _pop():
+                    i, chunk, pending = window.popleft()
+                    if isinstance(pending, Future):
+                        pending = pending.result()
+                        _save(i, pending)
+                    bar.update()
+                    return chunk, pending
+
+                for i, chunk in enumerate(chunks):
+                    arr = _saved(i)
+                    if arr is None:
+                        window.append((i, chunk, pool.submit(worker, prepare(chunk))))
+                    else:
+                        reused += 1
+                        window.append((i, chunk, arr))
+                    while len(window) > 2 * processes:
+                        yield _pop()
+                while window:
+                    yield _pop()
+    finally:
+        bar.close()
+    if reused:
+        print(f"Reused {reused} checkpointed chunks from {checkpoint_dir}")
+
+
+def _chunk_ranges(n: int, size: int) -> List[Tuple[int, int]]:
+    size = max(1, int(size))
+    return [(start, min(n, start + size)) for start in range(0, n, size)]
+
+
+def _write_shards(writer: InteractionsWriter,
+                  batches: Iterable[Tuple[np.ndarray, np.ndarray, Sequence[str]]]) -> int:
+    """Append (features, labels, group_ids) batches and publish the set unless it is empty. Returns the row count."""
+    try:
+        for features, labels, group_ids in batches:
+            writer.append(features, labels, group_ids)
+    except BaseException:
+        writer.abort()
+        raise
+    if not writer.rows:
+        writer.abort()
+        return 0
+    writer.close()
+    return writer.rows
+
+
+# ---------- structured CSV (one row = one student/job pair) ----------
+
+def _structured_texts(row: Dict) -> Tuple[str, str, str]:
+    """(resume_text, job_title, job_desc) of a resume_data_for_ranking.csv row."""
+    resume_text = " ".join([
+        str(row.get("career_objective", "") or ""),
+        str(row.get("responsibilities", "") or ""),
+    ]).strip()
+    job_title = str(row.get("job_position_name", "") or "")
+    job_desc = " ".join([
+        str(row.get("educationaL_requirements", "") or ""),
+        str(row.get("experiencere_requirement", "") or ""),
+        str(row.get("responsibilities.1", "") or ""),
+    ]).strip()
+    return resume_text, job_title, job_desc
+
+
+def _structured_pair(row: Dict, skill_norm: SkillNormalizer) -> Tuple[Dict, Dict]:
+    resume_text, job_title, job_desc = _structured_texts(row)
+
+    # student info
+    stu_skills = skill_norm.normalize(_parse_list(row.get("skills")))
+    positions = _parse_list(row.get("positions"))
+    education = _parse_list(row.get("degree_names")) + _parse_list(row.get("major_field_of_studies"))
+    experience_entries = _parse_list(row.get("start_dates"))
+    responsibilities_text = str(row.get("responsibilities", "") or "")
+
+    gpa_val = 0.0
+    try:
+        gpa_val = float(str(row.get("educational_results", "")).replace("%", "").strip() or 0.0)
+    except Exception:
+        gpa_val = 0.0
+
+    student_obj = {
+        "resume_text": resume_text,
+        "skills": stu_skills,
+        "branch": None,
+        "domains": [],
+        "gpa": gpa_val,
+        "experience": experience_entries,
+        "education": education,
+        "positions": positions,
+        "responsibilities": responsibilities_text,
+    }
+
+    # job info
+    job_skill_cols = []
+    job_skill_cols.extend(_parse_list(row.get("skills_required")))
+    # related_skils_in_job may be list of lists
+    related = _parse_list(row.get("related_skils_in_job"))
+    for r in related:
+        if isinstance(r, list):
+            job_skill_cols.extend(r)
+        elif isinstance(r, str):
+            job_skill_cols.append(r)
+
+    job_skills = skill_norm.normalize(job_skill_cols)
+    job_tools = []  # not present in dataset
+
+    job_obj = {
+        "title": job_title,
+        "description": job_desc,
+        "skills": job_skills,
+        "skills_required": job_skills,
+        "related_skills_in_job": related,
+        "company": "",
+        "tools": job_tools,
+        "branch": None,
+        "domain": None,
+        "domains": [],
+        "education_requirement": row.get("educationaL_requirements", ""),
+        "experience_requirement": row.get("experiencere_requirement", ""),
+        "responsibilities_text": row.get("responsibilities.1", ""),
+    }
+    return student_obj, job_obj
+
+
+def _structured_chunk(task) -> np.ndarray:
+    rows, student_vecs, job_vecs = task
+    skill_norm, fb = _worker_tools()
+    features = np.zeros((len(rows), NUM_FEATURES), dtype=float)
+    for i, row in enumerate(rows):
+        student, job = _structured_pair(row, skill_norm)
+        features[i], _ = fb.build(student=student, job=job, student_vec=student_vecs[i], job_vec=job_vecs[i])
+    return features
+
+
+def _structured_groups(chunk: pd.DataFrame) -> List[str]:
+    titles = chunk["job_position_name"] if "job_position_name" in chunk else [None] * len(chunk)
+    return [str(title or "") or f"group_{idx}" for idx, title in zip(chunk.index, titles)]
+
+
+def build_interactions_from_structured_csv(
+    processes: int = TRAIN_PROCESSES,
+    chunk_rows: int = TRAIN_CHUNK_ROWS,
+    checkpoint_root: Optional[str] = TRAIN_CHECKPOINT_DIR,
+    out_dir: str = INTERACTIONS_DIR,
+    shard_rows: int = TRAIN_SHARD_ROWS,
+) -> Optional[int]:
     """
     Build interactions directly from resume_data_for_ranking.csv if present.
     Treat each row as a (student, job) pair using the provided matched_score.
     Grouping is done by job_position_name for ranking input.
+    The CSV is read `chunk_rows` rows at a time. Returns the number of rows written.
     """
     data_path = Path("resume_data_for_ranking.csv")
     if not data_path.exists():
         return None
 
-    print(f"Loading structured ranking data from {data_path} ...")
-    df = pd.read_csv(data_path)
-    df = df.dropna(subset=["matched_score"])
+    print(f"Streaming structured ranking data from {data_path} ...")
+    embedder = _training_embedder()
+    ckpt = _checkpoint_dir(checkpoint_root, "structured", [data_path],
+                           model=embedder.model_id, chunk_rows=chunk_rows)
+
+    def _chunks():
+        for chunk in pd.read_csv(data_path, chunksize=max(1, chunk_rows)):
+            chunk = chunk.dropna(subset=["matched_score"])
+            if not chunk.empty:
+                yield chunk
+
+    def _prepare(chunk: pd.DataFrame):
+        rows = chunk.to_dict("records")
+        texts = [_structured_texts(row) for row in rows]
+        vectors, codes = embed_unique(
+            embedder,
+            [resume for resume, _, _ in texts] + [f"{title}. {desc}" for _, title, desc in texts],
+        )
+        return rows, vectors[codes[:len(rows)]], vectors[codes[len(rows):]]
+
+    results = run_chunks(_chunks(), _prepare, _structured_chunk, processes, ckpt, desc="Ranking rows")
+    writer = InteractionsWriter(out_dir, shard_rows=shard_rows, source=str(data_path),
+                                embedding_model=embedder.model_id)
+    rows = _write_shards(writer, (
+        (features, pd.to_numeric(chunk["matched_score"]).fillna(0).to_numpy(), _structured_groups(chunk))
+        for chunk, features in results
+    ))
+    if not rows:
+        return None
+    if ckpt:
+        shutil.rmtree(ckpt, ignore_errors=True)
+    print(f"Built interactions from structured CSV: {rows} rows → {out_dir}")
+    return rows
 
-    skill_norm = SkillNormalizer()
-    embedder = get_embedder()
-    fb = FeatureBuilder()
 
-    interactions = []
+# ---------- sampled resumes x jobs ----------
 
-    for idx, row in tqdm(df.iterrows(), total=len(df), desc="Ranking rows"):
-        # student info
-        resume_text = " ".join([
-            str(row.get("career_objective", "") or ""),
-            str(row.get("responsibilities", "") or ""),
-        ]).strip()
+def _generated_student(stu: Dict, skill_norm: SkillNormalizer) -> Dict:
+    stu_text = stu["Resume"]
 
-        stu_skills = skill_norm.normalize(_parse_list(row.get("skills")))
-        positions = _parse_list(row.get("positions"))
-        education = _parse_list(row.get("degree_names")) + _parse_list(row.get("major_field_of_studies"))
-        experience_entries = _parse_list(row.get("start_dates"))
-        responsibilities_text = str(row.get("responsibilities", "") or "")
+    # Extract skills/tools/projects from resume text or enriched columns
+    skills = stu.get("Skills", "")
+    if pd.isna(skills) or not str(skills).strip():
+        stu_skills = skill_norm.extract_from_text(stu_text)
+    else:
+        stu_skills = [s.strip() for s in str(skills).split(",") if s.strip()]
+    stu_skills = skill_norm.normalize(stu_skills)
+
+    projects = []
+    proj_count = int(stu.get("ProjectCount", 0) or 0)
+    if proj_count > 0:
+        projects = ["project"] * proj_count
+    elif "project" in stu_text.lower():
+        projects.append("project placeholder")
+
+    experience_entries = []
+    exp_count = int(stu.get("ExperienceCount", 0) or 0)
+    if exp_count > 0:
+        experience_entries = ["exp"] * exp_count
+
+    return {
+        "resume_text": stu_text,
+        "skills": stu_skills,
+        "branch": str(stu.get("Branch", "")).strip().lower() or None,
+        "domains": [],
+        "gpa": float(stu.get("CGPA", 0) or 0),
+        "projects": projects,
+        "experience": experience_entries,
+        "education": [],
+    }
+
+
+def _generated_job(job: Dict, skill_norm: SkillNormalizer) -> Dict:
+    job_text = job["Job Description"]
+
+    job_skills_raw = job.get("Skills", "")
+    if isinstance(job_skills_raw, str) and job_skills_raw.strip():
+        job_skills = [s.strip() for s in job_skills_raw.split(",") if s.strip()]
+    else:
+        job_skills = skill_norm.extract_from_text(job_text)
+    job_skills = skill_norm.normalize(job_skills)
 
-        gpa_val = 0.0
-        try:
-            gpa_val = float(str(row.get("educational_results", "")).replace("%", "").strip() or 0.0)
-        except Exception:
-            gpa_val = 0.0
-
-        student_obj = {
-            "resume_text": resume_text,
-            "skills": stu_skills,
-            "branch": None,
-            "domains": [],
-            "gpa": gpa_val,
-            "experience": experience_entries,
-            "education": education,
-            "positions": positions,
-            "responsibilities": responsibilities_text,
-        }
-
-        # job info
-        job_title = str(row.get("job_position_name", "") or "")
-        job_desc = " ".join([
-            str(row.get("educationaL_requirements", "") or ""),
-            str(row.get("experiencere_requirement", "") or ""),
-            str(row.get("responsibilities.1", "") or ""),
-        ]).strip()
-
-        job_skill_cols = []
-        job_skill_cols.extend(_parse_list(row.get("skills_required")))
-        # related_skils_in_job may be list of lists
-        related = _parse_list(row.get("related_skils_in_job"))
-        for r in related:
-            if isinstance(r, list):
-                job_skill_cols.extend(r)
-            elif isinstance(r, str):
-                job_skill_cols.append(r)
-
-        job_skills = skill_norm.normalize(job_skill_cols)
-        job_tools = []  # not present in dataset
-
-        student_vec = embedder.embed(resume_text)
-        job_vec = embedder.embed(job_title + ". " + job_desc)
-
-        features, _ = fb.build(
-            student=student_obj,
-            job={
-                "title": job_title,
-                "description": job_desc,
-                "skills": job_skills,
-                "skills_required": job_skills,
-                "related_skills_in_job": related,
-                "company": "",
-                "tools": job_tools,
-                "branch": None,
-                "domain": None,
-                "domains": [],
-                "education_requirement": row.get("educationaL_requirements", ""),
-                "experience_requirement": row.get("experiencere_requirement", ""),
-                "responsibilities_text": row.get("responsibilities.1", ""),
-            },
-            student_vec=student_vec,
-            job_vec=job_vec,
-        )
+    job_tools_raw = job.get("Tools", "")
+    if isinstance(job_tools_raw, str) and job_tools_raw.strip():
+        job_tools = [t.strip() for t in job_tools_raw.split(",") if t.strip()]
+    else:
+        job_tools = []
+
+    return {
+        "title": job.get("Job Title", ""),
+        "description": job_text,
+        "skills": job_skills,
+        "company": "",
+        "tools": job_tools,
+        "branch": str(job.get("Branch", "") or "").strip().lower() or None,
+        "domain": str(job.get("Domain", "") or "").strip().lower() or None,
+        "domains": json.loads(job.get("Domains", "[]")) if isinstance(job.get("Domains", ""), str) else [],
+    }
+
+
+def _generated_chunk(task) -> np.ndarray:
+    students, student_vecs = task
+    skill_norm, fb = _worker_tools()
+    jobs, job_matrix, job_profiles = _worker_state["shared"]
+    blocks = []
+    for stu, vec in zip(students, student_vecs):
+        features, _ = fb.build_batch(_generated_student(stu, skill_norm), jobs, vec, job_matrix, job_profiles)
+        blocks.append(features)
+    return np.vstack(blocks)
+
+
+def generate_interactions(
+    num_students=30,
+    num_jobs=80,
+    seed: int = 42,
+    processes: int = TRAIN_PROCESSES,
+    chunk_rows: int = TRAIN_CHUNK_ROWS,
+    checkpoint_root: Optional[str] = TRAIN_CHECKPOINT_DIR,
+    out_dir: str = INTERACTIONS_DIR,
+    shard_rows: int = TRAIN_SHARD_ROWS,
+) -> int:
+    skill_norm = SkillNormalizer()
+    embedder = _training_embedder()
 
-        interactions.append({
-            "student_id": job_title or f"group_{idx}",
-            "features": json.dumps(features.tolist()),
-            "label": float(row.get("matched_score", 0) or 0),
-        })
+    students, jobs, sources = load_local_datasets(num_students, num_jobs, seed)
 
-    if not interactions:
-        return None
+    # job-side parsing, embedding and profiles once, not once per student
+    job_objs = [_generated_job(job, skill_norm) for job in jobs]
+    vectors, codes = embed_unique(embedder, [job["Job Description"] for job in jobs])
+    job_matrix = vectors[codes]
+    job_profiles = [FeatureBuilder.job_profile(job) for job in job_objs]
 
-    out_df = pd.DataFrame(interactions)
-    os.makedirs(DATA_DIR, exist_ok=True)
-    out_df.to_csv(Path(DATA_DIR) / "interactions.csv", index=False)
-    print(f"Built interactions from structured CSV: {len(out_df)} rows")
-    return out_df
+    ckpt = _checkpoint_dir(checkpoint_root, "generated", sources, model=embedder.model_id,
+                           num_students=num_students, num_jobs=num_jobs, seed=seed, chunk_rows=chunk_rows)
 
+    def _prepare(span):
+        start, end = span
+        vectors, codes = embed_unique(embedder, [stu["Resume"] for stu in students[start:end]])
+        return students[start:end], vectors[codes]
 
-def generate_interactions(num_students=30, num_jobs=80):
-    skill_norm = SkillNormalizer()
-    embedder = get_embedder()
-    fb = FeatureBuilder()
+    def _batches():
+        ranges = _chunk_ranges(len(students), max(1, chunk_rows // max(1, len(jobs))))
+        for (start, end), features in run_chunks(ranges, _prepare, _generated_chunk, processes, ckpt,
+                                                 shared=(job_objs, job_matrix, job_profiles), desc="Students"):
+            sim = features[:, 0]
+            labels = np.select([sim > 0.70, sim > 0.50, sim > 0.30], [3, 2, 1], default=0)
+            yield features, labels, np.repeat([f"stu_{i:05d}" for i in range(start, end)], len(jobs))
 
-    resumes, jobs = load_local_datasets()
+    writer = InteractionsWriter(out_dir, shard_rows=shard_rows, source="sampled resumes x jobs",
+                                embedding_model=embedder.model_id)
+    rows = _write_shards(writer, _batches())
+    if ckpt:
+        shutil.rmtree(ckpt, ignore_errors=True)
 
-    students = resumes.sample(num_students, replace=False)
-    jobs = jobs.sample(num_jobs, replace=False)
+    print(f"\nGenerated {rows} interactions → {out_dir}")
+    return rows
 
-    interactions = []
 
-    for _, stu in tqdm(students.iterrows(), total=len(students), desc="Students"):
-        stu_text = stu["Resume"]
+# ---------- training ----------
 
-        # Extract skills/tools/projects from resume text or enriched columns
-        skills = stu.get("Skills", "")
-        if pd.isna(skills) or not str(skills).strip():
-            stu_skills = skill_norm.extract_from_text(stu_text)
+class ShardIter(xgb.DataIter):
+    """
+    Feeds a saved training set to xgboost one memory-mapped shard at a time.
+
+    Rows of groups flagged in `exclude` (bool per group code) are skipped.
+    With `grouped`, each shard is sorted by group and passed with qid; a
+    group split across two shards becomes two queries. `relevance` maps
+    labels before xgboost sees them. rows / queries count the last full pass.
+    """
+
+    def __init__(self, directory: str = INTERACTIONS_DIR, cache_prefix: Optional[str] = None,
+                 exclude: Optional[np.ndarray] = None, grouped: bool = False,
+                 relevance: Optional[Callable[[np.ndarray], np.ndarray]] = None):
+        self.directory = directory
+        self.meta = read_meta(directory)
+        self.exclude = exclude
+        self.grouped = grouped
+        self.relevance = relevance
+        self.rows = self.queries = 0
+        self._pass = [0, 0]
+        self._shards: Optional[Iterator] = None
+        super().__init__(cache_prefix=cache_prefix)
+
+    def next(self, input_data: Callable) -> bool:
+        if self._shards is None:
+            self._shards = iter_shards(self.directory, meta=self.meta)
+            self._pass = [0, 0]
+        for shard in self._shards:
+            features, labels, groups = shard.features, shard.labels, shard.groups
+            if self.exclude is not None:
+                keep = ~self.exclude[groups]
+                if not keep.all():
+                    features, labels, groups = features[keep], labels[keep], groups[keep]
+            if not len(labels):
+                continue
+            if self.relevance is not None:
+                labels = self.relevance(labels)
+            self._pass[0] += len(labels)
+            if not self.grouped:
+                input_data(data=features, label=labels)
+                return True
+            order = np.argsort(groups, kind="stable")
+            groups = groups[order]
+            self._pass[1] += 1 + int(np.count_nonzero(groups[1:] != groups[:-1]))
+            input_data(data=features[order], label=labels[order], qid=groups)
+            return True
+        self.rows, self.queries = self._pass
+        return False
+
+    def reset(self) -> None:
+        self._shards = None
+
+
+def _integer_labels(directory: str, meta: Dict) -> bool:
+    return all(np.array_equal(np.rint(s.labels), s.labels) and (not len(s.labels) or s.labels.min() >= 0)
+               for s in iter_shards(directory, meta=meta))
+
+
+def relevance_grades(labels: np.ndarray) -> np.ndarray:
+    return np.rint(np.clip(labels, 0, 1) * RELEVANCE_GRADES).astype(np.float32)
+
+
+def train_ranker(
+    directory: str = INTERACTIONS_DIR,
+    external_memory: bool = False,
+    model_path: str = RANKER_PATH,
+    num_boost_round: int = NUM_BOOST_ROUND,
+    params: Optional[Dict] = None,
+    objective: str = "regression",
+    holdout: float = TRAIN_HOLDOUT,
+    seed: int = 42,
+) -> xgb.Booster:
+    """
+    Train on `directory` minus the held-out groups (see holdout_mask) and
+    save the model plus its sidecar (xgb_ranker.read_model_meta).
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown objective {objective!r}, expected one of {list(OBJECTIVES)}")
+    meta = read_meta(directory)
+    exclude = holdout_mask(meta["group_names"], holdout, seed)
+    grouped = objective != "regression"
+    params = {**XGB_PARAMS, "objective": OBJECTIVES[objective], **(params or {})}
+    relevance = None
+    if params["objective"] == "rank:ndcg" and not _integer_labels(directory, meta):
+        relevance = relevance_grades
+    print(f"\nTraining XGB ranker ({params['objective']}) on {meta['rows']} rows "
+          f"({len(meta['shards'])} shards, {int(exclude.sum())} of {len(exclude)} groups held out, "
+          f"{'external memory' if external_memory else 'in-memory quantized'})...")
+
+    cache_dir, dtrain = None, None
+    try:
+        if external_memory:
+            os.makedirs(TRAIN_XGB_CACHE_DIR, exist_ok=True)
+            cache_dir = tempfile.mkdtemp(dir=TRAIN_XGB_CACHE_DIR)
+            shards = ShardIter(directory, os.path.join(cache_dir, "train"), exclude, grouped, relevance)
+            dtrain = xgb.ExtMemQuantileDMatrix(shards)
         else:
-            stu_skills = [s.strip() for s in str(skills).split(",") if s.strip()]
-        stu_skills = skill_norm.normalize(stu_skills)
-
-        projects = []
-        proj_count = int(stu.get("ProjectCount", 0) or 0)
-        if proj_count > 0:
-            projects = ["project"] * proj_count
-        elif "project" in stu_text.lower():
-            projects.append("project placeholder")
-
-        experience_entries = []
-        exp_count = int(stu.get("ExperienceCount", 0) or 0)
-        if exp_count > 0:
-            experience_entries = ["exp"] * exp_count
-
-        stu_vec = embedder.embed(stu_text)
-        student_id = f"stu_{np.random.randint(1000, 9999)}"
-
-        student_obj = {
-            "resume_text": stu_text,
-            "skills": stu_skills,
-            "branch": str(stu.get("Branch", "")).strip().lower() or None,
-            "domains": [],
-            "gpa": float(stu.get("CGPA", 0) or 0),
-            "projects": projects,
-            "experience": experience_entries,
-            "education": [],
-        }
-
-        for _, job in jobs.iterrows():
-            job_text = job["Job Description"]
-
-            job_skills_raw = job.get("Skills", "")
-            if isinstance(job_skills_raw, str) and job_skills_raw.strip():
-                job_skills = [s.strip() for s in job_skills_raw.split(",") if s.strip()]
-            else:
-                job_skills = skill_norm.extract_from_text(job_text)
-            job_skills = skill_norm.normalize(job_skills)
-
-            job_tools_raw = job.get("Tools", "")
-            if isinstance(job_tools_raw, str) and job_tools_raw.strip():
-                job_tools = [t.strip() for t in job_tools_raw.split(",") if t.strip()]
-            else:
-                job_tools = []
-
-            job_vec = embedder.embed(job_text)
-
-            job_obj = {
-                "title": job.get("Job Title", ""),
-                "description": job_text,
-                "skills": job_skills,
-                "company": "",
-                "tools": job_tools,
-                "branch": str(job.get("Branch", "") or "").strip().lower() or None,
-                "domain": str(job.get("Domain", "") or "").strip().lower() or None,
-                "domains": json.loads(job.get("Domains", "[]")) if isinstance(job.get("Domains", ""), str) else [],
-            }
-
-            features, _ = fb.build(student_obj, job_obj, stu_vec, job_vec)
-            sim = features[0]
-
-            if sim > 0.70:
-                label = 3
-            elif sim > 0.50:
-                label = 2
-            elif sim > 0.30:
-                label = 1
-            else:
-                label = 0
-
-            interactions.append({
-                "student_id": student_id,
-                "features": json.dumps(features.tolist()),
-                "label": label
-            })
-
-    df = pd.DataFrame(interactions)
-    os.makedirs(DATA_DIR, exist_ok=True)
-    df.to_csv(Path(DATA_DIR) / "interactions.csv", index=False)
-
-    print(f"\nGenerated interactions.csv with {len(df)} rows")
-    return df
-
-
-def train_ranker(df):
-    print("\nTraining XGBRegressor on matched_score...")
-
-    X = np.vstack(df["features"].apply(parse_features).values)
-    y = df["label"].astype(float).values
-
-    model = xgb.XGBRegressor(
-        objective="reg:squarederror",
-        learning_rate=0.1,
-        n_estimators=400,
-        max_depth=6,
-        colsample_bytree=0.9,
-        subsample=0.9,
-        tree_method="hist",
-        random_state=42,
-    )
-
-    model.fit(X, y)
-
-    os.makedirs(TRAINED_MODELS_DIR, exist_ok=True)
-    model.save_model(RANKER_PATH)
-
-    print(f"Saved ranker model → {RANKER_PATH}")
+            shards = ShardIter(directory, None, exclude, grouped, relevance)
+            dtrain = xgb.QuantileDMatrix(shards)
+        booster = xgb.train(params, dtrain, num_boost_round=num_boost_round)
+    finally:
+        dtrain = None  # frees the DMatrix, which deletes its own cache pages
+        if cache_dir:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+    os.makedirs(os.path.dirname(model_path), exist_ok=True)
+    # write then rename, so a serving worker reloading the model never reads a partial file
+    root, ext = os.path.splitext(model_path)
+    booster.save_model(root + ".tmp" + ext)
+    os.replace(root + ".tmp" + ext, model_path)
+    write_model_meta(model_path, {
+        "model_type": "ltr" if grouped else "regression",
+        "objective": params["objective"],
+        "feature_names": meta["feature_names"],
+        "trained_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "interactions": os.path.abspath(directory),
+        "rows": shards.rows,
+        "groups": int(len(exclude) - exclude.sum()),
+        "queries": shards.queries if grouped else None,
+        "relevance_grades": RELEVANCE_GRADES if relevance else None,
+        # None: trained on every group, so evaluate.py scores on it are optimistic
+        "holdout": {"fraction": holdout, "seed": seed} if holdout > 0 else None,
+        "num_boost_round": num_boost_round,
+        "params": params,
+    })
+
+    print(f"Saved ranker model → {model_path}")
+    return booster
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Build the ranker training set and train the XGB ranker")
+    parser.add_argument("--processes", type=int, default=TRAIN_PROCESSES,
+                        help="feature-building processes (1 = no pool)")
+    parser.add_argument("--chunk-rows", type=int, default=TRAIN_CHUNK_ROWS,
+                        help="source rows read per chunk (one task / checkpoint each)")
+    parser.add_argument("--shard-rows", type=int, default=TRAIN_SHARD_ROWS,
+                        help="rows per training-set shard, i.e. per batch handed to xgboost")
+    parser.add_argument("--external-memory", action="store_true",
+                        help="page the quantized training matrix to disk (ExtMemQuantileDMatrix)")
+    parser.add_argument("--checkpoint-dir", default=TRAIN_CHECKPOINT_DIR)
+    parser.add_argument("--no-checkpoint", action="store_true", help="don't save or resume chunks")
+    parser.add_argument("--fresh", action="store_true", help="discard checkpoints from an earlier run")
+    parser.add_argument("--num-students", type=int, default=30)
+    parser.add_argument("--num-jobs", type=int, default=80)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--data-dir", default=INTERACTIONS_DIR, help="where the training set is written / read")
+    parser.add_argument("--reuse", action="store_true",
+                        help="train on the training set already in --data-dir instead of rebuilding it")
+    parser.add_argument("--objective", choices=list(OBJECTIVES), default="regression",
+                        help="pointwise regression or grouped learning to rank")
+    parser.add_argument("--holdout", type=float, default=TRAIN_HOLDOUT,
+                        help="fraction of groups left out of training for evaluate.py "
+                             "(default 0: train on all, for the model you ship)")
+    parser.add_argument("--model-path", default=RANKER_PATH)
+    args = parser.parse_args(argv)
+
+    def _train():
+        train_ranker(args.data_dir, args.external_memory, args.model_path, objective=args.objective,
+                     holdout=args.holdout, seed=args.seed)
+
+    if args.reuse:
+        _train()
+        return
+
+    checkpoint_root = None if args.no_checkpoint else args.checkpoint_dir
+    if args.fresh and checkpoint_root:
+        shutil.rmtree(checkpoint_root, ignore_errors=True)
+
+    rows = build_interactions_from_structured_csv(args.processes, args.chunk_rows, checkpoint_root,
+                                                  args.data_dir, args.shard_rows)
+    if rows is None:
+        generate_interactions(args.num_students, args.num_jobs, args.seed, args.processes, args.chunk_rows,
+                              checkpoint_root, args.data_dir, args.shard_rows)
+    _train()
 
 
 if __name__ == "__main__":
-    df = build_interactions_from_structured_csv()
-    if df is None:
-        df = generate_interactions(num_students=30, num_jobs=80)
-    train_ranker(df)
+    main()
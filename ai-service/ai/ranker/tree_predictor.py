@@ -0,0 +1,148 @@
+"""
+Pure-NumPy evaluator for an XGBoost tree ensemble saved as JSON (ranker.json).
+
+The trees are flattened into padded (n_trees, max_nodes) arrays once at load;
+prediction walks every row through every tree at the same time, one level
+per step, so a call costs max_depth vectorized gathers regardless of how
+many rows are scored. No DMatrix, no xgboost import, no thread pool: this is
+the cheap path for scoring one or a few hundred rows per request.
+
+Supported: gbtree boosters with numeric splits and a single output
+(reg:squarederror and other identity-link objectives, reg:logistic /
+binary:logistic, rank:*). Anything else raises ValueError at load so the
+caller can fall back to xgboost.
+"""
+
+import json
+import math
+from typing import Dict
+
+import numpy as np
+
+# objectives whose prediction is the raw margin
+_IDENTITY = ("reg:squarederror", "reg:squaredlogerror", "reg:pseudohubererror", "reg:absoluteerror",
+             "reg:quantileerror", "rank:pairwise", "rank:ndcg", "rank:map")
+_SIGMOID = ("reg:logistic", "binary:logistic")
+
+
+def _parse_float(value) -> float:
+    # xgboost >= 2 writes base_score as "[5E-1]"
+    return float(str(value).strip("[]"))
+
+
+class NumpyTreeEnsemble:
+    def __init__(self, left: np.ndarray, right: np.ndarray, feature: np.ndarray, threshold: np.ndarray,
+                 default_left: np.ndarray, value: np.ndarray, depth: int, base_margin: float,
+                 objective: str, num_feature: int):
+        n_trees, max_nodes = left.shape
+        offsets = (np.arange(n_trees, dtype=np.int64) * max_nodes)[:, None]
+        # flat node arrays with children as global indices: each step is a few 1-D np.take calls;
+        # children[2 * node] is the left child, children[2 * node + 1] the right one
+        self.children = np.stack([(left + offsets).ravel(), (right + offsets).ravel()], axis=1).ravel()
+        self.feature = feature.astype(np.int64).ravel()
+        self.threshold = threshold.ravel()
+        self.default_left = default_left.ravel()
+        self.value = value.ravel()
+        self.roots = offsets.ravel()
+        self.depth = depth
+        self.base_margin = base_margin
+        self.objective = objective
+        self.num_feature = num_feature
+
+    @classmethod
+    def from_json(cls, path: str) -> "NumpyTreeEnsemble":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+    @classmethod
+    def from_dict(cls, model: Dict) -> "NumpyTreeEnsemble":
+        learner = model["learner"]
+        booster = learner["gradient_booster"]
+        if booster.get("name") != "gbtree":
+            raise ValueError(f"Only gbtree boosters are supported, got {booster.get('name')!r}")
+        params = learner["learner_model_param"]
+        if int(params.get("num_class", 0)) > 1 or int(params.get("num_target", 1)) > 1:
+            raise ValueError("Multi-class / multi-target models are not supported")
+        objective = learner["objective"]["name"]
+        if objective not in _IDENTITY + _SIGMOID:
+            raise ValueError(f"Unsupported objective {objective!r}")
+
+        base_score = _parse_float(params["base_score"])
+        if objective in _SIGMOID:
+            base_margin = math.log(base_score / (1.0 - base_score))
+        else:
+            base_margin = base_score
+
+        trees = booster["model"]["trees"]
+        if any(t.get("categories_nodes") for t in trees):
+            raise ValueError("Categorical splits are not supported")
+        n_trees = len(trees)
+        max_nodes = max((len(t["left_children"]) for t in trees), default=1)
+
+        left = np.zeros((n_trees, max_nodes), dtype=np.int32)
+        right = np.zeros((n_trees, max_nodes), dtype=np.int32)
+        feature = np.zeros((n_trees, max_nodes), dtype=np.int32)
+        threshold = np.zeros((n_trees, max_nodes), dtype=np.float32)
+        default_left = np.zeros((n_trees, max_nodes), dtype=bool)
+        value = np.zeros((n_trees, max_nodes), dtype=np.float32)
+        depth = 0
+
+        for t, tree in enumerate(trees):
+            lc = np.asarray(tree["left_children"], dtype=np.int32)
+            rc = np.asarray(tree["right_children"], dtype=np.int32)
+            n = len(lc)
+            nodes = np.arange(n, dtype=np.int32)
+            leaf = lc < 0
+            # leaves point at themselves, so extra steps are no-ops
+            left[t, :n] = np.where(leaf, nodes, lc)
+            right[t, :n] = np.where(leaf, nodes, rc)
+            feature[t, :n] = np.where(leaf, 0, tree["split_indices"])
+            threshold[t, :n] = tree["split_conditions"]
+            default_left[t, :n] = np.asarray(tree["default_left"], dtype=bool)
+            # a leaf's output is stored in split_conditions
+            value[t, :n] = np.where(leaf, np.asarray(tree["split_conditions"], dtype=np.float32), 0.0)
+            depth = max(depth, _tree_depth(lc, rc))
+
+        return cls(left, right, feature, threshold, default_left, value, depth, base_margin,
+                   objective, int(params.get("num_feature", 0)))
+
+    @property
+    def num_trees(self) -> int:
+        return len(self.roots)
+
+    def predict_margin(self, X) -> np.ndarray:
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+        n, n_features = X.shape
+        if n == 0:
+            return np.zeros(0, dtype=np.float32)
+        flat_x = X.ravel()
+        row_base = (np.arange(n, dtype=np.int64) * n_features)[:, None]
+        has_missing = bool(np.isnan(flat_x).any())
+        node = np.broadcast_to(self.roots, (n, self.num_trees)).copy()
+        for _ in range(self.depth):
+            x = flat_x.take(row_base + self.feature.take(node))
+            # same rule as xgboost: x < threshold goes left, missing follows default_left
+            go_left = x < self.threshold.take(node)
+            if has_missing:
+                go_left = np.where(np.isnan(x), self.default_left.take(node), go_left)
+            node = self.children.take(2 * node + ~go_left)
+        margin = self.value.take(node).sum(axis=1, dtype=np.float64) + self.base_margin
+        return margin.astype(np.float32)
+
+    def predict(self, X) -> np.ndarray:
+        margin = self.predict_margin(X)
+        if self.objective in _SIGMOID:
+            return (1.0 / (1.0 + np.exp(-margin))).astype(np.float32)
+        return margin
+
+
+def _tree_depth(left: np.ndarray, right: np.ndarray) -> int:
+    depth, level = 0, [0]
+    while level:
+        nxt = [c for i in level for c in (left[i], right[i]) if c >= 0]
+        if nxt:
+            depth += 1
+        level = nxt
+    return depth
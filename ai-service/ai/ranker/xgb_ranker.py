@@ -1,23 +1,117 @@
-﻿import os
-import xgboost as xgb
+﻿import hashlib
+import json
+import os
+from typing import Dict
+
 import numpy as np
-from typing import Optional
-from ai.config import RANKER_PATH
+
+from ai.config import RANKER_BACKEND, RANKER_FAST_PATH_ROWS, RANKER_PATH, XGB_NTHREAD
+from ai.features.feature_builder import FEATURE_NAMES
+from ai.logging_config import get_logger
+
+logger = get_logger("ranker")
+
+RANKER_BACKENDS = ("auto", "xgboost", "numpy")
+# "regression": pointwise reg:squarederror on the label; "ltr": grouped
+# learning to rank (rank:pairwise / rank:ndcg), scores only order rows of one query
+MODEL_TYPES = ("regression", "ltr")
+
+
+def meta_path(model_path: str) -> str:
+    """The metadata sidecar saved next to a ranker: ranker.json -> ranker.meta.json."""
+    return os.path.splitext(model_path)[0] + ".meta.json"
+
+
+def read_model_meta(model_path: str) -> Dict:
+    """
+    The sidecar of a saved ranker. Models saved before sidecars existed
+    were all regressors on the current features.
+    """
+    path = meta_path(model_path)
+    if not os.path.exists(path):
+        return {"model_type": "regression", "objective": "reg:squarederror", "feature_names": list(FEATURE_NAMES)}
+    with open(path, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("model_type") not in MODEL_TYPES:
+        raise ValueError(f"{path}: unknown model_type {meta.get('model_type')!r}, expected one of {MODEL_TYPES}")
+    return meta
+
+
+def write_model_meta(model_path: str, meta: Dict) -> None:
+    path = meta_path(model_path)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp, path)
 
 
 class XGBRankerWrapper:
-    def __init__(self):
-        # Use regressor to support regression-trained model
-        self.model: Optional[xgb.XGBRegressor] = None
-        print("DEBUG: Checking for XGB model at:", RANKER_PATH)
-        if os.path.exists(RANKER_PATH):
-            print("DEBUG: XGB model found, loading...")
-            m = xgb.XGBRegressor()
-            m.load_model(RANKER_PATH)
-            self.model = m
-            print("DEBUG: XGB Model Loaded Successfully.")
-        else:
-            print("DEBUG: No XGB model found! Using fallback.")
+    """
+    Scores feature rows with the trained ranker (ranker.json), a regressor
+    or an LTR model as recorded in its sidecar (see read_model_meta).
+    A model whose feature names differ from FeatureBuilder's is not loaded.
+
+    - "xgboost": the raw Booster's inplace_predict on contiguous float32
+      input with `nthread` pinned; no sklearn wrapper, no DMatrix.
+    - "numpy": NumpyTreeEnsemble, the same trees evaluated with NumPy
+      gathers; no xgboost import at all.
+    - "auto": numpy for batches up to `fast_path_rows` (per-call overhead
+      dominates there), xgboost for larger ones.
+
+    If the NumPy evaluator can't represent the model it falls back to xgboost.
+    """
+
+    def __init__(self, path: str = RANKER_PATH, backend: str = RANKER_BACKEND,
+                 nthread: int = XGB_NTHREAD, fast_path_rows: int = RANKER_FAST_PATH_ROWS):
+        if backend not in RANKER_BACKENDS:
+            raise ValueError(f"Unknown ranker backend {backend!r}, expected one of {RANKER_BACKENDS}")
+        self.path = path
+        self.backend = backend
+        self.nthread = nthread
+        self.fast_path_rows = fast_path_rows if backend == "auto" else 0
+        self.booster = None  # xgboost.Booster
+        self.trees = None    # NumpyTreeEnsemble
+        self.meta: Dict = {}
+        self.version = None  # sha256 prefix of the model file
+        logger.debug("Checking for XGB model at: %s", path)
+        if not os.path.exists(path):
+            logger.info("No XGB model at %s; using simple ranker fallback", path)
+            return
+
+        meta = read_model_meta(path)
+        if list(meta.get("feature_names", FEATURE_NAMES)) != list(FEATURE_NAMES):
+            logger.error("XGB model %s was trained on features %s, FeatureBuilder produces %s; "
+                         "using simple ranker fallback", path, meta["feature_names"], list(FEATURE_NAMES))
+            return
+        self.meta = meta
+        with open(path, "rb") as f:
+            self.version = hashlib.sha256(f.read()).hexdigest()[:12]
+
+        if backend in ("auto", "numpy"):
+            from ai.ranker.tree_predictor import NumpyTreeEnsemble
+
+            try:
+                self.trees = NumpyTreeEnsemble.from_json(path)
+            except ValueError as e:
+                logger.warning("NumPy tree evaluator can't load %s (%s); using xgboost", path, e)
+        if self.trees is None or backend == "auto":
+            import xgboost as xgb
+
+            booster = xgb.Booster()
+            booster.load_model(path)
+            if nthread > 0:
+                booster.set_param({"nthread": nthread})
+            self.booster = booster
+        logger.info("XGB model loaded from %s (type=%s, objective=%s, backend=%s)",
+                    path, self.model_type, meta.get("objective"), backend)
+
+    @property
+    def model(self):
+        return self.booster if self.booster is not None else self.trees
+
+    @property
+    def model_type(self):
+        return self.meta.get("model_type")
 
     @property
     def available(self) -> bool:
@@ -26,5 +120,7 @@ class XGBRankerWrapper:
     def predict(self, X: np.ndarray) -> np.ndarray:
         if self.model is None:
             raise RuntimeError("Ranker model not loaded")
-        return self.model.predict(X)
-
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if self.trees is not None and (self.booster is None or len(X) <= self.fast_path_rows):
+            return self.trees.predict(X)
+        return self.booster.inplace_predict(X)
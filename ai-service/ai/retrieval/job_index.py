@@ -0,0 +1,423 @@
+import base64
+import json
+import os
+import threading
+import uuid
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ai.logging_config import get_logger
+
+logger = get_logger("retrieval")
+
+LOG_FILE = "delta.log"
+# persist() rewrites the snapshot once the log outgrows it (and at least this many bytes)
+_LOG_COMPACT_MIN_BYTES = 1 << 20
+
+
+def _normalize_rows(mat: np.ndarray) -> np.ndarray:
+    mat = np.asarray(mat, dtype=np.float32)
+    norms = np.linalg.norm(mat, axis=1, keepdims=True)
+    norms[norms == 0.0] = 1.0
+    return mat / norms
+
+
+class JobVectorIndex:
+    """
+    Cosine-similarity index over job embeddings, used to pick candidate jobs
+    before the (much more expensive) feature + ranker pipeline.
+
+    mode="exact": brute force over a contiguous float32 matrix of unit rows
+                  (one matrix-vector product per query).
+    mode="hnsw":  approximate search with hnswlib (optional dependency,
+                  `pip install hnswlib`); the exact matrix is still kept so
+                  the index can be rebuilt, persisted and re-scored.
+
+    Supports incremental upsert/delete and save/load to a directory.
+    Each job can carry a JSON payload (the Job dict) so retrieved ids can be
+    turned back into FeatureBuilder inputs. `load(..., mmap=True)` maps
+    vectors.npy read-only, so worker processes share one copy through the
+    page cache; the first upsert/delete switches to a private copy.
+
+    On disk a directory holds a snapshot (`save`) plus delta.log, an append
+    log of the upserts / deletes since that snapshot, tagged with the
+    snapshot's generation. `persist` appends the changes made since the last
+    load / save / persist instead of rewriting the snapshot, and compacts
+    (full save) once the log outgrows the vectors; `catch_up` replays what
+    other processes appended since this index last read the log.
+    """
+
+    def __init__(self, dim: int, mode: str = "exact", hnsw_m: int = 16,
+                 hnsw_ef_construction: int = 200, hnsw_ef_search: int = 128,
+                 embedding_model: Optional[str] = None):
+        if mode not in ("exact", "hnsw"):
+            raise ValueError(f"Unknown index mode: {mode}")
+        self.dim = int(dim)
+        self.mode = mode
+        self.hnsw_m = hnsw_m
+        self.hnsw_ef_construction = hnsw_ef_construction
+        self.hnsw_ef_search = hnsw_ef_search
+        # model id (Embedder.model_id) that produced the vectors, saved so a model swap is detected
+        self.embedding_model = embedding_model
+
+        self._lock = threading.RLock()
+        self._vectors = np.zeros((0, self.dim), dtype=np.float32)
+        self._size = 0
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._payloads: Dict[str, Dict] = {}
+
+        # hnsw labels are stable ints; rows move on delete, labels do not
+        self._hnsw = None
+        self._labels: Dict[str, int] = {}
+        self._label_ids: Dict[int, str] = {}
+        self._next_label = 0
+        if mode == "hnsw":
+            self._init_hnsw(capacity=1024)
+
+        # delta log state, set by save / load: directory, snapshot generation,
+        # bytes of the log applied, and the changes made since (None: not tracked)
+        self._log_dir: Optional[str] = None
+        self._generation: Optional[str] = None
+        self._log_offset = 0
+        self._pending: Optional[List[Dict]] = None
+
+    # ---------- hnsw backend ----------
+
+    def _init_hnsw(self, capacity: int) -> None:
+        try:
+            import hnswlib
+        except ImportError as e:
+            raise ImportError("JobVectorIndex(mode='hnsw') requires `pip install hnswlib`") from e
+        self._hnsw = hnswlib.Index(space="ip", dim=self.dim)
+        self._hnsw.init_index(max_elements=capacity, M=self.hnsw_m,
+                              ef_construction=self.hnsw_ef_construction, allow_replace_deleted=True)
+        self._hnsw.set_ef(self.hnsw_ef_search)
+
+    def _hnsw_add(self, job_ids: Sequence[str], unit: np.ndarray) -> None:
+        labels = []
+        for job_id in job_ids:
+            label = self._labels.get(job_id)
+            if label is None:
+                label = self._next_label
+                self._next_label += 1
+                self._labels[job_id] = label
+                self._label_ids[label] = job_id
+            labels.append(label)
+        needed = self._hnsw.get_current_count() + len(labels)
+        if needed > self._hnsw.get_max_elements():
+            self._hnsw.resize_index(max(needed, 2 * self._hnsw.get_max_elements()))
+        self._hnsw.add_items(unit, np.asarray(labels, dtype=np.int64), replace_deleted=True)
+
+    # ---------- mutation ----------
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, job_id: str) -> bool:
+        return job_id in self._rows
+
+    def _ensure_writable(self) -> None:
+        if not self._vectors.flags.writeable:
+            self._vectors = np.array(self._vectors[: self._size], dtype=np.float32)
+
+    def _reserve(self, extra: int) -> None:
+        needed = self._size + extra
+        if needed <= self._vectors.shape[0]:
+            return
+        grown = np.zeros((max(needed, 2 * self._vectors.shape[0], 64), self.dim), dtype=np.float32)
+        grown[: self._size] = self._vectors[: self._size]
+        self._vectors = grown
+
+    def upsert(self, job_ids: Sequence[str], vectors, payloads: Optional[Sequence[Optional[Dict]]] = None) -> None:
+        """Add new jobs or replace the vectors (and payloads) of existing ones."""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(job_ids), -1)
+        if vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected {self.dim}-d vectors, got {vectors.shape[1]}")
+        unit = _normalize_rows(vectors)
+        with self._lock:
+            self._upsert_unit(job_ids, unit, payloads)
+            if self._pending is not None:
+                self._pending.append({
+                    "op": "upsert",
+                    "ids": list(job_ids),
+                    "vectors": base64.b64encode(np.ascontiguousarray(unit).tobytes()).decode("ascii"),
+                    "payloads": None if payloads is None else list(payloads),
+                })
+
+    def _upsert_unit(self, job_ids: Sequence[str], unit: np.ndarray,
+                     payloads: Optional[Sequence[Optional[Dict]]]) -> None:
+        with self._lock:
+            self._ensure_writable()
+            self._reserve(len(job_ids))
+            for i, job_id in enumerate(job_ids):
+                row = self._rows.get(job_id)
+                if row is None:
+                    row = self._size
+                    self._rows[job_id] = row
+                    self._ids.append(job_id)
+                    self._size += 1
+                self._vectors[row] = unit[i]
+                if payloads is not None and payloads[i] is not None:
+                    self._payloads[job_id] = payloads[i]
+            if self._hnsw is not None:
+                self._hnsw_add(list(job_ids), unit)
+
+    def delete(self, job_ids: Iterable[str]) -> int:
+        job_ids = list(job_ids)
+        with self._lock:
+            removed = self._delete(job_ids)
+            if removed and self._pending is not None:
+                self._pending.append({"op": "delete", "ids": job_ids})
+        return removed
+
+    def _delete(self, job_ids: Iterable[str]) -> int:
+        removed = 0
+        with self._lock:
+            self._ensure_writable()
+            for job_id in job_ids:
+                row = self._rows.pop(job_id, None)
+                if row is None:
+                    continue
+                last = self._size - 1
+                if row != last:
+                    # keep rows contiguous: move the last row into the hole
+                    moved_id = self._ids[last]
+                    self._vectors[row] = self._vectors[last]
+                    self._ids[row] = moved_id
+                    self._rows[moved_id] = row
+                self._ids.pop()
+                self._size -= 1
+                self._payloads.pop(job_id, None)
+                if self._hnsw is not None:
+                    label = self._labels.pop(job_id)
+                    self._label_ids.pop(label, None)
+                    self._hnsw.mark_deleted(label)
+                removed += 1
+        return removed
+
+    # ---------- queries ----------
+
+    def ids(self) -> List[str]:
+        with self._lock:
+            return list(self._ids)
+
+    def payload(self, job_id: str) -> Optional[Dict]:
+        return self._payloads.get(job_id)
+
+    def vector(self, job_id: str) -> Optional[np.ndarray]:
+        with self._lock:
+            row = self._rows.get(job_id)
+            return None if row is None else self._vectors[row].copy()
+
+    def search(self, query, k: int, exact: Optional[bool] = None) -> List[Tuple[str, float]]:
+        """Top-k (job_id, cosine similarity), best first."""
+        q = np.asarray(query, dtype=np.float32).reshape(-1)
+        norm = float(np.linalg.norm(q))
+        with self._lock:
+            n = self._size
+            k = min(int(k), n)
+            if k <= 0 or norm == 0.0:
+                return []
+            q = q / norm
+            use_exact = self._hnsw is None if exact is None else exact
+            if not use_exact:
+                self._hnsw.set_ef(max(self.hnsw_ef_search, k))
+                labels, dists = self._hnsw.knn_query(q, k=k)
+                # hnswlib "ip" distance is 1 - dot
+                return [(self._label_ids[int(l)], float(1.0 - d)) for l, d in zip(labels[0], dists[0])]
+
+            scores = self._vectors[:n] @ q
+            if k < n:
+                top = np.argpartition(-scores, k - 1)[:k]
+            else:
+                top = np.arange(n)
+            top = top[np.argsort(-scores[top], kind="stable")]
+            return [(self._ids[i], float(scores[i])) for i in top]
+
+    # ---------- persistence ----------
+
+    def save(self, directory: str) -> None:
+        """
+        Write vectors.npy, (hnsw mode) the graph, an empty delta log and then
+        ids/payload metadata under a new generation. Every file is replaced
+        atomically and meta.json goes last, so a reader that sees a new
+        meta.json also sees the matching data.
+        """
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            generation = uuid.uuid4().hex
+            tmp = os.path.join(directory, "vectors.tmp.npy")
+            np.save(tmp, self._vectors[: self._size])
+            os.replace(tmp, os.path.join(directory, "vectors.npy"))
+            if self._hnsw is not None:
+                tmp = os.path.join(directory, "hnsw.tmp.bin")
+                self._hnsw.save_index(tmp)
+                os.replace(tmp, os.path.join(directory, "hnsw.bin"))
+            header = json.dumps({"generation": generation}) + "\n"
+            tmp = os.path.join(directory, "delta.tmp.log")
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(header)
+            os.replace(tmp, os.path.join(directory, LOG_FILE))
+            meta = {
+                "generation": generation,
+                "dim": self.dim,
+                "embedding_model": self.embedding_model,
+                "mode": self.mode,
+                "ids": self._ids,
+                "payloads": self._payloads,
+                "labels": self._labels,
+                "next_label": self._next_label,
+                "hnsw": {"m": self.hnsw_m, "ef_construction": self.hnsw_ef_construction,
+                         "ef_search": self.hnsw_ef_search},
+            }
+            tmp = os.path.join(directory, "meta.tmp.json")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            os.replace(tmp, os.path.join(directory, "meta.json"))
+            self._log_dir, self._generation = directory, generation
+            self._log_offset = len(header.encode("utf-8"))
+            self._pending = []
+
+    def persist(self, directory: str) -> None:
+        """
+        Write the changes since the last load / save / persist of `directory`
+        to its delta log. Falls back to a full save when the directory holds
+        another snapshot (or none) and compacts once the log outgrows the
+        vectors. Concurrent writers must hold a lock across catch_up + the
+        changes + persist (JobProfileStore.exclusive).
+        """
+        with self._lock:
+            log_path = os.path.join(directory, LOG_FILE)
+            if self._pending is None or self._log_dir != directory or not os.path.exists(log_path):
+                self.save(directory)
+                return
+            if not self._pending:
+                return
+            size = os.path.getsize(log_path)
+            if _read_generation(log_path) != self._generation or \
+                    size > max(_LOG_COMPACT_MIN_BYTES, self._size * self.dim * 4):
+                self.save(directory)
+                return
+            lines = "".join(json.dumps(op) + "\n" for op in self._pending)
+            with open(log_path, "a", encoding="utf-8") as f:
+                f.write(lines)
+            self._log_offset = size + len(lines.encode("utf-8"))
+            self._pending = []
+
+    def log_behind(self, directory: str) -> bool:
+        """True when `directory`'s delta log has changed since this index last read or wrote it."""
+        if self._log_dir != directory:
+            return False
+        try:
+            return os.path.getsize(os.path.join(directory, LOG_FILE)) != self._log_offset
+        except FileNotFoundError:
+            return True
+
+    def catch_up(self, directory: str) -> Optional[set]:
+        """
+        Apply the delta log records appended since this index last read or
+        wrote it. Returns the ids they touched, or None when the log belongs
+        to another snapshot and the index has to be loaded again.
+        """
+        with self._lock:
+            if self._log_dir != directory:
+                return None
+            log_path = os.path.join(directory, LOG_FILE)
+            try:
+                with open(log_path, "rb") as f:
+                    if json.loads(f.readline() or b"{}").get("generation") != self._generation:
+                        return None
+                    f.seek(self._log_offset)
+                    data = f.read()
+            except (FileNotFoundError, ValueError):
+                return None
+            touched, consumed = self._replay(data)
+            self._log_offset += consumed
+            return touched
+
+    def _replay(self, data: bytes) -> Tuple[set, int]:
+        """Apply the complete lines of `data`; (ids touched, bytes consumed)."""
+        touched = set()
+        consumed = 0
+        for line in data.splitlines(keepends=True):
+            if not line.endswith(b"\n"):
+                break  # a record still being written
+            consumed += len(line)
+            op = json.loads(line)
+            ids = op["ids"]
+            if op["op"] == "upsert":
+                unit = np.frombuffer(base64.b64decode(op["vectors"]), dtype=np.float32).reshape(len(ids), self.dim)
+                self._upsert_unit(ids, unit, op.get("payloads"))
+            else:
+                self._delete(ids)
+            touched.update(ids)
+        return touched, consumed
+
+    @classmethod
+    def load(cls, directory: str, mode: Optional[str] = None, mmap: bool = False) -> "JobVectorIndex":
+        """
+        Load a saved index. Passing a different `mode` rebuilds the hnsw graph
+        from the vectors; mmap=True maps the vectors read-only instead of reading them.
+        """
+        with open(os.path.join(directory, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        saved_mode = meta["mode"]
+        mode = mode or saved_mode
+        hnsw = meta.get("hnsw", {})
+        index = cls(meta["dim"], mode="exact", hnsw_m=hnsw.get("m", 16),
+                    hnsw_ef_construction=hnsw.get("ef_construction", 200),
+                    hnsw_ef_search=hnsw.get("ef_search", 128),
+                    embedding_model=meta.get("embedding_model"))
+        vectors = np.load(os.path.join(directory, "vectors.npy"), mmap_mode="r" if mmap else None)
+        ids = meta["ids"]
+        index._vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        index._size = len(ids)
+        index._ids = list(ids)
+        index._rows = {job_id: i for i, job_id in enumerate(ids)}
+        index._payloads = meta.get("payloads", {})
+        index.mode = mode
+
+        graph_path = os.path.join(directory, "hnsw.bin")
+        if mode == "hnsw" and saved_mode == "hnsw" and os.path.exists(graph_path):
+            import hnswlib
+
+            index._hnsw = hnswlib.Index(space="ip", dim=index.dim)
+            index._hnsw.load_index(graph_path, allow_replace_deleted=True)
+            index._hnsw.set_ef(index.hnsw_ef_search)
+            index._labels = {k: int(v) for k, v in meta.get("labels", {}).items()}
+            index._label_ids = {v: k for k, v in index._labels.items()}
+            index._next_label = int(meta.get("next_label", len(index._labels)))
+        elif mode == "hnsw":
+            index._init_hnsw(capacity=max(1024, index._size))
+            if index._size:
+                index._hnsw_add(index._ids, index._vectors[: index._size])
+
+        generation = meta.get("generation")
+        log_path = os.path.join(directory, LOG_FILE)
+        if generation is not None and _read_generation(log_path) == generation:
+            index._log_dir, index._generation = directory, generation
+            with open(log_path, "rb") as f:
+                data = f.read()
+            header = data.index(b"\n") + 1
+            touched, consumed = index._replay(data[header:])
+            index._log_offset = header + consumed
+            index._pending = []
+            if touched:
+                logger.info("Replayed %d job changes from %s", len(touched), log_path)
+        logger.info("Loaded job index from %s: %d jobs, mode=%s", directory, index._size, mode)
+        return index
+
+    def stats(self) -> Dict:
+        return {"jobs": self._size, "dim": self.dim, "mode": self.mode,
+                "embedding_model": self.embedding_model}
+
+
+def _read_generation(log_path: str) -> Optional[str]:
+    """Generation in the header line of a delta log, None when there is no readable log."""
+    try:
+        with open(log_path, "rb") as f:
+            return json.loads(f.readline() or b"{}").get("generation")
+    except (FileNotFoundError, ValueError):
+        return None
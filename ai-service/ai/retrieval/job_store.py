@@ -0,0 +1,206 @@
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ai.features.feature_builder import FeatureBuilder
+from ai.logging_config import get_logger
+from ai.retrieval.job_index import JobVectorIndex
+
+try:
+    import fcntl
+except ImportError:  # not on Windows; the store is then only safe for one process
+    fcntl = None
+
+logger = get_logger("retrieval.store")
+
+
+class JobProfileStore:
+    """
+    Job-side precomputation keyed by job id and version.
+
+    For each job it holds the prepared job dict (normalized / extracted
+    skills), its FeatureBuilder.job_profile (skill keys, domains, title
+    tokens, parsed requirements) and its embedding, so /recommend only does
+    the student-dependent work for stored jobs.
+
+    Job dicts and vectors live in the JobVectorIndex, which already handles
+    retrieval and persistence; profiles are derived data and are rebuilt
+    from the stored job dicts when the store is created.
+
+    A store opened on a directory (`open`) can be shared by several worker
+    processes: writers hold `exclusive()` around refresh + upsert + save.
+    `save()` appends the change to the index's delta log, and `refresh()`
+    replays what other processes appended (rebuilding only the touched
+    profiles); a full reload happens only after a snapshot rewrite.
+    """
+
+    def __init__(self, index: JobVectorIndex, directory: Optional[str] = None, mmap: bool = False):
+        self.index = index
+        # vectors loaded from disk must come from this model and dim (set by open)
+        self.embedding_model = index.embedding_model
+        self.dim = index.dim
+        self.directory = directory
+        self.mmap = mmap
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()  # writers in this process; exclusive() adds the flock
+        self._stamp = None
+        self._profiles: Dict[str, Dict] = self._build_profiles(index)
+        if self._profiles:
+            logger.info("Built %d job profiles from the job index", len(self._profiles))
+
+    @classmethod
+    def open(cls, directory: str, dim: int, mode: str = "exact", mmap: bool = False,
+             embedding_model: Optional[str] = None) -> "JobProfileStore":
+        """
+        Load the store saved in `directory`, or start an empty one there.
+        A saved index from another embedding model or dim is not loaded: the
+        store starts empty, jobs are re-embedded as they are indexed again,
+        and the first save replaces the stale snapshot.
+        """
+        stamp = _disk_stamp(directory)  # taken first: a save racing the load just triggers a refresh
+        index = None
+        if stamp is not None:
+            index = JobVectorIndex.load(directory, mode=mode, mmap=mmap)
+            if not _compatible(index, dim, embedding_model, directory):
+                index = None
+        if index is None:
+            index = JobVectorIndex(dim, mode=mode, embedding_model=embedding_model)
+        store = cls(index, directory=directory, mmap=mmap)
+        store._stamp = stamp
+        return store
+
+    def _build_profiles(self, index: JobVectorIndex, reuse: Optional[Dict[str, Dict]] = None) -> Dict[str, Dict]:
+        """Profiles for every stored job; with `reuse`, unchanged versions keep their old profile."""
+        profiles = {}
+        for job_id in index.ids():
+            payload = index.payload(job_id)
+            if payload is None:
+                continue
+            if reuse is not None and job_id in reuse and payload.get("version") is not None \
+                    and payload.get("version") == self.version(job_id):
+                profiles[job_id] = reuse[job_id]
+            else:
+                profiles[job_id] = FeatureBuilder.job_profile(payload)
+        return profiles
+
+    def refresh(self) -> bool:
+        """Pick up what other processes saved since we loaded, refreshed or saved the store."""
+        if self.directory is None:
+            return False
+        stamp = _disk_stamp(self.directory)
+        if stamp is None or (stamp == self._stamp and not self.index.log_behind(self.directory)):
+            return False
+        with self._lock:
+            stamp = _disk_stamp(self.directory)
+            if stamp == self._stamp:
+                touched = self.index.catch_up(self.directory)
+                if touched is not None:
+                    for job_id in touched:
+                        payload = self.index.payload(job_id)
+                        if payload is None:
+                            self._profiles.pop(job_id, None)
+                        else:
+                            self._profiles[job_id] = FeatureBuilder.job_profile(payload)
+                    if touched:
+                        logger.info("Applied %d job changes from %s", len(touched), self.directory)
+                    return bool(touched)
+            index = JobVectorIndex.load(self.directory, mode=self.index.mode, mmap=self.mmap)
+            if not _compatible(index, self.dim, self.embedding_model, self.directory):
+                self._stamp = stamp  # keep serving ours; our next save replaces it
+                return False
+            profiles = self._build_profiles(index, reuse=self._profiles)
+            self.index, self._profiles, self._stamp = index, profiles, stamp
+        logger.info("Reloaded job store from %s: %d jobs", self.directory, len(index))
+        return True
+
+    @contextmanager
+    def exclusive(self):
+        """Write lock: the in-process writer lock, plus an flock on the store directory across processes."""
+        with self._write_lock:
+            if self.directory is None or fcntl is None:
+                yield
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            with open(os.path.join(self.directory, ".lock"), "a") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __contains__(self, job_id: str) -> bool:
+        return job_id in self._profiles
+
+    def version(self, job_id: str) -> Optional[str]:
+        payload = self.index.payload(job_id)
+        return None if payload is None else payload.get("version")
+
+    def get(self, job_id: str, version: Optional[str] = None) -> Optional[Tuple[Dict, Dict, np.ndarray]]:
+        """
+        (job_dict, job_profile, vector) for a stored job, or None when it is
+        unknown or `version` is given and differs from the stored one.
+        """
+        index, profiles = self.index, self._profiles  # one consistent snapshot across a refresh
+        payload = index.payload(job_id)
+        profile = profiles.get(job_id)
+        if payload is None or profile is None:
+            return None
+        if version is not None and payload.get("version") != version:
+            return None
+        vector = index.vector(job_id)
+        if vector is None:
+            return None
+        return dict(payload), profile, vector
+
+    def upsert(self, job_dicts: Sequence[Dict], vectors) -> None:
+        """Store prepared job dicts (without "embedding") and their vectors."""
+        if not job_dicts:
+            return
+        profiles = [FeatureBuilder.job_profile(j) for j in job_dicts]
+        with self._lock:
+            self.index.upsert([j["id"] for j in job_dicts], vectors, payloads=list(job_dicts))
+            for job_dict, profile in zip(job_dicts, profiles):
+                self._profiles[job_dict["id"]] = profile
+
+    def delete(self, job_ids: List[str]) -> int:
+        with self._lock:
+            removed = self.index.delete(job_ids)
+            for job_id in job_ids:
+                self._profiles.pop(job_id, None)
+        return removed
+
+    def save(self, directory: Optional[str] = None) -> None:
+        """Persist to the store directory (delta log, see JobVectorIndex.persist) or snapshot to another one."""
+        directory = directory or self.directory
+        if directory == self.directory:
+            self.index.persist(directory)
+            self._stamp = _disk_stamp(directory)
+        else:
+            self.index.save(directory)
+
+    def stats(self) -> Dict:
+        return {**self.index.stats(), "profiles": len(self._profiles)}
+
+
+def _compatible(index: JobVectorIndex, dim: int, embedding_model: Optional[str], directory: str) -> bool:
+    """Whether a loaded index holds vectors of `embedding_model` (unknown for old snapshots) and `dim`."""
+    if index.dim == dim and index.embedding_model == embedding_model:
+        return True
+    logger.warning("Ignoring the job index in %s: it holds %s vectors (dim %d), the embedder is %s (dim %d)",
+                   directory, index.embedding_model or "unknown-model", index.dim, embedding_model, dim)
+    return False
+
+
+def _disk_stamp(directory: str):
+    """Identity of the last snapshot: meta.json is replaced last, so its inode/mtime change on every full save."""
+    try:
+        st = os.stat(os.path.join(directory, "meta.json"))
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_mtime_ns, st.st_size
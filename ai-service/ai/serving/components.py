@@ -0,0 +1,134 @@
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from ai.logging_config import get_logger
+
+logger = get_logger("serving.components")
+
+_UNSET = object()
+
+
+def file_stamp(*paths: str) -> Tuple:
+    """(mtime_ns, size) of each path, None for missing ones; changes when any file is rewritten."""
+    stamps = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except OSError:
+            stamps.append(None)
+        else:
+            stamps.append((st.st_mtime_ns, st.st_size))
+    return tuple(stamps)
+
+
+class LazyComponent:
+    """
+    A service component (model, parser, store) built on first use.
+
+    The factory runs once even when several request threads hit the
+    component at the same time; a failed build is raised to that caller and
+    retried on the next use. Attribute access (and `in` / `len`) is
+    forwarded to the built object, so call sites use the component as if it
+    were the object itself. `loaded` and `status()` never trigger a build.
+
+    `stamp` (e.g. file_stamp of the files the factory reads) is recorded
+    before each build, so `changed()` tells when the files were rewritten
+    since; reload() builds a replacement and swaps it in (see
+    ai/serving/reloader.py).
+    """
+
+    def __init__(self, name: str, factory: Callable[[], Any], stamp: Optional[Callable[[], Any]] = None):
+        self.name = name
+        self._factory = factory
+        self._stamp = stamp
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._value = _UNSET
+        self.load_seconds: Optional[float] = None
+        self.error: Optional[str] = None
+        self.stamp: Any = None
+        self.reloads = 0
+
+    def resolve(self) -> Any:
+        value = self._value
+        if value is not _UNSET:
+            return value
+        with self._lock:
+            if self._value is _UNSET:
+                t0 = time.perf_counter()
+                stamp = self.current_stamp()
+                try:
+                    value = self._factory()
+                except Exception as e:
+                    self.error = f"{type(e).__name__}: {e}"
+                    logger.warning("Loading %s failed: %s", self.name, self.error)
+                    raise
+                self.load_seconds = time.perf_counter() - t0
+                self.error = None
+                self.stamp = stamp
+                self._value = value
+                logger.info("Loaded %s in %.2fs", self.name, self.load_seconds)
+            return self._value
+
+    def current_stamp(self) -> Any:
+        return self._stamp() if self._stamp is not None else None
+
+    def changed(self) -> bool:
+        """True when loaded and the stamp differs from the one taken before the last build."""
+        return self._stamp is not None and self.loaded and self.current_stamp() != self.stamp
+
+    def reload(self, validate: Optional[Callable[[Any], None]] = None) -> Any:
+        """
+        Build a new value with the factory and, once `validate` (which
+        raises to reject) accepts it, swap it in with one assignment: later
+        lookups get the new value, callers already holding the old one finish
+        with it. A failed build or validation raises and leaves the old value
+        in place. The build runs outside the resolve() lock, so requests keep
+        being served meanwhile.
+        """
+        with self._reload_lock:
+            t0 = time.perf_counter()
+            stamp = self.current_stamp()
+            value = self._factory()
+            if validate is not None:
+                validate(value)
+            with self._lock:
+                self._value = value
+                self.stamp = stamp
+                self.load_seconds = time.perf_counter() - t0
+                self.error = None
+                self.reloads += 1
+            logger.info("Reloaded %s in %.2fs", self.name, self.load_seconds)
+            return value
+
+    @property
+    def loaded(self) -> bool:
+        return self._value is not _UNSET
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "loaded": self.loaded,
+            "load_seconds": round(self.load_seconds, 3) if self.load_seconds is not None else None,
+            "error": self.error,
+            "reloads": self.reloads,
+        }
+
+    def __getattr__(self, attr):
+        # only reached for names not set on the proxy itself
+        if attr.startswith("__") or attr in ("_value", "_factory", "_stamp", "_lock", "_reload_lock"):
+            raise AttributeError(attr)
+        return getattr(self.resolve(), attr)
+
+    def __contains__(self, item) -> bool:
+        return item in self.resolve()
+
+    def __len__(self) -> int:
+        return len(self.resolve())
+
+    def __bool__(self) -> bool:
+        return True
+
+    def __repr__(self):
+        return f"<LazyComponent {self.name} loaded={self.loaded}>"
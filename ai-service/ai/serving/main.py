@@ -1,21 +1,56 @@
-﻿from fastapi import FastAPI, UploadFile, File
+﻿import asyncio
+import hmac
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, UploadFile, File, Header, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel, Field
-from typing import List, Optional, Any
+from typing import List, Optional, Any, Union
 import numpy as np
 
+from ai.config import (
+    PARSE_WORKERS, PARSE_CACHE_ENABLED, JOB_INDEX_DIR, JOB_INDEX_MODE, JOB_INDEX_MMAP, WARMUP_ON_STARTUP,
+    ADMIN_TOKEN, RANKER_PATH, SKILL_MAP_PATH, SKILL_AUTOMATON_PATH,
+)
 from ai.logging_config import setup_logging
 from ai.parsing.text_extractor import ResumeTextExtractor
-from ai.parsing.resume_gemini_parser import ResumeGeminiParser
 from ai.parsing.resume_cleaner import ResumeCleaner
+from ai.parsing.bulk_ingest import BulkResumeIngestor, count_zip_pdfs, iter_zip_pdfs
+from ai.parsing.parse_cache import ParseResultCache
+from ai.retrieval.job_store import JobProfileStore
 from ai.skills.skill_normalizer import SkillNormalizer
 from ai.embeddings.embedder import get_embedder
-from ai.features.feature_builder import FeatureBuilder
+from ai.embeddings.batcher import get_embedding_batcher
+from ai.embeddings.codec import decode_embedding, decode_into, encode_embedding
+from ai.features.feature_builder import NUM_FEATURES, FeatureBuilder, batch_cosine_similarity
 from ai.ranker.simple_ranker import SimpleRanker
-from ai.ranker.xgb_ranker import XGBRankerWrapper
+from ai.ranker.xgb_ranker import meta_path
+from ai.metrics import REGISTRY, STAGE_LATENCY, JOBS_PER_REQUEST, XGB_FALLBACKS
+from ai.serving.components import LazyComponent, file_stamp
+from ai.serving.reloader import Reloader
+from ai.serving.timing import DEBUG_TIMING_HEADER, StageTimer, wants_timing
 
 
 logger = setup_logging()
-app = FastAPI(title="Placement AI Service (Gemini-based)")
+
+
+@asynccontextmanager
+async def _lifespan(app):
+    if WARMUP_ON_STARTUP:
+        # in the background so /live answers while models load
+        threading.Thread(target=warmup, name="warmup", daemon=True).start()
+    reloader.start()
+    yield
+    reloader.stop()
+    if embed_batcher.loaded:
+        embed_batcher.close()
+
+
+app = FastAPI(title="Placement AI Service (Gemini-based)", lifespan=_lifespan)
 
 
 # ---------- Models ----------
@@ -29,7 +64,8 @@ class Student(BaseModel):
     domains: List[str] = Field(default_factory=list)
     experience: List[Any] = Field(default_factory=list)
     education: List[Any] = Field(default_factory=list)
-    skill_embedding: Optional[List[float]] = Field(default=None, alias="skillEmbedding")
+    # List of floats or a compact "emb1:f16:..." / "emb1:i8:..." string (ai/embeddings/codec.py).
+    skill_embedding: Optional[Union[List[float], str]] = Field(default=None, alias="skillEmbedding")
 
     class Config:
         allow_population_by_field_name = True
@@ -44,176 +80,340 @@ class Job(BaseModel):
     branch: Optional[str] = None
     domain: Optional[str] = None
     company: Optional[str] = None
+    embedding: Optional[Union[List[float], str]] = None
+    # Opaque revision (e.g. the backend's updatedAt). A job sent with the
+    # version held in the job store reuses its stored profile and embedding.
+    version: Optional[str] = None
 
 
 class RecommendRequest(BaseModel):
     student: Student
+    jobs: List[Job] = Field(default_factory=list)
+    # Jobs already upserted via /jobs/index, scored from the job store.
+    job_ids: List[str] = Field(default_factory=list)
+    # Retrieval mode: score only the top_k jobs most similar to the student.
+    # With an empty `jobs` list, candidates come from the service's job index.
+    top_k: Optional[int] = Field(default=None, ge=1)
+
+
+class RankCandidatesRequest(BaseModel):
+    # One job, sent in full or by id if it is already in the job store.
+    job: Optional[Job] = None
+    job_id: Optional[str] = None
+    students: List[Student]
+    # Return only the best top_k students.
+    top_k: Optional[int] = Field(default=None, ge=1)
+
+
+class JobIndexRequest(BaseModel):
     jobs: List[Job]
 
 
+class ReloadRequest(BaseModel):
+    # Components to check (default: all watched ones, see reloader.names).
+    components: Optional[List[str]] = None
+    # Reload even if the files look unchanged.
+    force: bool = False
+
+
 # ---------- Setup components ----------
+# Heavy components are LazyComponents: built on first use (or by warmup()),
+# so importing this module stays fast and needs no API key or model files.
+
+def _make_gemini_parser():
+    from ai.parsing.resume_gemini_parser import ResumeGeminiParser
+
+    return ResumeGeminiParser()
+
+
+def _make_xgb_ranker():
+    from ai.ranker.xgb_ranker import XGBRankerWrapper
+
+    return XGBRankerWrapper()
+
+
+def _make_embed_batcher():
+    embedder.resolve()  # build the shared Embedder under its own lock first
+    return get_embedding_batcher()
+
+
+def _make_parse_cache():
+    return ParseResultCache(ParseResultCache.make_version(
+        gemini_parser.template, gemini_parser.model_name, embedder.model_id,
+    ))
+
+
+def _make_job_store():
+    return JobProfileStore.open(JOB_INDEX_DIR, embedder.dim, mode=JOB_INDEX_MODE, mmap=JOB_INDEX_MMAP,
+                                embedding_model=embedder.model_id)
+
 
 extractor = ResumeTextExtractor()
-gemini_parser = ResumeGeminiParser()
 cleaner = ResumeCleaner()
-skill_normalizer = SkillNormalizer()
-embedder = get_embedder()
-feature_builder = FeatureBuilder()
 simple_ranker = SimpleRanker()
-xgb_ranker = XGBRankerWrapper()
+gemini_parser = LazyComponent("gemini_parser", _make_gemini_parser)
+skill_normalizer = LazyComponent("skill_normalizer", SkillNormalizer,
+                                 stamp=lambda: file_stamp(SKILL_MAP_PATH, SKILL_AUTOMATON_PATH))
+embedder = LazyComponent("embedder", get_embedder)
+# Single-text embeds from concurrent requests are merged into batched encode calls.
+embed_batcher = LazyComponent("embed_batcher", _make_embed_batcher)
+feature_builder = LazyComponent("feature_builder", FeatureBuilder)
+xgb_ranker = LazyComponent("xgb_ranker", _make_xgb_ranker,
+                           stamp=lambda: file_stamp(RANKER_PATH, meta_path(RANKER_PATH)))
+
+# Bounded pool for blocking work called from async handlers.
+parse_executor = ThreadPoolExecutor(max_workers=PARSE_WORKERS, thread_name_prefix="parse")
+
+parse_cache = LazyComponent("parse_cache", _make_parse_cache) if PARSE_CACHE_ENABLED else None
+
+# Job-side precomputation (normalized skills, feature profile, embedding) by id + version.
+# Shared through JOB_INDEX_DIR by all worker processes; see JobProfileStore.refresh.
+job_store = LazyComponent("job_store", _make_job_store)
+
+# Needed to score requests; /ready waits for these. The Gemini parser (and
+# the parse cache keyed by it) only serve /parse_resume(s).
+CORE_COMPONENTS = (skill_normalizer, embedder, embed_batcher, feature_builder, xgb_ranker, job_store)
+OPTIONAL_COMPONENTS = tuple(c for c in (gemini_parser, parse_cache) if c is not None)
+
+
+def _smoke_test_ranker(ranker) -> None:
+    if not ranker.available:
+        if ranker.path and os.path.exists(ranker.path):
+            raise ValueError(f"{ranker.path} exists but could not be loaded")
+        return  # model removed: the simple ranker takes over
+    X = np.vstack([np.zeros(NUM_FEATURES), np.full(NUM_FEATURES, 0.5), np.ones(NUM_FEATURES)])
+    scores = ranker.predict(X)
+    if np.shape(scores) != (len(X),) or not np.isfinite(scores).all():
+        raise ValueError(f"smoke prediction returned {scores!r}")
+
+
+def _smoke_test_skill_normalizer(normalizer) -> None:
+    if not normalizer.map:
+        raise ValueError("skill map is empty or unreadable")
+    normalizer.normalize(["Python"])
+    normalizer.extract_from_text("python developer")
+
+
+# Ranker and skill map can be replaced on disk and swapped in without a
+# restart: POST /admin/reload, RELOAD_WATCH_INTERVAL polling or SIGHUP.
+reloader = Reloader()
+reloader.watch(xgb_ranker, _smoke_test_ranker)
+reloader.watch(skill_normalizer, _smoke_test_skill_normalizer, on_reload=lambda: _renormalize_stored_jobs())
+
+_warmup_done = threading.Event()
+_warmup_error: Optional[str] = None
+
+
+def _embedding_cache_lookups():
+    if not embedder.loaded or embedder.cache is None:
+        return {}
+    stats = embedder.cache.stats()
+    return {
+        ("memory_hit",): stats["memory_hits"],
+        ("disk_hit",): stats["disk_hits"],
+        ("miss",): stats["misses"],
+    }
+
+
+def _parse_cache_lookups():
+    if parse_cache is None or not parse_cache.loaded:
+        return {}
+    stats = parse_cache.stats()
+    return {
+        ("pdf_hit",): stats["pdf_hits"],
+        ("text_hit",): stats["text_hits"],
+        ("miss",): stats["misses"],
+    }
+
+
+REGISTRY.callback(
+    "ai_embedding_cache_lookups_total",
+    "Embedding cache lookups by result.",
+    "counter",
+    _embedding_cache_lookups,
+    ("result",),
+)
+REGISTRY.callback(
+    "ai_parse_cache_lookups_total",
+    "/parse_resume result cache lookups by result.",
+    "counter",
+    _parse_cache_lookups,
+    ("result",),
+)
 
 
 # ---------- Helpers ----------
 
 def _coerce_embedding(vec):
     """
-    Return a 1-D finite float array if vec is usable, else None.
+    Return a 1-D finite float array if vec (list or compact string) is usable, else None.
     """
-    if vec is None:
-        return None
-    try:
-        arr = np.asarray(vec, dtype=float)
-    except Exception:
-        return None
-    if arr.ndim != 1 or not np.all(np.isfinite(arr)):
-        return None
-    return arr
-
-
-# ---------- Routes ----------
-
-@app.get("/health")
-def health():
-    return {
-        "status": "ok",
-        "ranker_loaded": xgb_ranker.available,
-    }
+    return decode_embedding(vec, model=embedder.model_id)
 
 
-@app.post("/parse_resume")
-async def parse_resume(file: UploadFile = File(...)):
+def _job_text(job_dict) -> str:
     """
-    1) Accept PDF
-    2) Extract text
-    3) Use Gemini to parse structured data
-    4) Clean + normalize skills
-    5) Return an embedding of the raw resume text
+    Text used to embed a job: title, description, required skills and company.
     """
-    pdf_bytes = await file.read()
-    raw_text = extractor.extract_text(pdf_bytes)
-    logger.info("Extracted resume text length: %d", len(raw_text))
+    return (
+        f"{job_dict['title']}. {job_dict['description']}. "
+        f"Required skills: {', '.join(job_dict['skills'])}. "
+        f"Company: {job_dict.get('company','')}."
+    )
 
-    parsed = gemini_parser.parse(raw_text)
-    parsed = cleaner.clean(parsed)
-    parsed["skills"] = skill_normalizer.normalize(parsed.get("skills", []))
-    embedding = embedder.embed(raw_text)
 
-    return {
-        "raw_text": raw_text,
-        "parsed": parsed,
-        "embedding": embedding.tolist() if hasattr(embedding, "tolist") else embedding,
-    }
+def _prepare_job(job: Job) -> dict:
+    """
+    Job model -> dict with normalized skills (extracted from the text when
+    the posting lists none). The raw "embedding" field is left in place.
+    """
+    return _normalize_job_skills(job.dict())
 
 
-@app.post("/recommend")
-def recommend(req: RecommendRequest):
+def _normalize_job_skills(job_dict: dict) -> dict:
     """
-    Returns ranked jobs for a given student.
-    Uses embeddings + features + XGB (if available) with correct normalization.
+    Normalize a job dict's skills with the loaded skill map. The posting's
+    own skills are kept in "raw_skills" and the map version in
+    "skill_map_version", so a stored job can be renormalized after the
+    skill map changes (see _stored_job).
     """
-    student = req.student.dict()
-    raw_student_embedding = student.pop("skill_embedding", None)
-    student_embedding = _coerce_embedding(raw_student_embedding)
-    student["skills"] = skill_normalizer.normalize(student.get("skills", []))
+    job_dict = dict(job_dict)
+    raw_skills = list(job_dict.get("raw_skills", job_dict.get("skills")) or [])
+    job_dict["raw_skills"] = raw_skills
+    job_dict["skill_map_version"] = skill_normalizer.version
 
-    # ---- Student embedding ----
-    student_vec = student_embedding if student_embedding is not None else embedder.embed(student["resume_text"])
+    # Normalize job skills
+    job_dict["skills"] = skill_normalizer.normalize(raw_skills)
 
-    feature_rows = []
-    meta = []
+    # Fallback extraction when job skills are missing
+    if not job_dict["skills"]:
+        extracted_job_skills = skill_normalizer.extract_from_text(_job_text(job_dict))
+        job_dict["skills"] = skill_normalizer.normalize(extracted_job_skills)
+    return job_dict
 
-    for job in req.jobs:
-        job_dict = job.dict()
 
-        # Normalize job skills
-        job_dict["skills"] = skill_normalizer.normalize(job_dict.get("skills", []))
+def _stored_job(job_id: str, version: Optional[str] = None):
+    """
+    job_store.get, with the skills renormalized and the profile rebuilt
+    when the entry was indexed under another skill map (until
+    _renormalize_stored_jobs rewrites it).
+    """
+    stored = job_store.get(job_id, version)
+    if stored is None:
+        return None
+    job_dict, profile, vec = stored
+    if job_dict.get("skill_map_version") != skill_normalizer.version:
+        job_dict = _normalize_job_skills(job_dict)
+        profile = FeatureBuilder.job_profile(job_dict)
+    return job_dict, profile, vec
 
-        # Build job text for embedding
-        job_text = (
-            f"{job_dict['title']}. {job_dict['description']}. "
-            f"Required skills: {', '.join(job_dict['skills'])}. "
-            f"Company: {job_dict.get('company','')}."
-        )
 
-        # Fallback extraction when job skills are missing
-        if not job_dict["skills"]:
-            extracted_job_skills = skill_normalizer.extract_from_text(job_text)
-            job_dict["skills"] = skill_normalizer.normalize(extracted_job_skills)
-            job_text = (
-                f"{job_dict['title']}. {job_dict['description']}. "
-                f"Required skills: {', '.join(job_dict['skills'])}. "
-                f"Company: {job_dict.get('company','')}."
-            )
-        job_vec = embedder.embed(job_text)
+def _renormalize_stored_jobs() -> int:
+    """
+    Rewrite the stored jobs indexed under another skill map with the loaded
+    one; run after a skill map reload and at warmup. Vectors are kept.
+    Returns the number of jobs rewritten.
+    """
+    if not job_store.loaded:
+        return 0
+    with job_store.exclusive():
+        job_store.refresh()
+        version = skill_normalizer.version
+        job_dicts, vectors = [], []
+        for job_id in job_store.index.ids():
+            stored = job_store.get(job_id)
+            if stored is None or stored[0].get("skill_map_version") == version:
+                continue
+            job_dicts.append(_normalize_job_skills(stored[0]))
+            vectors.append(stored[2])
+        if job_dicts:
+            job_store.upsert(job_dicts, np.vstack(vectors))
+            job_store.save()
+            logger.info("Renormalized %d stored jobs with skill map %s", len(job_dicts), version)
+    return len(job_dicts)
+
+
+def _resolve_job(job: Job):
+    """
+    (job_dict, job_profile). A job sent with the version held in the job
+    store comes from the store, with its stored vector as "embedding";
+    otherwise it is prepared here and job_profile is None.
+    """
+    stored = _stored_job(job.id, job.version) if job.version is not None else None
+    if stored is None:
+        return _prepare_job(job), None
+    job_dict, profile, vec = stored
+    job_dict["embedding"] = vec
+    return job_dict, profile
 
-        # Build features
-        features, reasons = feature_builder.build(
-            student=student,
-            job=job_dict,
-            student_vec=student_vec,
-            job_vec=job_vec,
-        )
 
-        print("\n------ DEBUG RECOMMEND ENTRY ------")
-        print("Job:", job_dict.get("title"))
-        print("Raw features:", features)
-        print("Reasons:", reasons)
-        print("Job skills:", job_dict.get("skills"))
-        print("Student skills:", student.get("skills"))
-        print("-----------------------------------\n")
+def _embed_jobs(job_dicts):
+    """
+    Pops each job's "embedding" and returns (job_matrix, new_embeddings):
+    stored vectors are reused, the rest are embedded in one batch and also
+    returned by job id so callers can hand them back for persistence.
+    """
+    job_matrix = np.zeros((len(job_dicts), embedder.dim), dtype=np.float32)
+    missing = decode_into([job_dict.pop("embedding", None) for job_dict in job_dicts], job_matrix,
+                          model=embedder.model_id)
 
-        feature_rows.append(features)
-        meta.append({
-            "job_id": job_dict["id"],
-            "title": job_dict["title"],
-            "company": job_dict.get("company", ""),
-            "reasons": reasons
-        })
+    new_embeddings = {}
+    if missing:
+        fresh = embedder.embed_many([_job_text(job_dicts[i]) for i in missing])
+        for i, vec in zip(missing, fresh):
+            job_matrix[i] = vec
+            new_embeddings[job_dicts[i]["id"]] = encode_embedding(vec, model=embedder.model_id)
+    return job_matrix, new_embeddings
 
-    X = np.vstack(feature_rows)
 
+def _score_rows(X: np.ndarray):
+    """
+    Score feature rows with XGB (falling back to the simple ranker) and
+    min-max scale them to match percents. Returns (scores, match_percent,
+    used_xgb, model_version), model_version being the XGB model's (None
+    with the simple ranker).
+    """
     # -------------------------
     # FIX 1: Proper XGB usage
     # -------------------------
-    use_xgb = xgb_ranker.available
+    ranker = xgb_ranker.resolve()  # one model for the whole call, even if a reload swaps it meanwhile
+    use_xgb = ranker.available
     scores = None
 
-    print("DEBUG: Using XGB:", use_xgb)
+    logger.debug("Using XGB: %s", use_xgb)
 
     if use_xgb:
         try:
-            scores = xgb_ranker.predict(X).astype(float)
+            with STAGE_LATENCY.time(stage="xgb_predict"):
+                scores = ranker.predict(X).astype(float)
 
-            print("DEBUG: XGB raw scores:", scores)
+            logger.debug("XGB raw scores: %s", scores)
 
             # Only disable when truly invalid
             if not np.isfinite(scores).all():
+                XGB_FALLBACKS.inc(reason="non_finite")
                 use_xgb = False
 
         except Exception as e:
-            print("XGB ranker error → fallback:", e)
+            logger.warning("XGB ranker error, falling back to simple ranker: %s", e)
+            XGB_FALLBACKS.inc(reason="error")
             use_xgb = False
+    else:
+        XGB_FALLBACKS.inc(reason="not_loaded")
 
     # -------------------------
     # FIX 2: Fallback to simple model
     # -------------------------
     if not use_xgb:
-        scores = np.array([simple_ranker.score(f) for f in feature_rows], dtype=float)
-        print("DEBUG: Simple ranker scores:", scores)
+        with STAGE_LATENCY.time(stage="simple_ranker"):
+            scores = np.array([simple_ranker.score(f) for f in X], dtype=float)
+        logger.debug("Simple ranker scores: %s", scores)
 
     # -------------------------
     # FIX 3: Normalize scores 0-100
     # -------------------------
+    # per request for both model types: an LTR model's scores only order the
+    # rows of one query, a regressor's are on the label scale
     mn, mx = scores.min(), scores.max()
 
     if mx - mn < 1e-9:
@@ -222,28 +422,539 @@ def recommend(req: RecommendRequest):
         scaled = (scores - mn) / (mx - mn)
 
     match_percent = (scaled * 100)
-    print("DEBUG: Final match percents:", match_percent)
+    logger.debug("Final match percents: %s", match_percent)
+    return scores, match_percent, use_xgb, ranker.version if use_xgb else None
+
+
+def warmup():
+    """
+    Load every component and run one dummy encode and one dummy ranker
+    predict, so the first real request pays for neither. Core components
+    failing leaves the service not ready; optional ones are only logged.
+    """
+    global _warmup_error
+    timer = StageTimer("warmup")
+    try:
+        with timer.stage("load"):
+            for component in CORE_COMPONENTS:
+                component.resolve()
+        with timer.stage("jobs"):
+            _renormalize_stored_jobs()  # jobs indexed before the skill map file changed
+        with timer.stage("encode"):
+            embedder.warmup()
+        with timer.stage("predict"):
+            job = _prepare_job(Job(id="warmup", title="Software intern", description="Python APIs",
+                                   skills=["python"]))
+            student = {"id": "warmup", "resume_text": "python developer", "skills": ["python"]}
+            vec = np.ones(embedder.dim, dtype=np.float32)
+            X, _ = feature_builder.build_batch(student, [job], vec, vec[None, :])
+            if xgb_ranker.available:
+                xgb_ranker.predict(X)
+            simple_ranker.score(X[0])
+    except Exception as e:
+        _warmup_error = f"{type(e).__name__}: {e}"
+        logger.error("Warmup failed: %s", _warmup_error)
+        return
+    for component in OPTIONAL_COMPONENTS:
+        try:
+            component.resolve()
+        except Exception:
+            pass  # error recorded on the component and shown by /ready
+    _warmup_error = None
+    _warmup_done.set()
+    timer.log(logger)
+
+
+def preload():
+    """
+    Build every component in a pre-fork parent (ai/serving/prefork.py) so the
+    workers share the loaded models copy-on-write. Nothing is run: thread
+    pools started before fork() are not safe to use in the children, so each
+    worker runs its own warmup(). SQLite connections are closed so every
+    worker opens its own.
+    """
+    for component in CORE_COMPONENTS:
+        component.resolve()
+    for component in OPTIONAL_COMPONENTS:
+        try:
+            component.resolve()
+        except Exception:
+            pass
+    if embedder.cache is not None:
+        embedder.cache.close()
+    if parse_cache is not None and parse_cache.loaded:
+        parse_cache.close()
+
+
+# ---------- Routes ----------
+
+@app.get("/live")
+def live():
+    """Liveness: the process is up and serving HTTP, models may still be loading."""
+    return {"status": "alive"}
+
+
+@app.get("/ready")
+def ready():
+    """
+    Readiness: 200 once warmup finished (or right away with
+    WARMUP_ON_STARTUP off, components then load on first use), else 503.
+    """
+    is_ready = _warmup_done.is_set() or not WARMUP_ON_STARTUP
+    body = {
+        "status": "ready" if is_ready else ("failed" if _warmup_error else "loading"),
+        "error": _warmup_error,
+        "components": {c.name: c.status() for c in CORE_COMPONENTS + OPTIONAL_COMPONENTS},
+    }
+    return JSONResponse(body, status_code=200 if is_ready else 503)
+
+
+@app.get("/health")
+def health():
+    # reports only what is already loaded; never triggers a model load
+    return {
+        "status": "ok",
+        "ready": _warmup_done.is_set(),
+        "ranker_loaded": xgb_ranker.available if xgb_ranker.loaded else None,
+        "ranker_type": xgb_ranker.model_type if xgb_ranker.loaded else None,
+        # active version (model file / skill map hash) and reload state
+        "models": reloader.status(),
+        "embedding_cache": (
+            embedder.cache.stats() if embedder.loaded and embedder.cache is not None else None
+        ),
+        "parse_cache": parse_cache.stats() if parse_cache is not None and parse_cache.loaded else None,
+        "job_index": job_store.stats() if job_store.loaded else None,
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus text exposition of the in-process metrics registry."""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.post("/admin/reload")
+def admin_reload(
+    req: Optional[ReloadRequest] = None,
+    x_admin_token: Optional[str] = Header(default=None),
+):
+    """
+    Reload the ranker and / or skill map if their files changed (or always
+    with force): built and smoke-tested in the background of the serving
+    requests, then swapped in. Under the pre-fork server every other worker
+    is signalled to do the same.
+    """
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled; set ADMIN_TOKEN")
+    if not hmac.compare_digest((x_admin_token or "").encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+    req = req or ReloadRequest()
+    unknown = sorted(set(req.components or ()) - set(reloader.names))
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown components {unknown}; expected {reloader.names}")
+    results = reloader.check(req.components, force=req.force)
+    reloader.notify_workers()
+    failed = any(r.startswith("failed") for r in results.values())
+    return JSONResponse({"results": results, "models": reloader.status()}, status_code=500 if failed else 200)
+
+
+@app.post("/parse_resume")
+async def parse_resume(
+    file: UploadFile = File(...),
+    debug_timing: Optional[str] = Header(default=None, alias=DEBUG_TIMING_HEADER),
+):
+    """
+    1) Accept PDF
+    2) Extract text
+    3) Use Gemini to parse structured data
+    4) Clean + normalize skills
+    5) Return an embedding of the raw resume text (computed while 3 is in flight)
+    """
+    timer = StageTimer("parse_resume")
+    loop = asyncio.get_running_loop()
+    pdf_bytes = await file.read()
+
+    def _respond(raw_text, parsed, embedding, cache_status):
+        timings = timer.log(logger, text_chars=len(raw_text), cache=cache_status)
+        # normalized on every response, cached or not, with the skill map loaded now
+        parsed = {**parsed, "skills": skill_normalizer.normalize(parsed.get("skills", []))}
+        response = {
+            "raw_text": raw_text,
+            "parsed": parsed,
+            "embedding": encode_embedding(embedding, model=embedder.model_id),
+            "cache": cache_status,
+        }
+        if wants_timing(debug_timing):
+            response["timings"] = timings
+        return response
+
+    # Same file uploaded before: skip extraction, Gemini and embedding entirely.
+    if parse_cache is not None:
+        with timer.stage("cache"):
+            hit = await loop.run_in_executor(parse_executor, parse_cache.get_by_pdf, pdf_bytes)
+        if hit is not None and hit["embedding"] is not None:
+            return _respond(hit["raw_text"], hit["parsed"], hit["embedding"], "pdf_hit")
+
+    with timer.stage("extract"), STAGE_LATENCY.time(stage="pdf_extract"):
+        raw_text = await loop.run_in_executor(parse_executor, extractor.extract_text, pdf_bytes)
+    logger.info("Extracted resume text length: %d", len(raw_text))
+
+    # Different bytes, same text (e.g. the resume was re-exported).
+    if parse_cache is not None and raw_text:
+        with timer.stage("cache"):
+            hit = await loop.run_in_executor(parse_executor, parse_cache.get_by_text, pdf_bytes, raw_text)
+        if hit is not None and hit["embedding"] is not None:
+            return _respond(raw_text, hit["parsed"], hit["embedding"], "text_hit")
+
+    # The LLM call and the embedding are independent, so run them concurrently.
+    async def _llm_parse():
+        with timer.stage("llm_parse"):
+            return await gemini_parser.parse_async(raw_text)
+
+    async def _embed():
+        with timer.stage("embed"):
+            return await embed_batcher.embed_async(raw_text)
+
+    parsed, embedding = await asyncio.gather(_llm_parse(), _embed())
+    llm_ok = bool(parsed)
+    parsed = cleaner.clean(parsed)
+
+    # Only cache real results; a failed Gemini parse should be retried next upload.
+    if parse_cache is not None and raw_text and llm_ok:
+        await loop.run_in_executor(parse_executor, parse_cache.put, pdf_bytes, raw_text, parsed, embedding)
+
+    return _respond(raw_text, parsed, embedding, "miss" if parse_cache is not None else None)
+
+
+@app.post("/parse_resumes")
+async def parse_resumes(files: List[UploadFile] = File(...)):
+    """
+    Bulk version of /parse_resume. Accepts many PDFs (and/or .zip archives of
+    PDFs) as multipart `files` and streams one NDJSON record per resume as
+    it finishes, then a summary record with counts and throughput.
+    Uploads (spooled to disk by the server) are read lazily, one PDF or zip
+    member at a time, as the ingestor has room for more.
+    """
+    loop = asyncio.get_running_loop()
+    names = [upload.filename or f"upload_{i}" for i, upload in enumerate(files)]
+
+    def _prepare():
+        # component loads and zip directories are blocking: keep them off the event loop
+        ingestor = BulkResumeIngestor(
+            parser=gemini_parser.resolve(),
+            embedder=embedder.resolve(),
+            cleaner=cleaner,
+            skill_normalizer=skill_normalizer.resolve(),
+            parse_cache=parse_cache.resolve() if parse_cache is not None else None,
+        )
+        total = 0
+        for name, upload in zip(names, files):
+            if name.lower().endswith(".zip"):
+                total += count_zip_pdfs(upload.file)
+                upload.file.seek(0)
+            else:
+                total += 1
+        return ingestor, total
+
+    ingestor, total = await loop.run_in_executor(parse_executor, _prepare)
+
+    async def _items():
+        for name, upload in zip(names, files):
+            if not name.lower().endswith(".zip"):
+                yield name, await upload.read()
+                continue
+            members = iter_zip_pdfs(upload.file, prefix=f"{name}:")
+            while True:
+                item = await loop.run_in_executor(parse_executor, next, members, None)
+                if item is None:
+                    break
+                yield item
+
+    async def _stream():
+        async for record in ingestor.run(_items(), total=total):
+            yield json.dumps(record) + "\n"
+
+    return StreamingResponse(_stream(), media_type="application/x-ndjson")
+
+
+@app.post("/jobs/index")
+def index_jobs(req: JobIndexRequest):
+    """
+    Upsert jobs into the job store: called by the backend when a job is
+    created or edited. Skills are normalized, the FeatureBuilder job profile
+    is precomputed and the job is added to the vector index used by
+    /recommend retrieval mode. Jobs whose version matches the stored one
+    are skipped. Jobs without a usable embedding are embedded and returned
+    in "job_embeddings" for the backend to store.
+    """
+    job_store.refresh()
+    changed = [
+        job for job in req.jobs
+        if job.version is None or job.id not in job_store or job_store.version(job.id) != job.version
+    ]
+    job_dicts = [_prepare_job(job) for job in changed]
+    job_matrix, new_job_embeddings = _embed_jobs(job_dicts)
+    if job_dicts:
+        # other workers may have saved meanwhile: reload, apply, save under the lock
+        with job_store.exclusive():
+            job_store.refresh()
+            job_store.upsert(job_dicts, job_matrix)
+            job_store.save()
+    return {
+        "indexed": len(job_dicts),
+        "unchanged": len(req.jobs) - len(job_dicts),
+        "job_index": job_store.stats(),
+        "embedding_model": embedder.model_id,
+        "job_embeddings": new_job_embeddings,
+    }
+
+
+@app.delete("/jobs/index/{job_id}")
+def unindex_job(job_id: str):
+    with job_store.exclusive():
+        job_store.refresh()
+        removed = job_store.delete([job_id])
+        if removed:
+            job_store.save()
+    return {"removed": removed, "job_index": job_store.stats()}
+
+
+@app.post("/recommend")
+def recommend(
+    req: RecommendRequest,
+    debug_timing: Optional[str] = Header(default=None, alias=DEBUG_TIMING_HEADER),
+):
+    """
+    Returns ranked jobs for a given student.
+    Uses embeddings + features + XGB (if available) with correct normalization.
+    """
+    timer = StageTimer("recommend")
+    student = req.student.dict()
+    raw_student_embedding = student.pop("skill_embedding", None)
+    student_embedding = _coerce_embedding(raw_student_embedding)
+
+    with timer.stage("prepare"):
+        job_store.refresh()  # pick up jobs indexed by other workers
+        student["skills"] = skill_normalizer.normalize(student.get("skills", []))
+        # Stored jobs (by id, or sent with their current version) skip the
+        # job-side work; their vector rides along as "embedding".
+        job_dicts, job_profiles, missing_job_ids = [], [], []
+        for job in req.jobs:
+            job_dict, profile = _resolve_job(job)
+            job_dicts.append(job_dict)
+            job_profiles.append(profile)
+        for job_id in req.job_ids:
+            stored = _stored_job(job_id)
+            if stored is None:
+                missing_job_ids.append(job_id)
+                continue
+            job_dict, profile, vec = stored
+            job_dict["embedding"] = vec
+            job_dicts.append(job_dict)
+            job_profiles.append(profile)
+
+    with timer.stage("embed"):
+        # ---- Student embedding ----
+        student_vec = (
+            student_embedding if student_embedding is not None and student_embedding.size == embedder.dim
+            else embed_batcher.embed(student["resume_text"])
+        )
+
+        # ---- Job embeddings: reuse stored vectors, embed only the rest (one batch) ----
+        job_matrix, new_job_embeddings = _embed_jobs(job_dicts)
+
+    # ---- Candidate retrieval: only the top_k most similar jobs get features + ranking ----
+    candidates = len(job_dicts)
+    if req.top_k:
+        with timer.stage("retrieve"):
+            if job_dicts:
+                sims = batch_cosine_similarity(student_vec, job_matrix, len(job_dicts))
+                if len(job_dicts) > req.top_k:
+                    keep = np.sort(np.argpartition(-sims, req.top_k - 1)[: req.top_k])
+                    job_dicts = [job_dicts[i] for i in keep]
+                    job_profiles = [job_profiles[i] for i in keep]
+                    job_matrix = job_matrix[keep]
+            elif not req.jobs and not req.job_ids:
+                # No jobs in the request: retrieve from the service-side job store.
+                hits = job_store.index.search(student_vec, req.top_k)
+                candidates = len(job_store.index)
+                stored = [_stored_job(job_id) for job_id, _ in hits]
+                stored = [entry for entry in stored if entry is not None]
+                job_dicts = [job_dict for job_dict, _, _ in stored]
+                job_profiles = [profile for _, profile, _ in stored]
+                job_matrix = np.vstack([vec for _, _, vec in stored]) if stored else job_matrix
+
+    if not job_dicts:
+        timer.log(logger, jobs=0, candidates=candidates)
+        return {
+            "student_id": req.student.id,
+            "used_ranker": False,
+            "model_version": None,  # no ranker ran, as on the scored path with the simple ranker
+            "skill_map_version": skill_normalizer.version,
+            "recommendations": [],
+            "candidates": candidates,
+            "embedding_model": embedder.model_id,
+            "job_embeddings": new_job_embeddings,
+            "missing_job_ids": missing_job_ids,
+        }
+
+    # ---- Features: student-side work once, similarities as one matrix product ----
+    JOBS_PER_REQUEST.observe(len(job_dicts))
+    with timer.stage("features"), STAGE_LATENCY.time(stage="feature_build"):
+        X, all_reasons = feature_builder.build_batch(
+            student=student,
+            jobs=job_dicts,
+            student_vec=student_vec,
+            job_matrix=job_matrix,
+            job_profiles=job_profiles,
+        )
+        feature_rows = list(X)
+
+    if logger.isEnabledFor(logging.DEBUG):
+        for job_dict, features, reasons in zip(job_dicts, feature_rows, all_reasons):
+            logger.debug(
+                "Recommend entry job=%r features=%s reasons=%s job_skills=%s student_skills=%s",
+                job_dict.get("title"), features.tolist(), reasons,
+                job_dict.get("skills"), student.get("skills"),
+            )
+
+    with timer.stage("rank"):
+        scores, match_percent, use_xgb, model_version = _score_rows(X)
 
     # -------------------------
     # Build final output
     # -------------------------
-    results = []
-    for i, entry in enumerate(meta):
-        results.append({
-            "job_id": entry["job_id"],
-            "title": entry["title"],
-            "company": entry["company"],
-            "score": float(scores[i]),
-            "match_percent": float(match_percent[i]),
-            "reasons": entry["reasons"]
-        })
-
-    # Sort best first
-    results.sort(key=lambda r: r["score"], reverse=True)
-
-    return {
+    with timer.stage("sort"):
+        results = []
+        for i, job_dict in enumerate(job_dicts):
+            results.append({
+                "job_id": job_dict["id"],
+                "title": job_dict["title"],
+                "company": job_dict.get("company", ""),
+                "score": float(scores[i]),
+                "match_percent": float(match_percent[i]),
+                "reasons": all_reasons[i]
+            })
+
+        # Sort best first
+        results.sort(key=lambda r: r["score"], reverse=True)
+
+    timings = timer.log(
+        logger, jobs=len(job_dicts), candidates=candidates,
+        embedded_jobs=len(new_job_embeddings), used_ranker=use_xgb,
+        stored_jobs=sum(p is not None for p in job_profiles),
+    )
+    response = {
         "student_id": req.student.id,
         "used_ranker": use_xgb,
-        "recommendations": results
+        "model_version": model_version,
+        "skill_map_version": skill_normalizer.version,
+        "recommendations": results,
+        "candidates": candidates,
+        # Jobs sent without a usable embedding; the backend stores these on the Job.
+        "embedding_model": embedder.model_id,
+        "job_embeddings": new_job_embeddings,
+        # Requested job_ids not in the job store; send these jobs in full.
+        "missing_job_ids": missing_job_ids,
     }
+    if wants_timing(debug_timing):
+        response["timings"] = timings
+    return response
+
+
+@app.post("/rank_candidates")
+def rank_candidates(
+    req: RankCandidatesRequest,
+    debug_timing: Optional[str] = Header(default=None, alias=DEBUG_TIMING_HEADER),
+):
+    """
+    Ranks N students (e.g. every applicant) for one job in a single call.
+    The job is embedded once, students' stored skillEmbeddings form one
+    matrix (missing ones are embedded in one batch and returned in
+    "student_embeddings"), features are built in batch and scored with a
+    single ranker call.
+    """
+    timer = StageTimer("rank_candidates")
+
+    with timer.stage("prepare"):
+        job_store.refresh()
+        if req.job is not None:
+            job_dict, job_profile = _resolve_job(req.job)
+        elif req.job_id:
+            stored = _stored_job(req.job_id)
+            if stored is None:
+                raise HTTPException(status_code=404, detail=f"Job {req.job_id} is not in the job store")
+            job_dict, job_profile, vec = stored
+            job_dict["embedding"] = vec
+        else:
+            raise HTTPException(status_code=422, detail="Either job or job_id is required")
+
+        students = []
+        student_embeddings = []
+        for s in req.students:
+            student = s.dict()
+            student_embeddings.append(student.pop("skill_embedding", None))
+            student["skills"] = skill_normalizer.normalize(student.get("skills", []))
+            students.append(student)
+
+    with timer.stage("embed"):
+        job_matrix, new_job_embeddings = _embed_jobs([job_dict])
+        job_vec = job_matrix[0]
+
+        student_matrix = np.zeros((len(students), embedder.dim), dtype=np.float32)
+        missing = decode_into(student_embeddings, student_matrix, model=embedder.model_id)
+        new_student_embeddings = {}
+        if missing:
+            fresh = embedder.embed_many([students[i]["resume_text"] for i in missing])
+            for i, vec in zip(missing, fresh):
+                student_matrix[i] = vec
+                new_student_embeddings[students[i]["id"]] = encode_embedding(vec, model=embedder.model_id)
+
+    shortlist = []
+    use_xgb, model_version = False, None
+    if students:
+        with timer.stage("features"), STAGE_LATENCY.time(stage="feature_build"):
+            X, all_reasons = feature_builder.build_for_students(
+                students=students,
+                job=job_dict,
+                student_matrix=student_matrix,
+                job_vec=job_vec,
+                job_profile=job_profile,
+            )
 
+        with timer.stage("rank"):
+            scores, match_percent, use_xgb, model_version = _score_rows(X)
+
+        with timer.stage("sort"):
+            order = np.argsort(-scores, kind="stable")
+            if req.top_k:
+                order = order[: req.top_k]
+            shortlist = [
+                {
+                    "student_id": students[i]["id"],
+                    "score": float(scores[i]),
+                    "match_percent": float(match_percent[i]),
+                    "reasons": all_reasons[i],
+                }
+                for i in order
+            ]
+
+    timings = timer.log(
+        logger, students=len(students), embedded_students=len(new_student_embeddings),
+        stored_job=job_profile is not None, used_ranker=use_xgb,
+    )
+    response = {
+        "job_id": job_dict["id"],
+        "used_ranker": use_xgb,
+        "model_version": model_version,
+        "skill_map_version": skill_normalizer.version,
+        "candidates": len(students),
+        "shortlist": shortlist,
+        "embedding_model": embedder.model_id,
+        # Vectors computed here; the backend can store them (skillEmbedding / Job.embedding).
+        "student_embeddings": new_student_embeddings,
+        "job_embeddings": new_job_embeddings,
+    }
+    if wants_timing(debug_timing):
+        response["timings"] = timings
+    return response
@@ -0,0 +1,188 @@
+"""
+Pre-fork multi-worker launcher for the AI service.
+
+`uvicorn --workers N` imports the app in every worker, so each one loads its
+own embedding model, XGB booster and skill tables. Here the parent loads them
+once (ai.serving.main.preload), then forks N workers that serve from one
+shared listening socket. Model weights and tables are inherited
+copy-on-write; gc.freeze() keeps the collector from touching (and so
+copying) the inherited objects. The job vectors are memory-mapped from
+JOB_INDEX_DIR (JOB_INDEX_MMAP), and workers pick up each other's /jobs/index
+writes through JobProfileStore.refresh.
+
+The parent restarts workers that die and forwards SIGTERM / SIGINT.
+SIGHUP to the parent (sent by POST /admin/reload in any worker) is forwarded
+to every worker, which then reloads a changed ranker / skill map
+(ai/serving/reloader.py). Linux / macOS only (needs os.fork).
+
+A scrape of /metrics lands on one worker, so workers publish their metrics
+to a shared directory (METRICS_DIR) and every /metrics response is the sum
+over all workers (ai/metrics.py).
+
+Run from ai-service/:
+    python -m ai.serving.prefork --workers 4 --port 8000
+    python -m ai.serving.prefork --workers 4 --no-preload   # each worker loads its own copy
+
+benchmarks/bench_prefork_memory.py measures per-worker and total memory
+at 1 / 4 / 8 workers with and without preload.
+"""
+
+import argparse
+import gc
+import glob
+import os
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+import time
+from typing import Dict, Optional
+
+from ai.config import METRICS_DIR, METRICS_FLUSH_INTERVAL, SERVE_HOST, SERVE_PORT, SERVE_WORKERS
+from ai.logging_config import get_logger
+
+logger = get_logger("serving.prefork")
+
+# a worker that dies faster than this after starting is not restarted in a loop
+_MIN_WORKER_LIFETIME = 5.0
+
+
+def _listen(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(sock: socket.socket, worker_id: int, metrics_dir: str) -> None:
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)  # not the parent's forwarding handler
+    import uvicorn
+
+    from ai.metrics import REGISTRY
+    from ai.serving import main
+
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGHUP, lambda *_: main.reloader.trigger())
+    main.reloader.notify_pid = os.getppid()
+    logger.info("Worker %d (pid %d) serving", worker_id, os.getpid())
+    # the app lifespan runs warmup() here, in the worker
+    config = uvicorn.Config(main.app, log_config=None, access_log=False)
+    REGISTRY.enable_multiprocess(metrics_dir, METRICS_FLUSH_INTERVAL)
+    try:
+        uvicorn.Server(config).run(sockets=[sock])
+    finally:
+        REGISTRY.disable_multiprocess()
+
+
+class PreforkServer:
+    def __init__(self, host: str = SERVE_HOST, port: int = SERVE_PORT,
+                 workers: int = SERVE_WORKERS, preload: bool = True):
+        self.host = host
+        self.port = port
+        self.workers = max(1, int(workers))
+        self.preload = preload
+        self._children: Dict[int, tuple] = {}  # pid -> (worker_id, started_at)
+        self._stopping = False
+        self.metrics_dir: Optional[str] = None
+
+    def _spawn(self, sock: socket.socket, worker_id: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                _run_worker(sock, worker_id, self.metrics_dir)
+            except BaseException as e:
+                logger.error("Worker %d crashed: %s", worker_id, e)
+                code = 1
+            finally:
+                os._exit(code)
+        self._children[pid] = (worker_id, time.monotonic())
+
+    def _stop(self, signum, _frame) -> None:
+        if self._stopping:
+            return
+        self._stopping = True
+        logger.info("Got signal %d, stopping %d workers", signum, len(self._children))
+        for pid in list(self._children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def _reload(self, _signum, _frame) -> None:
+        logger.info("Got SIGHUP, asking %d workers to reload", len(self._children))
+        for pid in list(self._children):
+            try:
+                os.kill(pid, signal.SIGHUP)
+            except ProcessLookupError:
+                pass
+
+    def _open_metrics_dir(self) -> bool:
+        """Set up the shared metrics directory; True when it is a temp dir to remove on exit."""
+        if not METRICS_DIR:
+            self.metrics_dir = tempfile.mkdtemp(prefix="ai-metrics-")
+            return True
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        for path in glob.glob(os.path.join(METRICS_DIR, "*.json")):
+            os.remove(path)  # a previous server's workers
+        self.metrics_dir = METRICS_DIR
+        return False
+
+    def run(self) -> None:
+        sock = _listen(self.host, self.port)
+        temp_metrics_dir = self._open_metrics_dir()
+        if self.preload:
+            t0 = time.perf_counter()
+            from ai.serving import main
+
+            main.preload()
+            gc.collect()
+            gc.freeze()  # inherited objects go to the permanent generation: not scanned, not copied
+            logger.info("Preloaded components in %.2fs", time.perf_counter() - t0)
+
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        signal.signal(signal.SIGHUP, self._reload)
+        for worker_id in range(self.workers):
+            self._spawn(sock, worker_id)
+        logger.info("Serving on %s:%d with %d workers (preload=%s)", self.host, self.port,
+                    self.workers, self.preload)
+
+        while self._children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            worker_id, started = self._children.pop(pid, (None, 0.0))
+            if worker_id is None or self._stopping:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            if time.monotonic() - started < _MIN_WORKER_LIFETIME:
+                logger.error("Worker %d exited with %s right after starting; not restarting", worker_id, code)
+                continue
+            logger.warning("Worker %d (pid %d) exited with %s, restarting", worker_id, pid, code)
+            self._spawn(sock, worker_id)
+        sock.close()
+        if temp_metrics_dir:
+            shutil.rmtree(self.metrics_dir, ignore_errors=True)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Pre-fork multi-worker server for the AI service")
+    parser.add_argument("--host", default=SERVE_HOST)
+    parser.add_argument("--port", type=int, default=SERVE_PORT)
+    parser.add_argument("--workers", type=int, default=SERVE_WORKERS)
+    parser.add_argument("--no-preload", dest="preload", action="store_false",
+                        help="load models in each worker instead of once in the parent")
+    args = parser.parse_args(argv)
+    if not hasattr(os, "fork"):
+        sys.exit("ai.serving.prefork needs os.fork(); use `uvicorn ai.serving.main:app` on this platform")
+    PreforkServer(args.host, args.port, args.workers, args.preload).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Hot reload of serving artifacts (ranker model, skill map) without a restart.
+
+Each watched LazyComponent carries a file stamp taken before it was built.
+Reloader.check() reloads the components whose files changed since: the
+replacement is built in the calling thread, smoke-tested, and only then
+swapped in (LazyComponent.reload). Requests never see a half-loaded model,
+in-flight requests finish on the object they started with, and a build or
+smoke test that fails leaves the old version serving (and is not retried
+until the files change again).
+
+Triggers:
+- POST /admin/reload (ai/serving/main.py)
+- a polling thread every RELOAD_WATCH_INTERVAL seconds; a change is applied
+  once the stamp holds for one more poll, so a file still being written is
+  not loaded
+- SIGHUP, which the pre-fork parent forwards to every worker
+
+Components not loaded yet are skipped: their first use reads the new files.
+A component's `on_reload` hook runs after it was swapped in (main.py uses
+it to renormalize stored jobs after a skill map reload).
+A reloaded model is private to the worker that loaded it (no copy-on-write
+sharing with the pre-fork parent).
+"""
+
+import os
+import signal
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from ai.config import RELOAD_WATCH_INTERVAL
+from ai.logging_config import get_logger
+from ai.serving.components import LazyComponent
+
+logger = get_logger("serving.reloader")
+
+
+class Reloader:
+    def __init__(self, interval: float = RELOAD_WATCH_INTERVAL):
+        self.interval = interval
+        # name -> (component, smoke test raising on a bad artifact, on_reload hook)
+        self._watched: Dict[str, tuple] = {}
+        self._lock = threading.Lock()  # one check at a time
+        self._failed: Dict[str, Any] = {}   # name -> stamp whose reload failed
+        self._pending: Dict[str, Any] = {}  # name -> changed stamp waiting to settle
+        self.errors: Dict[str, Optional[str]] = {}
+        self.reloaded_at: Dict[str, float] = {}
+        self.notify_pid: Optional[int] = None  # pre-fork parent, told to SIGHUP the other workers
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def watch(self, component: LazyComponent, smoke_test: Callable[[Any], None],
+              on_reload: Optional[Callable[[], Any]] = None) -> None:
+        self._watched[component.name] = (component, smoke_test, on_reload)
+
+    @property
+    def names(self):
+        return list(self._watched)
+
+    def check(self, names: Optional[Iterable[str]] = None, force: bool = False,
+              settle: bool = False) -> Dict[str, str]:
+        """
+        Reload changed (or, with `force`, all) loaded components. Returns
+        name -> "reloaded" / "unchanged" / "not loaded" / "pending" / "failed: ...".
+        """
+        results = {}
+        with self._lock:
+            for name in names or self._watched:
+                component, smoke_test, on_reload = self._watched[name]
+                if not component.loaded:
+                    results[name] = "not loaded"
+                    continue
+                stamp = component.current_stamp()
+                if not force and (stamp == component.stamp or stamp == self._failed.get(name)):
+                    self._pending.pop(name, None)
+                    results[name] = "unchanged"
+                    continue
+                if settle and self._pending.get(name) != stamp:
+                    self._pending[name] = stamp
+                    results[name] = "pending"
+                    continue
+                self._pending.pop(name, None)
+                try:
+                    component.reload(smoke_test)
+                except Exception as e:
+                    self._failed[name] = stamp
+                    # first line only: xgboost errors carry a native stack trace
+                    self.errors[name] = f"{type(e).__name__}: {(str(e).splitlines() or [''])[0]}"
+                    logger.error("Reloading %s failed, keeping the loaded version: %s", name, self.errors[name])
+                    results[name] = f"failed: {self.errors[name]}"
+                    continue
+                self._failed.pop(name, None)
+                self.errors[name] = None
+                self.reloaded_at[name] = time.time()
+                results[name] = "reloaded"
+                if on_reload is not None:
+                    try:
+                        on_reload()
+                    except Exception as e:  # the new version stays; the hook is retried on the next reload
+                        logger.error("After reloading %s: %s", name, e)
+        return results
+
+    def status(self) -> Dict[str, Dict]:
+        """Version and reload state per component; never triggers a load."""
+        out = {}
+        for name, (component, _, _) in self._watched.items():
+            out[name] = {
+                "version": getattr(component, "version", None) if component.loaded else None,
+                "reloads": component.reloads,
+                "reloaded_at": self.reloaded_at.get(name),
+                "error": self.errors.get(name),
+            }
+        return out
+
+    def notify_workers(self) -> None:
+        """In a pre-fork worker, have the parent SIGHUP every worker so all of them check."""
+        if self.notify_pid:
+            try:
+                os.kill(self.notify_pid, signal.SIGHUP)
+            except ProcessLookupError:
+                pass
+
+    def trigger(self) -> None:
+        """check() in a background thread; safe to call from a signal handler."""
+        threading.Thread(target=self.check, name="reload", daemon=True).start()
+
+    def start(self) -> None:
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="reload-watcher", daemon=True)
+        self._thread.start()
+        logger.info("Watching %s for changes every %.1fs", ", ".join(self._watched), self.interval)
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread = None
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.check(settle=True)
+            except Exception as e:  # keep watching whatever happens
+                logger.error("Reload watcher error: %s", e)
@@ -0,0 +1,57 @@
+import json
+import logging
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+from ai.metrics import REQUEST_LATENCY
+
+
+# Requests carrying this header (any value except "0"/"false") get their timing breakdown in the response.
+DEBUG_TIMING_HEADER = "X-Debug-Timing"
+
+
+def wants_timing(header_value) -> bool:
+    return bool(header_value) and str(header_value).lower() not in ("0", "false", "no")
+
+
+class StageTimer:
+    """
+    Per-request wall-clock breakdown of the pipeline stages.
+
+        timer = StageTimer("recommend")
+        with timer.stage("embed"):
+            ...
+        timer.log(logger, jobs=len(jobs))
+
+    Repeated stages accumulate. `log` emits one JSON line so the breakdown
+    can be grepped/parsed without stitching several log records together,
+    and records the total in the ai_request_latency_seconds histogram.
+    """
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.stages: Dict[str, float] = {}
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + (time.perf_counter() - t0)
+
+    def as_dict(self, **extra) -> Dict:
+        return {
+            "endpoint": self.endpoint,
+            "total_ms": round((time.perf_counter() - self._start) * 1000, 3),
+            "stages_ms": {k: round(v * 1000, 3) for k, v in self.stages.items()},
+            **extra,
+        }
+
+    def log(self, logger: logging.Logger, **extra) -> Dict:
+        data = self.as_dict(**extra)
+        REQUEST_LATENCY.observe(data["total_ms"] / 1000.0, endpoint=self.endpoint)
+        logger.info("timing %s", json.dumps(data, separators=(",", ":")))
+        return data
@@ -0,0 +1,208 @@
+"""
+Aho-Corasick multi-pattern matcher for skill extraction.
+
+Finds every skill key in a single pass over the text instead of one
+substring scan per key. Matches must sit on word boundaries, so "c", "r"
+or "go" no longer fire inside ordinary words, and a match contained in a
+longer one ("c" in "objective-c", "spring" in "spring boot") is dropped.
+
+The compiled automaton can be pickled next to skill_map.json (see
+build_stackoverflow_skill_map.py); it carries a hash of the map it was built
+from so a stale file is rebuilt instead of used.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from ai.logging_config import get_logger
+
+logger = get_logger("skills.matcher")
+
+AUTOMATON_FORMAT = 1
+
+# Characters that continue a token. "+" and "#" keep "c" from matching in
+# "c++"/"c#"; "." and "-" are boundaries so "python." and "python-based" match.
+_WORD_EXTRA = frozenset("_+#")
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch in _WORD_EXTRA
+
+
+def map_hash(skill_map: Dict) -> str:
+    """Stable fingerprint of a skill map, used to detect stale automata."""
+    blob = json.dumps(skill_map, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class SkillMatcher:
+    """
+    Compiled automaton over the lowercased keys of a skill map.
+    Each pattern keeps the canonical value(s) it maps to.
+    """
+
+    def __init__(self, patterns: List[str], values: List[List[str]], source_hash: str = ""):
+        self.patterns = patterns
+        self.values = values
+        self.source_hash = source_hash
+        self.format = AUTOMATON_FORMAT
+        # goto[state] -> {char: next_state}; out[state] -> pattern ids ending here
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[int, ...]] = [()]
+        self._compile()
+
+    @classmethod
+    def from_skill_map(cls, skill_map: Dict) -> "SkillMatcher":
+        merged: Dict[str, List[str]] = {}
+        for key, mapped in skill_map.items():
+            k = key.lower().strip()
+            if not k:
+                continue
+            vals = mapped if isinstance(mapped, list) else [mapped]
+            merged.setdefault(k, [])
+            merged[k].extend(v for v in vals if v not in merged[k])
+        return cls(list(merged), list(merged.values()), map_hash(skill_map))
+
+    def _compile(self):
+        goto, fail = self._goto, self._fail
+        out: List[List[int]] = [[]]
+
+        for pid, pat in enumerate(self.patterns):
+            state = 0
+            for ch in pat:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    fail.append(0)
+                    out.append([])
+                state = nxt
+            out[state].append(pid)
+
+        # BFS to set failure links; outputs are merged along them so matching
+        # never has to walk the fail chain to collect results.
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                out[nxt].extend(out[fail[nxt]])
+
+        self._out = [tuple(o) for o in out]
+
+    def find_spans(self, text_l: str) -> List[Tuple[int, int, int]]:
+        """
+        All boundary-respecting (start, end, pattern_id) matches in lowercased
+        text, with matches nested inside a longer match removed.
+        """
+        goto, fail, out, patterns = self._goto, self._fail, self._out, self.patterns
+        n = len(text_l)
+        hits: List[Tuple[int, int, int]] = []
+        state = 0
+
+        for i, ch in enumerate(text_l):
+            nxt = goto[state].get(ch)
+            while nxt is None and state:
+                state = fail[state]
+                nxt = goto[state].get(ch)
+            state = nxt or 0
+            if not out[state]:
+                continue
+            end = i + 1
+            if end < n and _is_word_char(text_l[end]):
+                continue
+            for pid in out[state]:
+                start = end - len(patterns[pid])
+                if start > 0 and _is_word_char(text_l[start - 1]):
+                    continue
+                hits.append((start, end, pid))
+
+        if len(hits) < 2:
+            return hits
+
+        # keep the longest match at each span; drop ones nested inside it
+        hits.sort(key=lambda h: (h[0], -h[1]))
+        kept: List[Tuple[int, int, int]] = []
+        reach = -1
+        for h in hits:
+            if h[1] <= reach:
+                continue
+            kept.append(h)
+            reach = h[1]
+        return kept
+
+    def extract(self, text: str) -> List[str]:
+        """Canonical skills found in text, deduped, in order of appearance."""
+        if not text:
+            return []
+        seen = set()
+        res: List[str] = []
+        for _, _, pid in self.find_spans(text.lower()):
+            for v in self.values[pid]:
+                if v not in seen:
+                    seen.add(v)
+                    res.append(v)
+        return res
+
+    # --------------------------------------------------------------
+    # Persistence
+    # --------------------------------------------------------------
+
+    def __getstate__(self):
+        return {
+            "format": AUTOMATON_FORMAT,
+            "source_hash": self.source_hash,
+            "patterns": self.patterns,
+            "values": self.values,
+            "goto": self._goto,
+            "fail": self._fail,
+            "out": self._out,
+        }
+
+    def __setstate__(self, state):
+        self.format = state.get("format")
+        self.source_hash = state["source_hash"]
+        self.patterns = state["patterns"]
+        self.values = state["values"]
+        self._goto = state["goto"]
+        self._fail = state["fail"]
+        self._out = state["out"]
+
+    def save(self, path: str):
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str, expected_hash: Optional[str] = None) -> Optional["SkillMatcher"]:
+        """Load a precompiled automaton; None if missing, unreadable or stale."""
+        try:
+            with open(path, "rb") as f:
+                matcher = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning("Could not load skill automaton %s: %s", path, e)
+            return None
+
+        if not isinstance(matcher, cls) or getattr(matcher, "format", None) != AUTOMATON_FORMAT:
+            return None
+        if expected_hash is not None and matcher.source_hash != expected_hash:
+            logger.info("Skill automaton %s is stale, rebuilding", path)
+            return None
+        return matcher
+
+    def __len__(self):
+        return len(self.patterns)
+
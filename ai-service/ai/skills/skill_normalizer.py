@@ -1,6 +1,7 @@
 ﻿import json
 from typing import List
-from ai.config import SKILL_MAP_PATH
+from ai.config import SKILL_MAP_PATH, SKILL_AUTOMATON_PATH
+from ai.skills.skill_matcher import SkillMatcher, map_hash
 
 
 class SkillNormalizer:
@@ -18,6 +19,16 @@ class SkillNormalizer:
         # Pre-lower keys for quick matching
         self._lower_keys = {k.lower(): v for k, v in self.map.items()}
 
+        # Compiled matcher for extract_from_text; prefer the precompiled
+        # automaton written by build_stackoverflow_skill_map.py if it is current
+        digest = map_hash(self.map)
+        self.matcher = (
+            SkillMatcher.load(SKILL_AUTOMATON_PATH, expected_hash=digest)
+            or SkillMatcher.from_skill_map(self.map)
+        )
+        # reported on /health and /recommend
+        self.version = digest[:12]
+
     def normalize(self, skills: List[str]) -> List[str]:
         out: List[str] = []
 
@@ -43,28 +54,8 @@ class SkillNormalizer:
 
     def extract_from_text(self, text: str) -> List[str]:
         """
-        Lightweight skill extraction: looks for known skill keys in raw text.
+        Lightweight skill extraction: finds known skill keys in raw text in a
+        single pass, respecting word boundaries.
         Returns normalized canonical skills.
         """
-        if not text:
-            return []
-
-        text_l = text.lower()
-        found = []
-
-        for key, mapped in self._lower_keys.items():
-            if key and key in text_l:
-                if isinstance(mapped, list):
-                    found.extend(mapped)
-                else:
-                    found.append(mapped)
-
-        # dedupe
-        seen = set()
-        deduped = []
-        for v in found:
-            if v not in seen:
-                seen.add(v)
-                deduped.append(v)
-
-        return deduped
+        return self.matcher.extract(text)
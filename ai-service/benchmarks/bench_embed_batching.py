@@ -0,0 +1,121 @@
+"""
+Load test for the embedding micro-batching scheduler: C concurrent clients
+each embedding unique single texts, calling `Embedder.embed` directly vs
+going through `EmbeddingBatcher` (one batched encode per flush).
+
+Reports throughput, per-call latency and the mean batch size at 1, 8 and 64
+clients, for each max-wait setting. With max-wait 0 batches still form from
+whatever queued up during the previous encode; a positive wait adds up to
+that much latency to fill larger batches, which only pays off under load. Uses the real model by default (no cache, so every text is
+encoded); --simulated swaps in a stand-in with a fixed per-call cost plus a
+smaller per-text cost, for checking the scheduler without model weights.
+
+Run from ai-service/:
+    python -m benchmarks.bench_embed_batching
+    python -m benchmarks.bench_embed_batching --clients 1 8 64 --per-client 50 --max-wait-ms 0 5
+"""
+
+import argparse
+import threading
+import time
+
+import numpy as np
+
+from ai.embeddings.batcher import EmbeddingBatcher
+from ai.metrics import EMBED_BATCH_SIZE
+
+
+class SimulatedEmbedder:
+    """Serialized 'model': each encode costs call_ms + item_ms per text."""
+
+    cache = None
+
+    def __init__(self, dim=768, call_ms=8.0, item_ms=0.6):
+        self.dim = dim
+        self.call_s = call_ms / 1000.0
+        self.item_s = item_ms / 1000.0
+        self._lock = threading.Lock()  # like one model saturating the CPU
+
+    def _encode(self, n):
+        with self._lock:
+            time.sleep(self.call_s + self.item_s * n)
+        return np.zeros((n, self.dim), dtype=np.float32)
+
+    def embed(self, text):
+        return self._encode(1)[0]
+
+    def embed_many(self, texts, batch_size=None):
+        return self._encode(len(texts))
+
+
+def make_texts(n, tag):
+    # unique texts so neither the model nor a cache can short-circuit
+    return [f"Candidate {tag}-{i}: built APIs in python and react, deployed on aws." for i in range(n)]
+
+
+def run_clients(fn, texts, clients, per_client):
+    latencies = []
+    lat_lock = threading.Lock()
+
+    def _client(offset):
+        local = []
+        for j in range(per_client):
+            t0 = time.perf_counter()
+            fn(texts[offset + j])
+            local.append(time.perf_counter() - t0)
+        with lat_lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=_client, args=(c * per_client,)) for c in range(clients)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    lat = np.array(latencies) * 1000
+    return len(latencies) / elapsed, float(np.percentile(lat, 50)), float(np.percentile(lat, 99))
+
+
+def batch_stats():
+    series = EMBED_BATCH_SIZE._series.get((), None)
+    if series is None:
+        return 0, 0.0
+    counts, total = series
+    return sum(counts), total[0]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 8, 64])
+    parser.add_argument("--per-client", type=int, default=20)
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, nargs="+", default=[0.0, 5.0])
+    parser.add_argument("--simulated", action="store_true")
+    args = parser.parse_args()
+
+    if args.simulated:
+        embedder = SimulatedEmbedder()
+    else:
+        from ai.embeddings.embedder import Embedder
+
+        embedder = Embedder()  # uncached: every text hits the model
+        embedder.embed_many(["warmup"])
+
+    print(f"{'clients':>7} {'mode':>12} {'texts/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'avg batch':>10}")
+    for clients in args.clients:
+        n = clients * args.per_client
+        rate, p50, p99 = run_clients(embedder.embed, make_texts(n, f"d{clients}"), clients, args.per_client)
+        print(f"{clients:>7} {'direct':>12} {rate:>9.1f} {p50:>8.1f} {p99:>8.1f} {1:>10.1f}")
+
+        for wait in args.max_wait_ms:
+            batcher = EmbeddingBatcher(embedder, max_batch=args.max_batch, max_wait_ms=wait)
+            flushes0, texts0 = batch_stats()
+            texts = make_texts(n, f"b{clients}-{wait}")
+            rate_b, p50, p99 = run_clients(batcher.embed, texts, clients, args.per_client)
+            batcher.close()
+            flushes1, texts1 = batch_stats()
+            avg = (texts1 - texts0) / max(flushes1 - flushes0, 1)
+            mode = f"wait {wait:g}ms"
+            print(f"{clients:>7} {mode:>12} {rate_b:>9.1f} {p50:>8.1f} {p99:>8.1f} {avg:>10.1f}"
+                  f"   ({rate_b / rate:.1f}x)")
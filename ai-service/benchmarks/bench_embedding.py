@@ -0,0 +1,98 @@
+"""
+Micro-benchmark: per-job `Embedder.embed` calls vs one `Embedder.embed_many`,
+plus cold vs warm `embed_many` through an `EmbeddingCache`.
+
+Run from ai-service/:
+    python -m benchmarks.bench_embedding
+    python -m benchmarks.bench_embedding --sizes 10 100 1000 --batch-size 64
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from ai.embeddings.cache import EmbeddingCache
+from ai.embeddings.embedder import Embedder
+
+
+TITLES = [
+    "Frontend Developer Intern", "Backend Engineer", "Data Analyst Intern",
+    "Machine Learning Engineer", "DevOps Intern", "Android Developer",
+    "Security Analyst", "Full Stack Developer", "Cloud Engineer Intern",
+]
+SKILLS = [
+    "python", "react", "node.js", "docker", "kubernetes", "aws", "sql",
+    "pandas", "pytorch", "typescript", "java", "spring boot", "flutter",
+]
+
+
+def make_job_texts(n: int, seed: int = 42):
+    rng = random.Random(seed)
+    texts = []
+    for i in range(n):
+        title = rng.choice(TITLES)
+        skills = rng.sample(SKILLS, k=rng.randint(2, 6))
+        desc = " ".join(
+            f"You will work with {s} on production systems and collaborate with the team."
+            for s in skills
+        )
+        texts.append(
+            f"{title}. {desc}. Required skills: {', '.join(skills)}. Company: Company {i}."
+        )
+    return texts
+
+
+def bench(sizes, batch_size):
+    embedder = Embedder()  # uncached: measure model work only
+    embedder.embed_many(["warmup"])  # load weights / first-call overhead
+
+    print(f"{'jobs':>6} {'per-job (s)':>12} {'batched (s)':>12} {'speedup':>8} {'max |diff|':>11}")
+    for n in sizes:
+        texts = make_job_texts(n)
+
+        t0 = time.perf_counter()
+        per_job = np.vstack([embedder.embed(t) for t in texts])
+        t_single = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        batched = embedder.embed_many(texts, batch_size=batch_size)
+        t_batch = time.perf_counter() - t0
+
+        diff = float(np.max(np.abs(per_job - batched))) if n else 0.0
+        print(f"{n:>6} {t_single:>12.3f} {t_batch:>12.3f} {t_single / t_batch:>7.1f}x {diff:>11.2e}")
+
+    print(f"\n{'jobs':>6} {'cold (s)':>12} {'warm (s)':>12} {'restart (s)':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cache.sqlite")
+        for n in sizes:
+            texts = make_job_texts(n, seed=n)
+            embedder.cache = EmbeddingCache(embedder.model_name, path=path)
+
+            t0 = time.perf_counter()
+            embedder.embed_many(texts, batch_size=batch_size)
+            t_cold = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            embedder.embed_many(texts, batch_size=batch_size)
+            t_warm = time.perf_counter() - t0
+
+            # fresh LRU, same file: what a restarted worker sees
+            embedder.cache = EmbeddingCache(embedder.model_name, path=path)
+            t0 = time.perf_counter()
+            embedder.embed_many(texts, batch_size=batch_size)
+            t_disk = time.perf_counter() - t0
+
+            print(f"{n:>6} {t_cold:>12.3f} {t_warm:>12.4f} {t_disk:>12.4f}")
+        embedder.cache = None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--batch-size", type=int, default=64)
+    args = parser.parse_args()
+    bench(args.sizes, args.batch_size)
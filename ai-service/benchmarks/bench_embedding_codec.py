@@ -0,0 +1,124 @@
+"""
+Embedding wire format benchmark: JSON float lists vs the compact "f16" /
+"i8" strings from ai/embeddings/codec.py.
+
+Reports, per format:
+- payload size of one vector and of a /recommend-style request body
+- parse time of that body: json.loads + pydantic validation + decode into
+  the (n, dim) matrix the service scores against
+- ranking agreement with the float32 vectors: cosine error, top-10 overlap
+  and whether the top-1 job is unchanged
+
+Run from ai-service/:
+    python -m benchmarks.bench_embedding_codec
+    python -m benchmarks.bench_embedding_codec --jobs 500 --dim 768 --queries 200
+"""
+
+import argparse
+import gc
+import json
+import time
+from typing import List, Optional, Union
+
+import numpy as np
+from pydantic import BaseModel
+
+from ai.embeddings.codec import WIRE_FORMATS, decode_embedding, decode_into, encode_embedding
+
+
+class _Job(BaseModel):
+    id: str
+    embedding: Optional[Union[List[float], str]] = None
+
+
+class _Request(BaseModel):
+    jobs: List[_Job]
+
+
+def _clustered(n, dim, rng, clusters=32):
+    """Unit vectors around a few topic centers, closer to real embeddings than pure noise."""
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32) * 2
+    vecs = centers[rng.integers(0, clusters, n)] + rng.standard_normal((n, dim)).astype(np.float32)
+    return vecs / np.linalg.norm(vecs, axis=1, keepdims=True), centers
+
+
+def _parse(body: str, dim: int, fmt: str) -> np.ndarray:
+    req = _Request.model_validate(json.loads(body))
+    mat = np.zeros((len(req.jobs), dim), dtype=np.float32)
+    if fmt == "list-old":
+        # what /recommend did before: np.asarray(list, float) per job
+        for i, job in enumerate(req.jobs):
+            mat[i] = np.asarray(job.embedding, dtype=float)
+    else:
+        decode_into([job.embedding for job in req.jobs], mat)
+    return mat
+
+
+def bench_payload(jobs, fmt_list, repeats):
+    n, dim = jobs.shape
+    rows = []
+    for fmt in fmt_list:
+        wire = "list" if fmt == "list-old" else fmt
+        body = json.dumps({"jobs": [{"id": f"job_{i}", "embedding": encode_embedding(v, wire)}
+                                    for i, v in enumerate(jobs)]})
+        one = len(json.dumps(encode_embedding(jobs[0], wire)))
+        times = []
+        for _ in range(repeats):
+            # the list bodies allocate millions of floats; keep GC pauses out of the timing
+            gc.collect()
+            gc.disable()
+            t0 = time.perf_counter()
+            _parse(body, dim, fmt)
+            times.append(time.perf_counter() - t0)
+            gc.enable()
+        rows.append((fmt, one, len(body), float(np.median(times)) * 1000))
+
+    base = rows[0]
+    print(f"{'format':<9} {'bytes/vec':>10} {'body KB':>9} {'parse ms':>9} {'size x':>7} {'speedup':>8}")
+    for fmt, one, size, ms in rows:
+        print(f"{fmt:<9} {one:>10} {size / 1024:>9.1f} {ms:>9.2f} "
+              f"{base[2] / size:>7.1f} {base[3] / ms:>8.1f}")
+
+
+def bench_agreement(jobs, queries, k):
+    exact = queries @ jobs.T
+    exact_top = np.argsort(-exact, axis=1)[:, :k]
+    print(f"\n{'format':<9} {'max |dcos|':>11} {'mean |dcos|':>12} {f'top-{k} overlap':>15} {'top-1 same':>11}")
+    for fmt in ("f16", "i8"):
+        dec = np.stack([decode_embedding(encode_embedding(v, fmt)) for v in jobs])
+        dec /= np.linalg.norm(dec, axis=1, keepdims=True)
+        sims = queries @ dec.T
+        err = np.abs(sims - exact)
+        top = np.argsort(-sims, axis=1)[:, :k]
+        overlap = np.mean([len(set(a) & set(b)) / k for a, b in zip(top, exact_top)])
+        same1 = np.mean(top[:, 0] == exact_top[:, 0])
+        print(f"{fmt:<9} {err.max():>11.2e} {err.mean():>12.2e} {overlap:>15.4f} {same1:>11.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=200, help="vectors per request body")
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--corpus", type=int, default=5000, help="jobs ranked in the agreement check")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--repeats", type=int, default=7)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    jobs, _ = _clustered(args.jobs, args.dim, rng)
+    print(f"Request body with {args.jobs} job embeddings (dim {args.dim}); "
+          f"list-old = previous per-job np.asarray path\n")
+    bench_payload(jobs, ["list-old"] + list(WIRE_FORMATS), args.repeats)
+
+    corpus, centers = _clustered(args.corpus, args.dim, rng)
+    queries = centers[rng.integers(0, len(centers), args.queries)] + rng.standard_normal(
+        (args.queries, args.dim)).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    print(f"\nRanking agreement vs float32 over {args.corpus} jobs, {args.queries} queries")
+    bench_agreement(corpus, queries, args.k)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+FeatureBuilder throughput: per-pair `build` vs `build_batch` for one student
+against N jobs, and `build_batch` with precomputed job profiles (what
+/recommend does for jobs in the job store). Checks that all paths agree
+before timing them.
+
+Run from ai-service/:
+    python -m benchmarks.bench_features
+    python -m benchmarks.bench_features --sizes 1000 10000
+"""
+
+import argparse
+import random
+import time
+
+import numpy as np
+
+from ai.features.feature_builder import FeatureBuilder
+
+
+SKILLS = [
+    "python", "react", "node.js", "docker", "kubernetes", "aws", "sql", "pandas",
+    "pytorch", "typescript", "java", "spring boot", "flutter", "machine learning",
+    "ci/cd", "figma", "solidity", "unity", "c++", "go", "tailwind css", "mongodb",
+]
+TITLES = [
+    "Frontend Developer Intern", "Backend Engineer", "Data Analyst Intern",
+    "Machine Learning Engineer", "DevOps Intern", "Android Developer",
+    "Security Analyst", "Full Stack Developer", "Game Developer",
+]
+
+
+def make_student(rng: random.Random):
+    skills = rng.sample(SKILLS, k=8)
+    return {
+        "resume_text": "Built web apps and data pipelines with " + ", ".join(skills),
+        "skills": skills,
+        "domains": [],
+        "gpa": 8.1,
+        "experience": ["exp"] * 2,
+        "education": ["B.Tech Computer Science"],
+        "positions": ["Software Engineer Intern", "Data Analyst"],
+        "responsibilities": "built apis, wrote tests, deployed services on aws",
+    }
+
+
+def make_jobs(n: int, rng: random.Random):
+    jobs = []
+    for i in range(n):
+        skills = rng.sample(SKILLS, k=rng.randint(0, 6))
+        jobs.append({
+            "id": f"job_{i}",
+            "title": rng.choice(TITLES),
+            "description": "Work on " + " and ".join(skills or ["products"]),
+            "skills": skills,
+            "tools": rng.sample(SKILLS, k=rng.randint(0, 3)),
+            "education_requirement": rng.choice(["", "B.Tech", "Computer Science degree"]),
+            "experience_requirement": rng.choice(["", "1+ years", "2 years", "fresher"]),
+            "responsibilities_text": "build apis and deploy services",
+        })
+    return jobs
+
+
+def check_parity(fb, student, jobs, student_vec, job_matrix):
+    batch_X, batch_reasons = fb.build_batch(student, jobs, student_vec, job_matrix)
+    for i, job in enumerate(jobs):
+        f, reasons = fb.build(student, job, student_vec, job_matrix[i])
+        assert np.allclose(f, batch_X[i], atol=1e-9), (i, f, batch_X[i])
+        assert reasons == batch_reasons[i], (i, reasons, batch_reasons[i])
+    profiles = [fb.job_profile(job) for job in jobs]
+    stored_X, stored_reasons = fb.build_batch(student, jobs, student_vec, job_matrix, job_profiles=profiles)
+    assert np.array_equal(stored_X, batch_X) and stored_reasons == batch_reasons
+
+
+def bench(sizes, dim, seed):
+    rng = random.Random(seed)
+    np_rng = np.random.default_rng(seed)
+    fb = FeatureBuilder()
+    student = make_student(rng)
+    student_vec = np_rng.standard_normal(dim).astype(np.float32)
+
+    print(f"{'jobs':>6} {'build (s)':>10} {'batch (s)':>10} {'speedup':>8} {'jobs/s batch':>13} "
+          f"{'stored (s)':>11} {'jobs/s stored':>14}")
+    for n in sizes:
+        jobs = make_jobs(n, rng)
+        job_matrix = np_rng.standard_normal((n, dim)).astype(np.float32)
+
+        check_parity(fb, student, jobs[:200], student_vec, job_matrix[:200])
+
+        t0 = time.perf_counter()
+        for i, job in enumerate(jobs):
+            fb.build(student, job, student_vec, job_matrix[i])
+        t_pair = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        fb.build_batch(student, jobs, student_vec, job_matrix)
+        t_batch = time.perf_counter() - t0
+
+        profiles = [fb.job_profile(job) for job in jobs]
+        t0 = time.perf_counter()
+        fb.build_batch(student, jobs, student_vec, job_matrix, job_profiles=profiles)
+        t_stored = time.perf_counter() - t0
+
+        print(f"{n:>6} {t_pair:>10.3f} {t_batch:>10.3f} {t_pair / t_batch:>7.1f}x {n / t_batch:>13.0f} "
+              f"{t_stored:>11.3f} {n / t_stored:>14.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    bench(args.sizes, args.dim, args.seed)
@@ -0,0 +1,96 @@
+"""
+Training-set storage benchmark: the old interactions.csv (one JSON feature
+list per row) against the binary format of ai/ranker/interactions.py.
+
+For N synthetic rows it reports file size, write time and load time for:
+- csv:      to_csv, then read_csv + json.loads per row + np.vstack
+            (what train_ranker did before)
+- binary:   save_interactions, then load_interactions (memory-mapped) and
+            one full pass over the features, so pages are actually read
+It also converts the CSV with convert_csv and checks that it matches the
+original arrays (float32) bit for bit.
+
+Run from ai-service/:
+    python -m benchmarks.bench_interactions_format
+    python -m benchmarks.bench_interactions_format --rows 5000000
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from ai.features.feature_builder import NUM_FEATURES
+from ai.ranker.interactions import Interactions, convert_csv, load_interactions, save_interactions
+
+
+def _dir_size(path: str) -> int:
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--groups", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    n = args.rows
+    features = rng.random((n, NUM_FEATURES)).astype(np.float32)
+    features[:, 0] = rng.uniform(-0.3, 0.9, n)  # cosine similarity
+    features[rng.random(n) < 0.01, NUM_FEATURES - 1] = np.nan
+    labels = rng.random(n).round(3).astype(np.float32)
+    group_ids = np.sort(rng.integers(0, args.groups, n))
+    group_names = [f"stu_{g:06d}" for g in group_ids]
+
+    tmp = tempfile.mkdtemp(prefix="bench_interactions_")
+    csv_path = os.path.join(tmp, "interactions.csv")
+    bin_dir = os.path.join(tmp, "interactions")
+    conv_dir = os.path.join(tmp, "converted")
+    results = {}
+
+    t0 = time.perf_counter()
+    pd.DataFrame({"student_id": group_names, "features": [json.dumps(f) for f in features.tolist()],
+                  "label": labels}).to_csv(csv_path, index=False)
+    write_csv = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    df = pd.read_csv(csv_path)
+    X = np.vstack(df["features"].apply(lambda s: np.array(json.loads(s), dtype=float)).values)
+    y = df["label"].astype(float).values
+    results["csv"] = (_dir_size(csv_path), write_csv, time.perf_counter() - t0)
+    del df, X, y
+
+    data = Interactions.from_group_ids(features, labels, group_names)
+    t0 = time.perf_counter()
+    save_interactions(data, bin_dir)
+    write_bin = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    loaded = load_interactions(bin_dir)
+    float(np.nansum(loaded.features)) + float(loaded.labels.sum())  # touch every page
+    results["binary"] = (_dir_size(bin_dir), write_bin, time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    convert_csv(csv_path, conv_dir)
+    convert_s = time.perf_counter() - t0
+    converted = load_interactions(conv_dir)
+    same = (np.array_equal(converted.features, features, equal_nan=True)
+            and np.array_equal(converted.labels, labels)
+            and [converted.group_names[g] for g in converted.groups[:: max(1, n // 1000)]]
+            == group_names[:: max(1, n // 1000)])
+
+    print(f"{n} rows x {NUM_FEATURES} features, {len(data.group_names)} groups\n")
+    print(f"{'format':<8} {'size MB':>9} {'write s':>8} {'load s':>8}")
+    for name, (size, write_s, load_s) in results.items():
+        print(f"{name:<8} {size / 1e6:>9.1f} {write_s:>8.2f} {load_s:>8.3f}")
+    print(f"\nconvert_csv: {convert_s:.2f}s, matches the source arrays: {same}")
+
+
+if __name__ == "__main__":
+    main()
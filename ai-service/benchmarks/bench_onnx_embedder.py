@@ -0,0 +1,170 @@
+"""
+Embedding backend report: PyTorch SentenceTransformer vs ONNX Runtime
+(fp32 and dynamic int8) on a resume/job corpus.
+
+Accuracy: per-text cosine between each backend's vector and the PyTorch
+one, plus how many of each resume's top-10 jobs (by cosine) stay the same.
+Cost: model load time, resident memory after load, single-text latency and
+batched throughput. Each backend runs in its own subprocess so RSS numbers
+don't include the other backends.
+
+Run from ai-service/ (exports the ONNX models on first use):
+    python -m benchmarks.bench_onnx_embedder
+    python -m benchmarks.bench_onnx_embedder --resumes-csv UpdatedResumeDataSet.csv --jobs-csv job_title_des.csv
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BACKENDS = ["torch", "onnx", "onnx-int8"]
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024.0 * 1024.0) if sys.platform == "darwin" else peak / 1024.0
+
+
+def synthetic_corpus(n_resumes, n_jobs, seed=13):
+    from benchmarks.bench_embedding import SKILLS, make_job_texts
+
+    rng = random.Random(seed)
+    resumes = []
+    for i in range(n_resumes):
+        skills = rng.sample(SKILLS, k=rng.randint(3, 7))
+        resumes.append(
+            f"Student {i}. Computer science undergraduate. Projects: built a "
+            f"{rng.choice(['web app', 'data pipeline', 'mobile app', 'ml model'])} using "
+            f"{', '.join(skills)}. Internship experience with {rng.choice(skills)} and testing. "
+            + " ".join(f"Worked on {s} features end to end." for s in skills)
+        )
+    return resumes, make_job_texts(n_jobs, seed=seed)
+
+
+def csv_column(path, column, n):
+    import pandas as pd
+
+    df = pd.read_csv(path)
+    return [str(t) for t in df[column].dropna().head(n)]
+
+
+def worker(backend, corpus_path, out_path, batch_size):
+    """Runs in a subprocess: load one backend, embed the corpus, report costs."""
+    base_rss = rss_mb()
+    from ai.embeddings.embedder import Embedder
+
+    t0 = time.perf_counter()
+    embedder = Embedder(backend=backend)  # no cache: measure the model
+    load_s = time.perf_counter() - t0
+    embedder.embed_many(["warmup"])
+
+    with open(corpus_path, "r", encoding="utf-8") as f:
+        texts = json.load(f)
+
+    single = []
+    for t in texts[:50]:
+        t1 = time.perf_counter()
+        embedder.embed(t)
+        single.append(time.perf_counter() - t1)
+
+    t1 = time.perf_counter()
+    vecs = embedder.embed_many(texts, batch_size=batch_size)
+    batch_s = time.perf_counter() - t1
+    np.save(out_path, vecs)
+
+    print(json.dumps({
+        "backend": backend,
+        "load_s": load_s,
+        "rss_mb": rss_mb(),
+        "model_rss_mb": rss_mb() - base_rss,
+        "single_p50_ms": float(np.percentile(single, 50) * 1000),
+        "batch_texts_per_s": len(texts) / batch_s,
+    }))
+
+
+def unit(m):
+    return m / np.clip(np.linalg.norm(m, axis=1, keepdims=True), 1e-12, None)
+
+
+def report(args):
+    if args.resumes_csv and args.jobs_csv:
+        resumes = csv_column(args.resumes_csv, args.resume_column, args.resumes)
+        jobs = csv_column(args.jobs_csv, args.job_column, args.jobs)
+    else:
+        resumes, jobs = synthetic_corpus(args.resumes, args.jobs)
+    texts = resumes + jobs
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus_path = os.path.join(tmp, "corpus.json")
+        with open(corpus_path, "w", encoding="utf-8") as f:
+            json.dump(texts, f)
+
+        stats, vectors = {}, {}
+        for backend in args.backends:
+            out_path = os.path.join(tmp, f"{backend}.npy")
+            proc = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_onnx_embedder", "--worker", backend,
+                 "--corpus", corpus_path, "--out", out_path, "--batch-size", str(args.batch_size)],
+                capture_output=True, text=True,
+            )
+            if proc.returncode != 0:
+                print(f"{backend}: failed\n{proc.stderr.strip().splitlines()[-1] if proc.stderr else ''}")
+                continue
+            stats[backend] = json.loads(proc.stdout.strip().splitlines()[-1])
+            vectors[backend] = np.load(out_path)
+
+    print(f"corpus: {len(resumes)} resumes + {len(jobs)} jobs\n")
+    print(f"{'backend':>10} {'load s':>7} {'RSS MB':>8} {'model MB':>9} {'1-text p50 ms':>14} {'batch texts/s':>14}")
+    for backend, s in stats.items():
+        print(f"{backend:>10} {s['load_s']:>7.1f} {s['rss_mb']:>8.0f} {s['model_rss_mb']:>9.0f} "
+              f"{s['single_p50_ms']:>14.1f} {s['batch_texts_per_s']:>14.1f}")
+
+    if "torch" not in vectors:
+        print("\nno torch reference vectors; skipping accuracy")
+        return
+    ref = unit(vectors["torch"])
+    ref_top = np.argsort(-(ref[: len(resumes)] @ ref[len(resumes):].T), axis=1)[:, :10]
+    print(f"\n{'backend':>10} {'cos mean':>9} {'cos p1':>8} {'cos min':>8} {'top10 overlap':>14}")
+    for backend, vecs in vectors.items():
+        v = unit(vecs)
+        cos = np.sum(v * ref, axis=1)
+        top = np.argsort(-(v[: len(resumes)] @ v[len(resumes):].T), axis=1)[:, :10]
+        overlap = np.mean([len(set(a) & set(b)) / 10 for a, b in zip(top, ref_top)])
+        print(f"{backend:>10} {cos.mean():>9.5f} {np.percentile(cos, 1):>8.5f} {cos.min():>8.5f} {overlap:>14.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--backends", nargs="+", default=BACKENDS)
+    parser.add_argument("--resumes", type=int, default=200)
+    parser.add_argument("--jobs", type=int, default=300)
+    parser.add_argument("--resumes-csv", default=None)
+    parser.add_argument("--resume-column", default="Resume")
+    parser.add_argument("--jobs-csv", default=None)
+    parser.add_argument("--job-column", default="Job Description")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--worker", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--corpus", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--out", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker, args.corpus, args.out, args.batch_size)
+    else:
+        report(args)
@@ -0,0 +1,124 @@
+"""
+Concurrency benchmark for /parse_resume against a local stub LLM.
+
+The Gemini parser is replaced by a stub that answers after a fixed delay
+(`--llm-latency`), so the numbers show how well the endpoint overlaps
+uploads rather than Gemini's own latency. With the handler off the event
+loop, throughput should grow roughly with concurrency until the executor
+or embedding model saturates.
+
+Run from ai-service/ (GEMINI_API_KEY may be any non-empty value):
+    python -m benchmarks.bench_parse_concurrency
+    python -m benchmarks.bench_parse_concurrency --concurrency 1 4 16 64 --llm-latency 0.5
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+
+STUB_RESPONSE = {
+    "summary": "Student developer",
+    "skills": ["Python", "React", "Docker"],
+    "tools": ["Git"],
+    "projects": [],
+    "experience": [],
+    "education": [],
+    "branch": "CSE",
+    "batch": "2026",
+    "cgpa": "8.2",
+}
+
+
+class StubLLMParser:
+    """Stands in for ResumeGeminiParser: fixed latency, canned JSON."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.model_name = "stub"
+
+    def parse(self, text: str) -> dict:
+        time.sleep(self.latency)
+        return json.loads(json.dumps(STUB_RESPONSE))
+
+    async def parse_async(self, text: str) -> dict:
+        await asyncio.sleep(self.latency)
+        return json.loads(json.dumps(STUB_RESPONSE))
+
+
+def make_pdf(lines) -> bytes:
+    """Minimal single-page PDF with one text line per entry."""
+    text_ops = ["BT", "/F1 11 Tf", "50 780 Td", "14 TL"]
+    for line in lines:
+        safe = line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+        text_ops.append(f"({safe}) Tj T*")
+    text_ops.append("ET")
+    stream = "\n".join(text_ops).encode("latin-1")
+
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+        b"/Resources << /Font << /F1 5 0 R >> >> /Contents 4 0 R >>",
+        b"<< /Length " + str(len(stream)).encode() + b" >>\nstream\n" + stream + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{i} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for off in offsets:
+        out += f"{off:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+
+async def run_level(client, pdf_bytes, concurrency: int, requests_per_client: int):
+    async def worker():
+        for _ in range(requests_per_client):
+            r = await client.post(
+                "/parse_resume",
+                files={"file": ("resume.pdf", pdf_bytes, "application/pdf")},
+            )
+            r.raise_for_status()
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - t0
+
+
+async def main(levels, llm_latency, requests_per_client):
+    from ai.serving import main as service
+
+    service.gemini_parser = StubLLMParser(llm_latency)
+    pdf_bytes = make_pdf([
+        "Jane Doe - Computer Science, 2026",
+        "Skills: Python, React, Docker, SQL, AWS",
+        "Built a placement portal with FastAPI and Next.js.",
+    ])
+
+    transport = httpx.ASGITransport(app=service.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        await run_level(client, pdf_bytes, 1, 1)  # warmup
+
+        print(f"stub LLM latency: {llm_latency:.3f}s, {requests_per_client} uploads per client")
+        print(f"{'clients':>8} {'uploads':>8} {'wall (s)':>9} {'uploads/s':>10} {'ideal/s':>9}")
+        for c in levels:
+            wall = await run_level(client, pdf_bytes, c, requests_per_client)
+            n = c * requests_per_client
+            print(f"{c:>8} {n:>8} {wall:>9.2f} {n / wall:>10.1f} {c / llm_latency:>9.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    parser.add_argument("--requests-per-client", type=int, default=4)
+    args = parser.parse_args()
+    asyncio.run(main(args.concurrency, args.llm_latency, args.requests_per_client))
@@ -0,0 +1,184 @@
+"""
+Memory of the pre-fork server (ai/serving/prefork.py) at 1 / 4 / 8 workers,
+with models preloaded in the parent vs loaded in every worker.
+
+For each run the server is started on a free port, the benchmark waits for
+every worker to answer /ready, sends some /recommend traffic (so pages that
+get written after fork are counted) and reads /proc/<pid>/smaps_rollup:
+
+- RSS/worker: resident memory of one worker, shared pages included
+- PSS/worker: its proportional share (shared pages split between sharers)
+- total PSS:  parent + workers, i.e. what the whole server really uses
+- sum RSS:    what adding up per-process RSS (e.g. `ps`) would suggest
+
+With --jobs N a job index of N random vectors is built first, so the
+memory-mapped job matrix is part of the picture. Linux only.
+
+Run from ai-service/:
+    python -m benchmarks.bench_prefork_memory
+    python -m benchmarks.bench_prefork_memory --workers 1 4 8 --jobs 50000
+"""
+
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+import numpy as np
+
+from ai.embeddings.codec import encode_embedding
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _request(port, path, body=None, timeout=30.0):
+    data = None if body is None else json.dumps(body).encode("utf-8")
+    req = urllib.request.Request(f"http://127.0.0.1:{port}{path}", data=data,
+                                 headers={"content-type": "application/json"})
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            return resp.status, json.loads(resp.read() or b"null")
+    except urllib.error.HTTPError as e:
+        return e.code, None
+    except OSError:
+        return None, None
+
+
+def _children(pid):
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(p) for p in f.read().split()]
+    except FileNotFoundError:
+        return []
+
+
+def _smaps(pid):
+    out = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                out[parts[0][:-1]] = int(parts[1]) / 1024.0  # kB -> MB
+    return out
+
+
+def _start(port, workers, preload, env):
+    cmd = [sys.executable, "-m", "ai.serving.prefork", "--host", "127.0.0.1",
+           "--port", str(port), "--workers", str(workers)]
+    if not preload:
+        cmd.append("--no-preload")
+    return subprocess.Popen(cmd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+
+
+def _wait_ready(proc, port, workers, timeout):
+    deadline = time.time() + timeout
+    streak = 0
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"server exited: {(proc.stderr.read() or '').strip().splitlines()[-1:]}")
+        status, _ = _request(port, "/ready", timeout=5)
+        # connections land on arbitrary workers; many 200s in a row means all are warm
+        streak = streak + 1 if status == 200 else 0
+        if streak >= 4 * workers and len(_children(proc.pid)) == workers:
+            return
+        time.sleep(0.05 if status == 200 else 0.5)
+    raise RuntimeError("timed out waiting for workers to become ready")
+
+
+def _stop(proc):
+    proc.send_signal(signal.SIGTERM)
+    try:
+        proc.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+
+def build_job_index(n, env, timeout):
+    """Start one worker on the benchmark's JOB_INDEX_DIR and upsert n random jobs."""
+    port = _free_port()
+    proc = _start(port, 1, True, env)
+    try:
+        _wait_ready(proc, port, 1, timeout)
+        _, health = _request(port, "/health")
+        dim, model = health["job_index"]["dim"], health["job_index"]["embedding_model"]
+        rng = np.random.default_rng(0)
+        for start in range(0, n, 1000):
+            jobs = [
+                {"id": f"job_{i}", "title": f"Job {i}", "description": "synthetic", "skills": ["python"],
+                 "version": "1", "embedding": encode_embedding(rng.standard_normal(dim), "f16", model=model)}
+                for i in range(start, min(n, start + 1000))
+            ]
+            status, _ = _request(port, "/jobs/index", {"jobs": jobs}, timeout=600)
+            if status != 200:
+                raise RuntimeError(f"/jobs/index returned {status}")
+    finally:
+        _stop(proc)
+    print(f"Built job index with {n} jobs (dim {dim})\n")
+
+
+def measure(workers, preload, env, requests, timeout):
+    port = _free_port()
+    proc = _start(port, workers, preload, env)
+    try:
+        _wait_ready(proc, port, workers, timeout)
+        body = {"student": {"id": "s", "resume_text": "Python developer, FastAPI, SQL", "skills": ["python"]},
+                "top_k": 20}
+        for _ in range(requests):
+            _request(port, "/recommend", body)
+        parent = _smaps(proc.pid)
+        kids = [_smaps(pid) for pid in _children(proc.pid)]
+    finally:
+        _stop(proc)
+    return {
+        "rss_worker": float(np.mean([k["Rss"] for k in kids])),
+        "pss_worker": float(np.mean([k["Pss"] for k in kids])),
+        "total_pss": parent["Pss"] + sum(k["Pss"] for k in kids),
+        "sum_rss": parent["Rss"] + sum(k["Rss"] for k in kids),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--jobs", type=int, default=10000, help="jobs in the index (0 = none)")
+    parser.add_argument("--requests", type=int, default=50, help="/recommend calls before measuring")
+    parser.add_argument("--timeout", type=float, default=600.0, help="seconds to wait for startup")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="bench_prefork_")
+    env = dict(os.environ)
+    env.update({
+        "JOB_INDEX_DIR": os.path.join(tmp, "job_index"),
+        "EMBEDDING_CACHE_PATH": os.path.join(tmp, "embeddings.sqlite"),
+        "PARSE_CACHE_PATH": os.path.join(tmp, "parse.sqlite"),
+        "LOG_LEVEL": "WARNING",
+    })
+    if args.jobs:
+        build_job_index(args.jobs, env, args.timeout)
+
+    print(f"{'workers':>7} {'preload':>8} {'RSS/worker MB':>14} {'PSS/worker MB':>14} "
+          f"{'total PSS MB':>13} {'sum RSS MB':>11}")
+    for workers in args.workers:
+        for preload in (True, False):
+            try:
+                r = measure(workers, preload, env, args.requests, args.timeout)
+            except RuntimeError as e:
+                print(f"{workers:>7} {str(preload):>8}  error: {e}")
+                continue
+            print(f"{workers:>7} {str(preload):>8} {r['rss_worker']:>14.1f} {r['pss_worker']:>14.1f} "
+                  f"{r['total_pss']:>13.1f} {r['sum_rss']:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Ranker inference benchmark: latency of scoring 1 / 100 / 10k feature rows.
+
+Paths compared (same trees, same rows):
+- sklearn:   XGBRegressor.predict, what XGBRankerWrapper used before
+             (only if scikit-learn is installed)
+- dmatrix:   Booster.predict(DMatrix(X)), the work the sklearn wrapper does
+- inplace-1: Booster.inplace_predict on float32, nthread=1 (the default)
+- inplace-N: same with nthread = all cores
+- numpy:     NumpyTreeEnsemble (ai/ranker/tree_predictor.py)
+- auto:      XGBRankerWrapper default: numpy up to RANKER_FAST_PATH_ROWS, else inplace-1
+
+Parity: max |difference| of every path against Booster.predict.
+
+Without --model, a synthetic ranker with train_ranker.py's settings
+(400 trees, depth 6) is trained on random features first.
+
+Run from ai-service/:
+    python -m benchmarks.bench_ranker_predict
+    python -m benchmarks.bench_ranker_predict --model ai/trained_models/ranker.json --rows 1 100 10000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import xgboost as xgb
+
+from ai.features.feature_builder import NUM_FEATURES
+from ai.ranker.tree_predictor import NumpyTreeEnsemble
+from ai.ranker.xgb_ranker import XGBRankerWrapper
+
+
+def _train_synthetic(path, rounds, depth, rng):
+    X = rng.random((20000, NUM_FEATURES)).astype(np.float32)
+    y = X[:, 0] * 3 + X[:, 1] * X[:, 2] + np.sin(6 * X[:, 3]) + rng.normal(0, 0.1, len(X))
+    params = {"objective": "reg:squarederror", "eta": 0.1, "max_depth": depth, "colsample_bytree": 0.9,
+              "subsample": 0.9, "tree_method": "hist", "seed": 42}
+    booster = xgb.train(params, xgb.DMatrix(X, y), num_boost_round=rounds)
+    booster.save_model(path)
+
+
+def _time(fn, X, min_time=0.2):
+    fn(X)  # warm
+    loops, elapsed = 1, 0.0
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(loops):
+            fn(X)
+        elapsed = time.perf_counter() - t0
+        if elapsed >= min_time:
+            return elapsed / loops
+        loops *= 2
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=None, help="ranker.json (default: train a synthetic one)")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1, 100, 10000])
+    parser.add_argument("--rounds", type=int, default=400)
+    parser.add_argument("--depth", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    path = args.model
+    if path is None:
+        path = os.path.join(tempfile.mkdtemp(prefix="bench_ranker_"), "ranker.json")
+        _train_synthetic(path, args.rounds, args.depth, rng)
+
+    reference = xgb.Booster()
+    reference.load_model(path)
+    one = xgb.Booster()
+    one.load_model(path)
+    one.set_param({"nthread": 1})
+    ensemble = NumpyTreeEnsemble.from_json(path)
+    print(f"Model {path}: {ensemble.num_trees} trees, depth {ensemble.depth}, {os.cpu_count()} cores\n")
+
+    paths = {}
+    try:
+        from xgboost import XGBRegressor
+
+        sk = XGBRegressor()
+        sk.load_model(path)
+        paths["sklearn"] = sk.predict
+    except ImportError:
+        pass
+    paths["dmatrix"] = lambda X: reference.predict(xgb.DMatrix(X))
+    paths["inplace-1"] = lambda X: one.inplace_predict(np.ascontiguousarray(X, dtype=np.float32))
+    paths["inplace-N"] = lambda X: reference.inplace_predict(np.ascontiguousarray(X, dtype=np.float32))
+    paths["numpy"] = ensemble.predict
+    paths["auto"] = XGBRankerWrapper(path, backend="auto", nthread=1).predict
+
+    header = f"{'rows':>6} " + " ".join(f"{name:>11}" for name in paths)
+    print("latency (ms)")
+    print(header)
+    diffs = {name: 0.0 for name in paths}
+    for n in args.rows:
+        # features are mostly in [0, 1]; some exact zeros like absent signals
+        X = rng.random((n, NUM_FEATURES)) * (rng.random((n, NUM_FEATURES)) > 0.1)
+        expected = reference.predict(xgb.DMatrix(X.astype(np.float32)))
+        cells = []
+        for name, fn in paths.items():
+            diffs[name] = max(diffs[name], float(np.max(np.abs(np.asarray(fn(X)) - expected))))
+            cells.append(f"{_time(fn, X) * 1000:>11.3f}")
+        print(f"{n:>6} " + " ".join(cells))
+
+    print("\nmax |pred - Booster.predict|: " + ", ".join(f"{k}={v:.2e}" for k, v in diffs.items()))
+
+
+if __name__ == "__main__":
+    main()
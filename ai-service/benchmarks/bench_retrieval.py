@@ -0,0 +1,131 @@
+"""
+Candidate retrieval benchmark: recall@K and latency of JobVectorIndex
+(exact and, if hnswlib is installed, HNSW) against exhaustive scoring.
+
+1) Index level: top-K by cosine from the index vs brute force.
+2) Pipeline level: top-10 after FeatureBuilder + SimpleRanker over only the
+   retrieved top_k candidates vs over every job (what /recommend does
+   without top_k).
+
+Run from ai-service/:
+    python -m benchmarks.bench_retrieval
+    python -m benchmarks.bench_retrieval --jobs 10000 50000 --top-k 100 500
+"""
+
+import argparse
+import random
+import time
+
+import numpy as np
+
+from ai.features.feature_builder import FeatureBuilder
+from ai.ranker.simple_ranker import SimpleRanker
+from ai.retrieval.job_index import JobVectorIndex
+from benchmarks.bench_features import SKILLS, make_jobs, make_student
+
+
+def _skill_vectors(dim, rng):
+    return {s: rng.standard_normal(dim).astype(np.float32) for s in SKILLS}
+
+
+def _embed_like(skills, skill_vecs, dim, rng, noise=0.6):
+    """Synthetic 'embedding': sum of skill directions plus noise, so similarity tracks skills."""
+    vec = rng.standard_normal(dim).astype(np.float32) * noise
+    for s in skills:
+        vec += skill_vecs[s]
+    return vec
+
+
+def _has_hnsw():
+    try:
+        import hnswlib  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def bench_index(n, dim, ks, queries, rng):
+    vectors = rng.standard_normal((n, dim)).astype(np.float32)
+    # clustered data is closer to real job embeddings than pure noise
+    centers = rng.standard_normal((64, dim)).astype(np.float32) * 2
+    vectors += centers[rng.integers(0, 64, n)]
+    ids = [f"job_{i}" for i in range(n)]
+    qs = centers[rng.integers(0, 64, queries)] + rng.standard_normal((queries, dim)).astype(np.float32)
+
+    modes = ["exact"] + (["hnsw"] if _has_hnsw() else [])
+    exact_index = None
+    for mode in modes:
+        t0 = time.perf_counter()
+        index = JobVectorIndex(dim, mode=mode)
+        index.upsert(ids, vectors)
+        build = time.perf_counter() - t0
+        if mode == "exact":
+            exact_index = index
+        for k in ks:
+            truth = [set(j for j, _ in exact_index.search(q, k, exact=True)) for q in qs]
+            t0 = time.perf_counter()
+            got = [set(j for j, _ in index.search(q, k)) for q in qs]
+            per_query = (time.perf_counter() - t0) / queries
+            recall = np.mean([len(g & t) / k for g, t in zip(got, truth)])
+            print(f"{n:>7} {mode:>6} {k:>5} {build:>8.2f} {per_query * 1000:>10.3f} {recall:>9.4f}")
+
+
+def bench_pipeline(n, dim, top_ks, trials, rng, py_rng):
+    fb = FeatureBuilder()
+    ranker = SimpleRanker()
+    skill_vecs = _skill_vectors(dim, rng)
+    jobs = make_jobs(n, py_rng)
+    job_matrix = np.vstack([_embed_like(j["skills"], skill_vecs, dim, rng) for j in jobs])
+    index = JobVectorIndex(dim, mode="hnsw" if _has_hnsw() else "exact")
+    index.upsert([j["id"] for j in jobs], job_matrix)
+    pos = {j["id"]: i for i, j in enumerate(jobs)}
+
+    def score(student, student_vec, idx):
+        X, _ = fb.build_batch(student, [jobs[i] for i in idx], student_vec, job_matrix[idx])
+        s = np.array([ranker.score(f) for f in X])
+        return [idx[i] for i in np.argsort(-s)[:10]]
+
+    full_t = 0.0
+    results = {k: [0.0, 0.0] for k in top_ks}  # recall sum, time sum
+    for _ in range(trials):
+        student = make_student(py_rng)
+        student_vec = _embed_like(student["skills"], skill_vecs, dim, rng)
+
+        t0 = time.perf_counter()
+        truth = set(score(student, student_vec, list(range(n))))
+        full_t += time.perf_counter() - t0
+
+        for k in top_ks:
+            t0 = time.perf_counter()
+            cand = [pos[j] for j, _ in index.search(student_vec, k)]
+            got = set(score(student, student_vec, cand))
+            results[k][1] += time.perf_counter() - t0
+            results[k][0] += len(got & truth) / len(truth)
+
+    print(f"{n:>7} {'all':>6} {full_t / trials * 1000:>10.1f} {1.0:>10.4f}")
+    for k in top_ks:
+        rec, t = results[k]
+        print(f"{n:>7} {k:>6} {t / trials * 1000:>10.1f} {rec / trials:>10.4f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--jobs", type=int, nargs="+", default=[10000, 50000])
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--k", type=int, nargs="+", default=[10, 100])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, nargs="+", default=[100, 500])
+    parser.add_argument("--pipeline-jobs", type=int, default=5000)
+    parser.add_argument("--trials", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    print("Index recall@K vs brute force")
+    print(f"{'jobs':>7} {'mode':>6} {'K':>5} {'build(s)':>8} {'query(ms)':>10} {'recall@K':>9}")
+    for n in args.jobs:
+        bench_index(n, args.dim, args.k, args.queries, rng)
+
+    print("\nPipeline top-10 recall: retrieve top_k then score vs score everything")
+    print(f"{'jobs':>7} {'top_k':>6} {'req(ms)':>10} {'recall@10':>10}")
+    bench_pipeline(args.pipeline_jobs, args.dim, args.top_k, args.trials, rng, random.Random(args.seed))
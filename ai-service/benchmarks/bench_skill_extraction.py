@@ -0,0 +1,112 @@
+"""
+Skill extraction benchmark: the old per-key substring loop vs the compiled
+SkillMatcher, on skill maps of 200, 5k and 50k entries.
+
+The real skill_map.json is padded with synthetic aliases/tags to reach each
+size. Also reports how many matches the word-boundary rules drop (e.g. "r"
+inside "framework").
+
+Run from ai-service/:
+    python -m benchmarks.bench_skill_extraction
+"""
+
+import argparse
+import json
+import random
+import string
+import time
+
+from ai.config import SKILL_MAP_PATH
+from ai.skills.skill_matcher import SkillMatcher
+
+SAMPLE_RESUME = """
+Software engineering intern with hands-on experience building REST APIs in Python
+and FastAPI, frontends in React and Next.js, and data pipelines with Pandas and
+NumPy. Deployed services with Docker and Kubernetes on AWS, set up CI/CD using
+GitHub Actions, and wrote tests with pytest and Jest. Familiar with PostgreSQL,
+MongoDB and Redis. Coursework: operating systems, computer networks, machine
+learning (scikit-learn, PyTorch). Built a C++ game engine prototype and an
+Android app in Kotlin. Strong communication, teamwork and problem solving;
+regularly going beyond the brief to ship reliable, well-documented features.
+"""
+
+
+def old_extract(lower_keys, text):
+    """The loop SkillNormalizer.extract_from_text used before the matcher."""
+    if not text:
+        return []
+    text_l = text.lower()
+    found = []
+    for key, mapped in lower_keys.items():
+        if key and key in text_l:
+            if isinstance(mapped, list):
+                found.extend(mapped)
+            else:
+                found.append(mapped)
+    seen = set()
+    return [v for v in found if not (v in seen or seen.add(v))]
+
+
+def padded_map(base, size, rng):
+    skill_map = dict(list(base.items())[:size])
+    while len(skill_map) < size:
+        stem = "".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 10)))
+        suffix = rng.choice(["", ".js", "-db", " sdk", "ql", "-cli", "2"])
+        skill_map[stem + suffix] = stem + suffix
+    return skill_map
+
+
+def timed(fn, texts, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for t in texts:
+            fn(t)
+    return (time.perf_counter() - t0) / (repeat * len(texts))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[200, 5000, 50000])
+    parser.add_argument("--texts", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with open(SKILL_MAP_PATH, "r", encoding="utf-8") as f:
+        base = json.load(f)
+
+    # vary the resume a little so results aren't one cached string
+    words = SAMPLE_RESUME.split()
+    texts = []
+    for _ in range(args.texts):
+        w = words[:]
+        rng.shuffle(w)
+        texts.append(SAMPLE_RESUME + " ".join(w))
+
+    print(f"avg text length: {sum(map(len, texts)) // len(texts)} chars")
+    print(f"{'skills':>7} {'build(ms)':>10} {'old(ms)':>9} {'new(ms)':>9} {'speedup':>8} {'old hits':>9} {'new hits':>9}")
+    for size in args.sizes:
+        skill_map = padded_map(base, size, rng)
+        lower_keys = {k.lower(): v for k, v in skill_map.items()}
+
+        t0 = time.perf_counter()
+        matcher = SkillMatcher.from_skill_map(skill_map)
+        build = time.perf_counter() - t0
+
+        old_t = timed(lambda t: old_extract(lower_keys, t), texts, args.repeat)
+        new_t = timed(matcher.extract, texts, args.repeat)
+
+        old_hits = old_extract(lower_keys, texts[0])
+        new_hits = matcher.extract(texts[0])
+        missing = set(new_hits) - set(old_hits)
+        assert not missing, f"matcher found skills the substring scan cannot: {missing}"
+
+        print(
+            f"{size:>7} {build * 1000:>10.1f} {old_t * 1000:>9.3f} {new_t * 1000:>9.3f} "
+            f"{old_t / new_t:>7.1f}x {len(old_hits):>9} {len(new_hits):>9}"
+        )
+
+    dropped = sorted(set(old_extract({k.lower(): v for k, v in base.items()}, SAMPLE_RESUME))
+                     - set(SkillMatcher.from_skill_map(base).extract(SAMPLE_RESUME)))
+    print(f"\nsubstring-only matches rejected on the real map: {dropped}")
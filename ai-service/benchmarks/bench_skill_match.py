@@ -0,0 +1,137 @@
+"""
+Skill coverage matching: SkillMatchIndex vs pairwise loose_match.
+
+1) Parity: on randomized skill sets (spaces, underscores, shared prefixes,
+   blank-after-normalisation strings) the index must agree with
+   any(loose_match(t, s) for s in skills) for every target t.
+2) Feature parity: the skill-coverage features and reasons from
+   build_batch must equal the old pairwise computation.
+3) Timing of the old pairwise skill loops alone vs all of build_batch
+   (index included) on large profiles.
+
+Run from ai-service/:
+    python -m benchmarks.bench_skill_match
+"""
+
+import argparse
+import random
+import string
+import time
+
+import numpy as np
+
+from ai.features.feature_builder import FeatureBuilder, SkillMatchIndex, _clean_list, _normalize_skill
+
+loose_match = FeatureBuilder.loose_match
+
+
+def random_skill(rng: random.Random) -> str:
+    alphabet = "abcde"  # small alphabet so prefixes/substrings collide often
+    parts = ["".join(rng.choices(alphabet, k=rng.randint(1, 4))) for _ in range(rng.randint(1, 3))]
+    sep = rng.choice([" ", "_", "", "  "])
+    s = sep.join(parts)
+    if rng.random() < 0.05:
+        s = rng.choice(["_", " ", "__"])
+    if rng.random() < 0.1:
+        s = " " + s + rng.choice(["", " ", "_"])
+    return s
+
+
+def check_pair_parity(rng: random.Random, trials: int):
+    checked = 0
+    for _ in range(trials):
+        skills = [random_skill(rng) for _ in range(rng.randint(0, 25))]
+        index = SkillMatchIndex(skills)
+        for _ in range(20):
+            t = random_skill(rng) if rng.random() < 0.9 else ""
+            expected = any(loose_match(t, s) for s in skills)
+            got = index.matches(t)
+            assert got == expected, f"mismatch for t={t!r} skills={skills!r}: {got} != {expected}"
+            checked += 1
+    return checked
+
+
+def legacy_skill_block(student, job):
+    """Skill-coverage features 1-4 and skill reasons as FeatureBuilder computed them before the index."""
+    raw_s = [s for s in student.get("skills", []) if isinstance(s, str)]
+    norm_s = {_normalize_skill(s): s for s in raw_s if _normalize_skill(s)}
+    norm_req = {_normalize_skill(s): s for s in _clean_list(job.get("skills_required") or job.get("skills") or []) if _normalize_skill(s)}
+    norm_related = {_normalize_skill(s): s for s in _clean_list(job.get("related_skills_in_job") or []) if _normalize_skill(s)}
+    norm_tools = {_normalize_skill(s): s for s in _clean_list(job.get("tools") or []) if _normalize_skill(s)}
+    norm_job = {_normalize_skill(s): s for s in _clean_list(job.get("skills") or []) if _normalize_skill(s)}
+
+    def _coverage(src, tgt):
+        if not tgt:
+            return 0.0
+        hits = sum(1 for t in tgt if any(loose_match(t, s) for s in src))
+        return (hits / len(tgt)) ** 0.5
+
+    s_keys = set(norm_s.keys())
+    feats = [_coverage(s_keys, set(norm_req)), _coverage(s_keys, set(norm_related)), _coverage(s_keys, set(norm_tools))]
+    missing = 0.0
+    if norm_req:
+        matched = sum(1 for t in norm_req if any(loose_match(t, s) for s in norm_s))
+        missing = max(0.0, (len(norm_req) - matched) / len(norm_req))
+    feats.append(missing)
+    general = _coverage(s_keys, set(norm_job))
+    reasons = []
+    if matched := [norm_req[k] for k in norm_req if any(loose_match(k, s) for s in norm_s)]:
+        reasons.append("Matching required skills: " + ", ".join(sorted(set(matched))))
+    elif general > 0:
+        reasons.append("Some skills match the role requirements.")
+    return feats, reasons
+
+
+def skill_pool(rng: random.Random, n: int):
+    words = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 9))) for _ in range(n)]
+    return [w if rng.random() < 0.7 else w + rng.choice([".js", " sdk", "-cli", " 3"]) for w in words]
+
+
+def make_case(rng, pool, n_student, n_jobs, job_skills):
+    student = {"skills": rng.sample(pool, n_student), "resume_text": "", "domains": ["web"]}
+    jobs = []
+    for i in range(n_jobs):
+        jobs.append({
+            "title": "Engineer",
+            "skills": rng.sample(pool, job_skills),
+            "related_skills_in_job": rng.sample(pool, job_skills // 2),
+            "tools": rng.sample(pool, job_skills // 3),
+            "domains": ["web"],
+        })
+    return student, jobs
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--trials", type=int, default=3000)
+    parser.add_argument("--jobs", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    n = check_pair_parity(rng, args.trials)
+    print(f"pair parity: {n} randomized lookups agree with loose_match")
+
+    fb = FeatureBuilder()
+    pool = skill_pool(rng, 3000)
+    print(f"{'student skills':>14} {'job skills':>10} {'pairwise(ms/job)':>17} {'build_batch(ms/job)':>19} {'speedup':>8}")
+    for n_student, job_skills in [(10, 6), (50, 15), (200, 30)]:
+        student, jobs = make_case(rng, pool, n_student, args.jobs, job_skills)
+
+        t0 = time.perf_counter()
+        legacy = [legacy_skill_block(student, j) for j in jobs]
+        t_old = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        X, reasons = fb.build_batch(student, jobs, None, None)
+        t_new = time.perf_counter() - t0
+
+        for (feats, legacy_reasons), row, job_reasons in zip(legacy, X, reasons):
+            assert np.allclose(feats, row[1:5]), (feats, row[1:5])
+            assert job_reasons[:len(legacy_reasons)] == legacy_reasons, (legacy_reasons, job_reasons)
+
+        print(
+            f"{n_student:>14} {job_skills:>10} {t_old / len(jobs) * 1000:>17.3f} "
+            f"{t_new / len(jobs) * 1000:>19.3f} {t_old / t_new:>7.1f}x"
+        )
+    print("feature parity: build_batch skill features and reasons match the pairwise loops")
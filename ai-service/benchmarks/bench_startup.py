@@ -0,0 +1,134 @@
+"""
+Service startup benchmark: how long until the process can answer /live,
+how long warmup takes (per component), and what the first /recommend
+costs with and without warmup.
+
+Each scenario runs in a fresh interpreter so nothing is already imported:
+- lazy: import ai.serving.main, then the first /recommend loads everything
+- warm: import, warmup(), then the first /recommend
+
+The old eager startup (everything built at import) is roughly "import +
+warmup load" in the warm row; with lazy components /live is up after the
+import alone.
+
+Run from ai-service/:
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --runs 3 --importtime
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+STUDENT = {"id": "s1", "resume_text": "Python developer with FastAPI and React", "skills": ["python", "react"]}
+JOBS = [
+    {"id": f"job_{i}", "title": title, "description": f"{title} internship", "skills": skills}
+    for i, (title, skills) in enumerate([
+        ("Backend intern", ["python", "django"]),
+        ("Frontend intern", ["react", "javascript"]),
+        ("Data intern", ["python", "pandas", "sql"]),
+    ])
+]
+
+
+def _worker(mode: str) -> dict:
+    tmp = tempfile.mkdtemp(prefix="bench_startup_")
+    # fresh caches so the first encode is a real model call
+    os.environ["EMBEDDING_CACHE_PATH"] = os.path.join(tmp, "embeddings.sqlite")
+    os.environ["PARSE_CACHE_PATH"] = os.path.join(tmp, "parse.sqlite")
+    os.environ["JOB_INDEX_DIR"] = os.path.join(tmp, "job_index")
+
+    t0 = time.perf_counter()
+    from ai.serving import main
+    result = {"import_s": time.perf_counter() - t0}
+
+    from fastapi.testclient import TestClient
+
+    client = TestClient(main.app)  # not entered: no startup warmup thread
+    t0 = time.perf_counter()
+    client.get("/live")
+    result["live_ms"] = (time.perf_counter() - t0) * 1000
+
+    if mode == "warm":
+        t0 = time.perf_counter()
+        main.warmup()
+        result["warmup_s"] = time.perf_counter() - t0
+        result["components"] = {c.name: c.load_seconds for c in main.CORE_COMPONENTS}
+        if not main._warmup_done.is_set():
+            result["error"] = main._warmup_error
+            return result
+
+    body = {"student": STUDENT, "jobs": JOBS}
+    for key in ("first_request_ms", "second_request_ms"):
+        t0 = time.perf_counter()
+        resp = client.post("/recommend", json=body)
+        result[key] = (time.perf_counter() - t0) * 1000
+        if resp.status_code != 200:
+            result["error"] = f"/recommend {resp.status_code}: {resp.text[:200]}"
+            break
+    return result
+
+
+def _run(mode: str) -> dict:
+    proc = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_startup", "--worker", mode],
+        capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        tail = (proc.stderr.strip().splitlines() or ["?"])[-1]
+        return {"error": tail}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def _importtime(top: int):
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import ai.serving.main"],
+        capture_output=True, text=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            rows.append((int(parts[1]), parts[2].strip()))
+    print(f"\nSlowest imports (cumulative ms) of ai.serving.main:")
+    for us, name in sorted(rows, reverse=True)[:top]:
+        print(f"  {us / 1000:>8.1f}  {name}")
+
+
+def _fmt(v, unit=""):
+    return f"{v:.2f}{unit}" if isinstance(v, (int, float)) else "-"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=1)
+    parser.add_argument("--importtime", action="store_true", help="also list the slowest imports")
+    parser.add_argument("--worker", choices=["lazy", "warm"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(_worker(args.worker)))
+        return
+
+    print(f"{'mode':<6} {'import s':>9} {'warmup s':>9} {'1st req ms':>11} {'2nd req ms':>11}")
+    for run in range(args.runs):
+        for mode in ("lazy", "warm"):
+            r = _run(mode)
+            print(f"{mode:<6} {_fmt(r.get('import_s')):>9} {_fmt(r.get('warmup_s')):>9} "
+                  f"{_fmt(r.get('first_request_ms')):>11} {_fmt(r.get('second_request_ms')):>11}")
+            if r.get("components"):
+                loads = ", ".join(f"{k}={v:.2f}s" for k, v in r["components"].items() if v is not None)
+                print(f"       loads: {loads}")
+            if r.get("error"):
+                print(f"       error: {r['error']}")
+
+    if args.importtime:
+        _importtime(top=12)
+
+
+if __name__ == "__main__":
+    main()
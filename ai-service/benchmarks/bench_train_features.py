@@ -0,0 +1,140 @@
+"""
+Training-set build benchmark for train_ranker.build_interactions_from_structured_csv.
+
+Writes a synthetic resume_data_for_ranking.csv (with repeated resume / job
+texts, like the real export) into a temp directory, then times:
+- serial:    the old loop, iterrows + two embed() calls + build() per row
+- pipeline:  chunked read + dedup + embed_many + features, --processes 1
+- pool:      the same across a process pool (--processes N)
+- resume:    pool run with half of the chunks already checkpointed and the
+             embedding cache warm, i.e. restarting after a crash
+
+serial, pipeline and pool each start from an empty embedding cache. All
+paths must produce the serial loop's features (up to float noise between
+one-text and batched encoding).
+
+Run from ai-service/:
+    python -m benchmarks.bench_train_features
+    python -m benchmarks.bench_train_features --rows 20000 --processes 8
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+SKILLS = ["python", "java", "react", "sql", "machine learning", "docker", "aws", "excel",
+          "c++", "node.js", "pandas", "tensorflow", "figma", "kubernetes", "go"]
+TITLES = ["Data Scientist", "Backend Engineer", "Frontend Developer", "ML Engineer",
+          "Business Analyst", "DevOps Engineer", "Android Developer", "QA Engineer"]
+
+
+def write_dataset(path: str, n: int, seed: int) -> None:
+    rng = random.Random(seed)
+    # a few hundred distinct resumes and job postings, each paired many times
+    resumes = [(f"Aspiring {rng.choice(TITLES)} who enjoys {rng.choice(SKILLS)}",
+                " ".join(rng.sample(SKILLS, 3)) + " development", str(rng.sample(SKILLS, rng.randint(1, 6))))
+               for _ in range(max(1, n // 10))]
+    jobs = [(t, f"At least {rng.randint(0, 4)} years", f"Build {t.lower()} systems with {rng.choice(SKILLS)}")
+            for t in TITLES for _ in range(max(1, n // (20 * len(TITLES))))]
+    rows = []
+    for _ in range(n):
+        objective, resp, skills = rng.choice(resumes)
+        title, exp, job_resp = rng.choice(jobs)
+        rows.append({
+            "career_objective": objective, "responsibilities": resp, "skills": skills,
+            "positions": str([rng.choice(TITLES)]), "degree_names": "['B.Tech']",
+            "major_field_of_studies": "['Computer Science']", "start_dates": str(["2021"] * rng.randint(0, 3)),
+            "educational_results": rng.choice(["8.1", "75%", ""]), "job_position_name": title,
+            "educationaL_requirements": "B.Sc in Computer Science", "experiencere_requirement": exp,
+            "responsibilities.1": job_resp, "skills_required": ", ".join(rng.sample(SKILLS, 3)),
+            "related_skils_in_job": str([rng.sample(SKILLS, 2)]), "matched_score": round(rng.random(), 3),
+        })
+    pd.DataFrame(rows).to_csv(path, index=False)
+
+
+def serial_features(train_ranker, embedder) -> np.ndarray:
+    """What the trainer used to do, minus writing the CSV."""
+    from ai.features.feature_builder import FeatureBuilder
+    from ai.skills.skill_normalizer import SkillNormalizer
+
+    df = pd.read_csv("resume_data_for_ranking.csv").dropna(subset=["matched_score"])
+    skill_norm, fb, out = SkillNormalizer(), FeatureBuilder(), []
+    for _, row in df.iterrows():
+        student, job = train_ranker._structured_pair(row, skill_norm)
+        out.append(fb.build(student, job, embedder.embed(student["resume_text"]),
+                            embedder.embed(job["title"] + ". " + job["description"]))[0])
+    return np.vstack(out)
+
+
+def _features(directory) -> np.ndarray:
+    from ai.ranker.interactions import load_interactions
+
+    return np.asarray(load_interactions(directory).features, dtype=float)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-rows", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="bench_train_")
+    os.environ["EMBEDDING_CACHE_PATH"] = os.path.join(tmp, "embeddings.sqlite")
+    os.environ["EMBEDDING_CACHE_ENABLED"] = "1"
+
+    from ai.embeddings.cache import EmbeddingCache
+    from ai.ranker import train_ranker
+
+    write_dataset(os.path.join(tmp, "resume_data_for_ranking.csv"), args.rows, args.seed)
+    os.chdir(tmp)
+    embedder = train_ranker._training_embedder()
+
+    def fresh_cache(name):
+        embedder.cache = EmbeddingCache(embedder.model_id, os.path.join(tmp, f"{name}.sqlite"))
+
+    results = {}
+    fresh_cache("serial")
+    t0 = time.perf_counter()
+    expected = serial_features(train_ranker, embedder)
+    results["serial"] = time.perf_counter() - t0
+
+    ckpt = os.path.join(tmp, "checkpoints")
+    out_dir = os.path.join(tmp, "interactions")
+    runs = [("pipeline", 1, None), ("pool", args.processes, ckpt)]
+    for name, processes, root in runs:
+        fresh_cache(name)
+        t0 = time.perf_counter()
+        train_ranker.build_interactions_from_structured_csv(processes, args.chunk_rows, root, out_dir)
+        results[name] = time.perf_counter() - t0
+        assert np.allclose(_features(out_dir), expected, atol=1e-5, equal_nan=True), f"{name} features differ"
+
+    # resume: rerun the pool build with half of its chunks already checkpointed
+    partial = os.path.join(tmp, "partial")
+    num_chunks = -(-args.rows // args.chunk_rows)
+    target = train_ranker._checkpoint_dir(partial, "structured", [train_ranker.Path("resume_data_for_ranking.csv")],
+                                          model=embedder.model_id, chunk_rows=args.chunk_rows)
+    os.makedirs(target, exist_ok=True)
+    for i in range(num_chunks // 2):
+        np.save(os.path.join(target, f"chunk_{i:06d}.npy"),
+                expected[i * args.chunk_rows:(i + 1) * args.chunk_rows])
+    t0 = time.perf_counter()
+    train_ranker.build_interactions_from_structured_csv(args.processes, args.chunk_rows, partial, out_dir)
+    results["resume"] = time.perf_counter() - t0
+    assert np.allclose(_features(out_dir), expected, atol=1e-5, equal_nan=True), "resume features differ"
+
+    print(f"\n{args.rows} rows, {args.processes} processes, chunks of {args.chunk_rows}")
+    print(f"{'path':<9} {'seconds':>8} {'rows/s':>9}")
+    for name, secs in results.items():
+        print(f"{name:<9} {secs:>8.2f} {args.rows / secs:>9.0f}")
+    print("all paths produce the serial loop's features")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Peak memory and time of ranker training at 1M and 10M rows.
+
+A synthetic training set (ai/ranker/interactions.py shards, written chunk by
+chunk so generating it is itself bounded) is trained with a few boosting
+rounds in a fresh process per mode, and that process's peak RSS is read
+from getrusage:
+
+- in-memory: every row loaded into one float64 matrix, then QuantileDMatrix
+             from it (what XGBRegressor.fit on the parsed CSV did before)
+- iter:      QuantileDMatrix built from ShardIter, one memory-mapped shard
+             at a time (train_ranker default)
+- extmem:    ExtMemQuantileDMatrix from ShardIter, quantized pages cached
+             on disk (train_ranker --external-memory)
+
+"base" is the peak RSS of a process that only imports train_ranker.
+Predictions on the first 1000 rows are compared across modes; they differ
+only where batched quantile sketching picks slightly different bin cuts.
+
+Run from ai-service/:
+    python -m benchmarks.bench_train_memory
+    python -m benchmarks.bench_train_memory --rows 1000000 10000000 --shard-rows 500000 --rounds 10
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from ai.features.feature_builder import NUM_FEATURES
+from ai.ranker.interactions import InteractionsWriter
+
+MODES = ("in-memory", "iter", "extmem")
+
+
+def write_synthetic(directory: str, rows: int, shard_rows: int, seed: int) -> None:
+    rng = np.random.default_rng(seed)
+    chunk = 1_000_000
+    with InteractionsWriter(directory, shard_rows=shard_rows, source="synthetic") as writer:
+        for start in range(0, rows, chunk):
+            n = min(chunk, rows - start)
+            X = rng.random((n, NUM_FEATURES), dtype=np.float32)
+            X[rng.random(n) < 0.01, NUM_FEATURES - 1] = np.nan
+            y = 3 * X[:, 0] + X[:, 1] * X[:, 2] + np.sin(6 * X[:, 3]) + rng.normal(0, 0.1, n)
+            groups = (np.arange(start, start + n) // 50).astype(str)
+            writer.append(X, y, groups)
+
+
+def _worker(mode: str, directory: str, rounds: int) -> dict:
+    import xgboost as xgb
+
+    from ai.ranker import train_ranker
+    from ai.ranker.interactions import iter_shards, load_interactions
+
+    result = {"base_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+    if mode == "base":
+        return result
+
+    model_path = os.path.join(tempfile.mkdtemp(prefix="bench_train_model_"), "ranker.json")
+    t0 = time.perf_counter()
+    if mode == "in-memory":
+        data = load_interactions(directory, mmap=False)
+        X = np.asarray(data.features, dtype=np.float64)
+        dtrain = xgb.QuantileDMatrix(X, label=data.labels)
+        booster = xgb.train(train_ranker.XGB_PARAMS, dtrain, num_boost_round=rounds)
+        booster.save_model(model_path)
+        del data, X, dtrain
+    else:
+        booster = train_ranker.train_ranker(directory, external_memory=mode == "extmem",
+                                            model_path=model_path, num_boost_round=rounds)
+    result["train_s"] = time.perf_counter() - t0
+    result["peak_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    first = next(iter_shards(directory))
+    result["pred"] = booster.inplace_predict(np.asarray(first.features[:1000])).tolist()
+    return result
+
+
+def _run(mode: str, directory: str, rounds: int) -> dict:
+    proc = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_train_memory", "--worker", mode, "--data", directory,
+         "--rounds", str(rounds)],
+        capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        return {"error": (proc.stderr.strip().splitlines() or ["?"])[-1]}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000, 10_000_000])
+    parser.add_argument("--shard-rows", type=int, default=500_000)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=MODES)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--worker", choices=("base",) + MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--data", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(_worker(args.worker, args.data, args.rounds)))
+        return
+
+    base = _run("base", "", 0)
+    print(f"base (imports only): {base['base_mb']:.0f} MB peak RSS\n")
+    print(f"{'rows':>10} {'mode':<10} {'peak RSS MB':>12} {'train s':>8}")
+    for rows in args.rows:
+        directory = os.path.join(tempfile.mkdtemp(prefix="bench_train_mem_"), "interactions")
+        write_synthetic(directory, rows, args.shard_rows, args.seed)
+        preds = {}
+        for mode in args.modes:
+            r = _run(mode, directory, args.rounds)
+            if "error" in r:
+                print(f"{rows:>10} {mode:<10}  error: {r['error']}")
+                continue
+            preds[mode] = np.asarray(r["pred"])
+            print(f"{rows:>10} {mode:<10} {r['peak_mb']:>12.0f} {r['train_s']:>8.1f}")
+        if len(preds) > 1:
+            ref_mode, ref = next(iter(preds.items()))
+            diff = max(float(np.max(np.abs(p - ref))) for p in preds.values())
+            print(f"{'':>10} max |prediction - {ref_mode}| on 1000 rows: {diff:.2e}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
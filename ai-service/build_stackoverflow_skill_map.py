@@ -1,6 +1,8 @@
 import json
 from pathlib import Path
 
+from ai.skills.skill_matcher import SkillMatcher
+
 
 # Curated StackOverflow-style skills list (languages, frameworks, tools, DBs, cloud, ML)
 LANGUAGES = [
@@ -64,6 +66,7 @@ PLATFORMS = [
 def build_stackoverflow_skill_map():
     base = Path(__file__).resolve().parent
     out_path = base / "ai" / "skills" / "skill_map.json"
+    automaton_path = base / "ai" / "skills" / "skill_automaton.pkl"
 
     buckets = [
         LANGUAGES, FRAMEWORKS, LIBRARIES, TOOLS,
@@ -84,6 +87,10 @@ def build_stackoverflow_skill_map():
 
     print(f"Generated StackOverflow skill_map.json with {len(skill_map)} skills at {out_path}")
 
+    # Precompile the matcher so services don't rebuild it at startup
+    SkillMatcher.from_skill_map(skill_map).save(str(automaton_path))
+    print(f"Wrote skill automaton to {automaton_path}")
+
 
 if __name__ == "__main__":
     build_stackoverflow_skill_map()
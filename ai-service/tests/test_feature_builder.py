@@ -0,0 +1,97 @@
+"""FeatureBuilder.build_batch must give exactly what per-pair build gives."""
+
+import random
+
+import numpy as np
+import pytest
+
+from ai.features.feature_builder import NUM_FEATURES, FeatureBuilder
+
+SKILLS = [
+    "python", "react", "react native", "node.js", "node_js", "docker", "aws", "sql",
+    "machine learning", "machine_learning", "java", "javascript", "c++", "go", "figma",
+    "spring boot", "tailwind css", "  mongo db ", "_", "",
+]
+TITLES = [
+    "Frontend Developer Intern", "Backend Engineer", "Data Analyst Intern",
+    "Machine Learning Engineer", "DevOps Intern", "Security Analyst", "",
+]
+DOMAINS = ["web", "data", "ml", "mobile", "devops"]
+
+
+def make_student(rng: random.Random):
+    skills = rng.sample(SKILLS, k=rng.randint(0, 8))
+    return {
+        "resume_text": rng.choice(["", "Built web apps and data pipelines with " + ", ".join(skills)]),
+        "skills": skills,
+        "domains": rng.sample(DOMAINS, k=rng.randint(0, 2)),
+        "gpa": rng.choice([None, 0, 6.5, 9.2, 12]),
+        "experience": ["exp"] * rng.randint(0, 3),
+        "education": rng.choice([[], ["B.Tech Computer Science"], ["MBA"]]),
+        "positions": rng.sample(["Software Engineer Intern", "Data Analyst", "Designer"], k=rng.randint(0, 2)),
+        "responsibilities": rng.choice(["", "built apis, wrote tests, deployed services on aws"]),
+    }
+
+
+def make_job(rng: random.Random, i: int):
+    job = {
+        "id": f"job_{i}",
+        "title": rng.choice(TITLES),
+        "description": "Work on " + " and ".join(rng.sample(SKILLS, k=2)),
+        "skills": rng.sample(SKILLS, k=rng.randint(0, 6)),
+        "tools": rng.sample(SKILLS, k=rng.randint(0, 3)),
+        "education_requirement": rng.choice(["", "B.Tech", "Computer Science degree"]),
+        "experience_requirement": rng.choice(["", "1+ years", "2 years", "fresher"]),
+        "responsibilities_text": rng.choice(["", "build apis and deploy services"]),
+    }
+    if rng.random() < 0.5:
+        job["skills_required"] = rng.sample(SKILLS, k=rng.randint(0, 4))
+    if rng.random() < 0.5:
+        job["related_skills_in_job"] = rng.sample(SKILLS, k=rng.randint(0, 4))
+    if rng.random() < 0.5:
+        job["domains"] = rng.sample(DOMAINS, k=rng.randint(0, 2))
+    return job
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_build_batch_matches_build(seed):
+    rng = random.Random(seed)
+    np_rng = np.random.default_rng(seed)
+    fb = FeatureBuilder()
+    for _ in range(100):
+        student = make_student(rng)
+        jobs = [make_job(rng, i) for i in range(5)]
+        student_vec = np_rng.standard_normal(16).astype(np.float32)
+        job_matrix = np_rng.standard_normal((len(jobs), 16)).astype(np.float32)
+        job_matrix[0] = 0.0  # zero vectors must not produce nan similarities
+
+        X, reasons = fb.build_batch(student, jobs, student_vec, job_matrix)
+        assert X.shape == (len(jobs), NUM_FEATURES)
+        for i, job in enumerate(jobs):
+            f, r = fb.build(student, job, student_vec, job_matrix[i])
+            # semantic_sim: build works in the vectors' float32, build_batch in float64
+            assert X[i][0] == pytest.approx(f[0], abs=1e-6)
+            np.testing.assert_array_equal(X[i][1:], f[1:])
+            assert reasons[i] == r
+
+
+def test_build_batch_with_job_profiles_matches_build_batch():
+    rng = random.Random(11)
+    np_rng = np.random.default_rng(11)
+    fb = FeatureBuilder()
+    student = make_student(rng)
+    jobs = [make_job(rng, i) for i in range(50)]
+    student_vec = np_rng.standard_normal(16).astype(np.float32)
+    job_matrix = np_rng.standard_normal((len(jobs), 16)).astype(np.float32)
+
+    X, reasons = fb.build_batch(student, jobs, student_vec, job_matrix)
+    # a None profile is computed on the fly, like a job missing from the store
+    profiles = [fb.job_profile(job) if i % 3 else None for i, job in enumerate(jobs)]
+    stored_X, stored_reasons = fb.build_batch(student, jobs, student_vec, job_matrix, job_profiles=profiles)
+    np.testing.assert_array_equal(stored_X, X)
+    assert stored_reasons == reasons
+
+
+def test_build_batch_empty():
+    X, reasons = FeatureBuilder().build_batch(make_student(random.Random(0)), [], np.ones(4), np.zeros((0, 4)))
+    assert X.shape[0] == 0 and reasons == []
@@ -0,0 +1,174 @@
+"""JobProfileStore persistence shared by several processes through one directory."""
+
+import numpy as np
+
+from ai.retrieval.job_index import JobVectorIndex
+from ai.retrieval.job_store import JobProfileStore
+
+DIM = 8
+MODEL = "test-model"
+
+
+def job(i, version="1"):
+    return {"id": f"j{i}", "version": version, "title": "Backend Developer",
+            "description": "python apis", "skills": ["python", "django"], "company": "x"}
+
+
+def vectors(n, seed=0, dim=DIM):
+    return np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+
+
+def open_store(directory, dim=DIM, model=MODEL):
+    return JobProfileStore.open(str(directory), dim, embedding_model=model)
+
+
+def write(store, jobs, seed=0):
+    with store.exclusive():
+        store.refresh()
+        store.upsert(jobs, vectors(len(jobs), seed))
+        store.save()
+
+
+def test_reopen_keeps_jobs_and_model(tmp_path):
+    write(open_store(tmp_path), [job(i) for i in range(3)])
+    store = open_store(tmp_path)
+    assert len(store) == 3 and store.index.embedding_model == MODEL
+    assert JobVectorIndex.load(str(tmp_path)).embedding_model == MODEL
+
+
+def test_other_model_or_dim_starts_empty(tmp_path):
+    write(open_store(tmp_path), [job(i) for i in range(3)])
+
+    other_dim = open_store(tmp_path, dim=16)
+    assert len(other_dim) == 0 and other_dim.index.dim == 16
+    assert other_dim.index.search(vectors(1, dim=16)[0], 3) == []
+
+    other_model = open_store(tmp_path, model="other-model")
+    assert len(other_model) == 0
+    with other_model.exclusive():
+        other_model.upsert([job(9)], vectors(1))
+        other_model.save()  # replaces the stale snapshot
+    reopened = open_store(tmp_path, model="other-model")
+    assert reopened.index.ids() == ["j9"]
+
+
+def test_refresh_ignores_snapshot_of_other_model(tmp_path):
+    ours = open_store(tmp_path)
+    write(ours, [job(0)])
+    theirs = open_store(tmp_path, model="other-model")
+    write(theirs, [job(1)])
+    assert not ours.refresh()
+    assert ours.index.ids() == ["j0"]
+
+
+def snapshot_id(directory):
+    return (directory / "meta.json").stat().st_ino
+
+
+def assert_same_as_disk(store, directory):
+    fresh = JobVectorIndex.load(str(directory))
+    assert store.index.ids() == fresh.ids()
+    for job_id in fresh.ids():
+        np.testing.assert_array_equal(store.index.vector(job_id), fresh.vector(job_id))
+        assert store.index.payload(job_id) == fresh.payload(job_id)
+        assert job_id in store
+    assert len(store.stats()) and store.stats()["profiles"] == len(fresh.ids())
+
+
+def test_two_stores_interleave_through_the_delta_log(tmp_path):
+    a, b = open_store(tmp_path), open_store(tmp_path)
+    write(a, [job(i) for i in range(4)], seed=1)
+    snapshot = snapshot_id(tmp_path)
+
+    write(b, [job(4), job(1, version="2")], seed=2)  # b catches up on a's write first
+    with a.exclusive():
+        a.refresh()
+        assert a.version("j1") == "2" and "j4" in a
+        a.delete(["j0", "j2"])
+        a.save()
+    write(b, [job(0, version="3")], seed=3)
+
+    assert snapshot_id(tmp_path) == snapshot, "appends must not rewrite the snapshot"
+    assert a.refresh() and not a.refresh()
+    assert b.refresh() is False  # b wrote last and has nothing new
+    for store in (a, b):
+        assert_same_as_disk(store, tmp_path)
+    assert sorted(a.index.ids()) == ["j0", "j1", "j3", "j4"]
+    assert a.get("j0", version="3") is not None and a.get("j2") is None
+    assert a.get("j1", version="1") is None  # stale version is a miss
+
+
+def test_compaction_forces_a_full_reload(tmp_path, monkeypatch):
+    a, b = open_store(tmp_path), open_store(tmp_path)
+    write(a, [job(i) for i in range(3)])
+    b.refresh()
+    snapshot = snapshot_id(tmp_path)
+
+    monkeypatch.setattr("ai.retrieval.job_index._LOG_COMPACT_MIN_BYTES", 0)
+    write(a, [job(3)], seed=1)  # log now outgrows the 3 vectors
+    write(a, [job(4)], seed=2)  # -> full save under a new generation
+    assert snapshot_id(tmp_path) != snapshot
+
+    old_index = b.index
+    assert b.index.catch_up(str(tmp_path)) is None  # the log belongs to another snapshot
+    assert b.refresh()
+    assert b.index is not old_index
+    assert_same_as_disk(b, tmp_path)
+    assert len(b) == 5
+
+
+def test_torn_last_record_is_ignored_until_complete(tmp_path):
+    a, b = open_store(tmp_path), open_store(tmp_path)
+    write(a, [job(0)])
+    b.refresh()
+    write(a, [job(1)], seed=1)
+    log = tmp_path / "delta.log"
+    data = log.read_bytes()
+    last = data.rstrip(b"\n").rfind(b"\n") + 1
+    log.write_bytes(data[: last + 10])  # a writer stopped mid-record
+
+    assert not b.refresh()
+    assert b.index.ids() == ["j0"]
+    assert JobVectorIndex.load(str(tmp_path)).ids() == ["j0"]
+
+    log.write_bytes(data)  # the record is completed
+    assert b.refresh()
+    assert_same_as_disk(b, tmp_path)
+
+
+def test_exclusive_serializes_writers_across_stores(tmp_path):
+    import threading
+
+    write(open_store(tmp_path), [job(0)])
+    stores = [open_store(tmp_path) for _ in range(4)]
+
+    def worker(n, store):
+        for k in range(5):
+            write(store, [job(100 * (n + 1) + k)], seed=n * 10 + k)
+
+    threads = [threading.Thread(target=worker, args=(n, s)) for n, s in enumerate(stores)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(JobVectorIndex.load(str(tmp_path))) == 1 + 4 * 5  # no write lost
+    for store in stores:
+        store.refresh()
+        assert_same_as_disk(store, tmp_path)
+
+
+def test_exclusive_without_directory_still_locks():
+    store = JobProfileStore(JobVectorIndex(DIM))
+    with store.exclusive():
+        assert not store._write_lock.acquire(blocking=False)
+    assert store._write_lock.acquire(blocking=False)
+    store._write_lock.release()
+
+
+def test_save_elsewhere_writes_a_full_snapshot(tmp_path):
+    store = open_store(tmp_path / "a")
+    write(store, [job(0), job(1)])
+    store.save(str(tmp_path / "b"))
+    copy = JobVectorIndex.load(str(tmp_path / "b"))
+    assert copy.ids() == ["j0", "j1"] and copy.embedding_model == MODEL
@@ -0,0 +1,54 @@
+"""SkillMatchIndex must agree with FeatureBuilder.loose_match."""
+
+import random
+
+import pytest
+
+from ai.features.feature_builder import FeatureBuilder, SkillMatchIndex
+
+loose_match = FeatureBuilder.loose_match
+
+
+def random_skill(rng: random.Random) -> str:
+    alphabet = "abcde"  # small alphabet so prefixes/substrings collide often
+    parts = ["".join(rng.choices(alphabet, k=rng.randint(1, 4))) for _ in range(rng.randint(1, 3))]
+    s = rng.choice([" ", "_", "", "  "]).join(parts)
+    if rng.random() < 0.05:
+        s = rng.choice(["_", " ", "__"])  # blank after normalisation
+    if rng.random() < 0.1:
+        s = " " + s + rng.choice(["", " ", "_"])
+    return s
+
+
+def check(rng: random.Random, trials: int, **index_kwargs) -> None:
+    for _ in range(trials):
+        skills = [random_skill(rng) for _ in range(rng.randint(0, 8))]
+        index = SkillMatchIndex(skills, **index_kwargs)
+        targets = [random_skill(rng) if rng.random() < 0.9 else "" for _ in range(5)]
+        for t in targets:
+            expected = any(loose_match(t, s) for s in skills)
+            assert index.matches(t) == expected, (t, skills)
+        assert index.matched(targets) == {t for t in targets if any(loose_match(t, s) for s in skills)}
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_loose_match(seed):
+    check(random.Random(seed), 500)
+
+
+@pytest.mark.parametrize("max_substring", [1, 2, 3, 5])
+def test_matches_loose_match_past_substring_cap(max_substring):
+    # targets longer than the cap take the scan over the skills instead of the substring set
+    check(random.Random(max_substring), 500, max_substring=max_substring)
+
+
+def test_examples():
+    index = SkillMatchIndex(["machine learning", "react_native", "node js"])
+    assert index.matches("machine")            # target inside a skill / first token
+    assert index.matches("react native")       # underscores are spaces
+    assert index.matches("nodejs")             # space-insensitive equality
+    assert index.matches("machine learning engineer")  # skill inside target
+    assert not index.matches("java")
+    assert not index.matches(None)
+    assert not SkillMatchIndex([]).matches("python")
+    assert not SkillMatchIndex(["", None]).matches("python")
@@ -1,5 +1,7 @@
 import Application from '../models/applicationModel.js';
 import Job from '../models/jobModel.js';
+import ParsedResume from '../models/parsedResume.js';
+import { callAiRankCandidates } from '../utils/aiServiceClient.js';
 
 const allowedStatuses = ['UNDER_REVIEW', 'SHORTLISTED', 'REJECTED'];
 
@@ -34,6 +36,72 @@ export async function getApplicantsForJob(req, res) {
   }
 }
 
+// Rank every applicant of a job with one AI service call (optional ?topK=)
+export async function getRankedApplicantsForJob(req, res) {
+  try {
+    const { jobId } = req.params;
+    const topK = parseInt(req.query.topK, 10) || undefined;
+
+    const job = await Job.findById(jobId).lean();
+    if (!job) {
+      return res.status(404).json({ message: 'Job not found' });
+    }
+
+    const applications = await Application.find({ job: jobId }).populate('student').lean();
+    const parsedResumes = await ParsedResume.find({
+      student: { $in: applications.map((a) => a.student?._id).filter(Boolean) },
+    })
+      .select('resumeExtract skillEmbedding batch branch cgpa student')
+      .lean();
+
+    if (!parsedResumes.length) {
+      return res.json({ jobId, usedRanker: false, candidates: 0, applicants: [] });
+    }
+
+    const aiResponse = await callAiRankCandidates({
+      job,
+      students: parsedResumes.map((p) => ({
+        _id: p.student,
+        cgpa: p.cgpa,
+        batch: p.batch,
+        branch: p.branch,
+        resumeExtract: p.resumeExtract,
+        skillEmbedding: p.skillEmbedding,
+      })),
+      topK,
+    });
+
+    // keep embeddings the AI service had to compute for later calls
+    const embeddingOps = Object.entries(aiResponse.student_embeddings || {}).map(([studentId, vec]) => ({
+      updateOne: { filter: { student: studentId }, update: { $set: { skillEmbedding: vec } } },
+    }));
+    if (embeddingOps.length) {
+      ParsedResume.bulkWrite(embeddingOps, { ordered: false }).catch((err) =>
+        console.warn('Failed to store student embeddings:', err?.message || err)
+      );
+    }
+
+    const byStudent = new Map(applications.map((a) => [a.student?._id?.toString(), a]));
+    const applicants = (aiResponse.shortlist || []).map((r) => ({
+      application: byStudent.get(r.student_id) || null,
+      studentId: r.student_id,
+      matchScore: Math.round(r.match_percent || 0),
+      aiScore: r.score,
+      reasons: r.reasons || [],
+    }));
+
+    res.json({
+      jobId,
+      usedRanker: aiResponse.used_ranker || false,
+      candidates: aiResponse.candidates || 0,
+      applicants,
+    });
+  } catch (error) {
+    console.error('Rank applicants error:', error);
+    res.status(500).json({ message: 'Could not rank applicants' });
+  }
+}
+
 export async function updateApplicationStatus(req, res) {
   try {
     const { applicationId } = req.params;
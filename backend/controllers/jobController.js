@@ -3,6 +3,7 @@ import Job from "../models/jobModel.js";
 import Application from "../models/applicationModel.js";
 import Student from "../models/studentModel.js";
 import { parseJobText } from "../services/jobParser.js";
+import { hasEmbedding, upsertAiJobs } from "../utils/aiServiceClient.js";
 
 export const createJobFromText = async (req, res) => {
   try {
@@ -85,6 +86,18 @@ export const createJob = async (req, res) => {
     // 7. Create Job
     const job = await Job.create(payload);
 
+    // 8. Precompute the job's AI profile + embedding (best effort; recommendations
+    //    still work without it, they just send the full job each time)
+    try {
+      const aiRes = await upsertAiJobs([job]);
+      const vec = aiRes?.job_embeddings?.[job._id.toString()];
+      if (hasEmbedding(vec)) {
+        await Job.updateOne({ _id: job._id }, { $set: { embedding: vec } }, { timestamps: false });
+      }
+    } catch (aiErr) {
+      console.warn("Failed to upsert job into AI service:", aiErr?.message || aiErr);
+    }
+
     res.status(201).json({ msg: "Job created successfully", job });
   } catch (err) {
     console.error("Job creation error:", err); // Log the actual error for debugging
@@ -6,6 +6,7 @@ import jwt from "jsonwebtoken"
 import fs from "fs";
 import {
   callAiRecommender,
+  hasEmbedding,
   parseResumeWithAI,
 } from "../utils/aiServiceClient.js";
 import cloudinary from "../utils/cloudinary.js";
@@ -58,6 +59,24 @@ const isEligibleForJob = (student = {}, job = {}) => {
   return true;
 };
 
+// Store embeddings the AI service computed for jobs that had none, so later
+// recommendation calls can send them back instead of re-encoding the job.
+const persistJobEmbeddings = async (aiResponse = {}) => {
+  const embeddings = aiResponse.job_embeddings || {};
+  const ops = Object.entries(embeddings)
+    .filter(([, vec]) => hasEmbedding(vec))
+    .map(([jobId, vec]) => ({
+      // timestamps off: updatedAt is the job's version in the AI job store
+      updateOne: { filter: { _id: jobId }, update: { $set: { embedding: vec } }, timestamps: false },
+    }));
+  if (!ops.length) return;
+  try {
+    await Job.bulkWrite(ops, { ordered: false });
+  } catch (err) {
+    console.warn("Failed to store job embeddings:", err?.message || err);
+  }
+};
+
 // Helper to get student ID from req.user (set by fetchuser middleware)
 const ensureStudentId = (req, res) => {
   const id = req.user?.id;
@@ -257,7 +276,7 @@ export const uploadResume = async (req, res) => {
       branch: extracted.branch || "",
       batch: extracted.batch || "",
       cgpa: extracted.cgpa ? Number(extracted.cgpa) : 0,
-      skillEmbedding: Array.isArray(parsed?.embedding) ? parsed.embedding : [],
+      skillEmbedding: hasEmbedding(parsed?.embedding) ? parsed.embedding : [],
       parsedAt: new Date(),
       parserInfo: {
         engine: parsed?.engineName || "unknown",
@@ -419,6 +438,7 @@ export const getStudentRecommendations = async (req, res) => {
       student: aiStudentPayload,
       jobs: eligibleJobs,
     });
+    await persistJobEmbeddings(aiResponse);
 
     // 5) Map AI response back to job info (including full job details)
     const recs = (aiResponse.recommendations || []).map((r) => {
@@ -516,6 +536,7 @@ export const getStudentMatchScore = async (req, res) => {
       student: aiStudentPayload,
       jobs: [job], // SINGLE JOB
     });
+    await persistJobEmbeddings(aiResponse);
 
     // 6) Extract result for this job
     const rec = aiResponse.recommendations?.[0];
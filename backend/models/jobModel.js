@@ -27,7 +27,8 @@ const jobSchema = new mongoose.Schema(
     // Internal flow:
     internalNotes: { type: String }, // optional notes for admin
     // AI fields:
-    embedding: { type: [Number], default: undefined },
+    // [Number] or a compact "emb1:f16:..." string from the AI service
+    embedding: { type: mongoose.Schema.Types.Mixed, default: undefined },
   },
   { timestamps: true }
 );
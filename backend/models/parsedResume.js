@@ -29,7 +29,8 @@ const ParsedResumeSchema = new mongoose.Schema(
     branch: { type: String, trim: true },
     cgpa: { type: Number, default: 0 },
     batch: { type: String, trim: true },
-    skillEmbedding: { type: [Number], default: [] },
+    // [Number] or a compact "emb1:f16:..." string from the AI service
+    skillEmbedding: { type: mongoose.Schema.Types.Mixed, default: [] },
     parsedAt: { type: Date, default: Date.now },
     parserInfo: {
       // optional: store which AI, version, errors, etc
@@ -2,6 +2,7 @@ import { Router } from 'express';
 import {
   getAdminOverview,
   getApplicantsForJob,
+  getRankedApplicantsForJob,
   updateApplicationStatus,
   exportApplicantsList,
 } from '../controllers/adminController.js';
@@ -10,6 +11,7 @@ const router = Router();
 
 router.get('/overview', getAdminOverview);
 router.get('/jobs/:jobId/applicants', getApplicantsForJob);
+router.get('/jobs/:jobId/applicants/ranked', getRankedApplicantsForJob);
 router.patch('/applications/:applicationId/status', updateApplicationStatus);
 router.get('/export', exportApplicantsList);
 
@@ -7,6 +7,8 @@ import FormData from "form-data";
 const AI_SERVICE_URL = (process.env.AI_SERVICE_URL || "http://localhost:8000").replace(/\/+$/, "");
 const RECOMMEND_ENDPOINT = `${AI_SERVICE_URL}/recommend`;
 const PARSE_ENDPOINT = `${AI_SERVICE_URL}/parse_resume`;
+const JOB_INDEX_ENDPOINT = `${AI_SERVICE_URL}/jobs/index`;
+const RANK_CANDIDATES_ENDPOINT = `${AI_SERVICE_URL}/rank_candidates`;
 
 // ---------------------------------------------------------
 // SAFE ID
@@ -53,6 +55,11 @@ const normalizeDomains = (job = {}) => {
   return Array.from(new Set(cleaned));
 };
 
+// Embeddings are stored either as [Number] or as the AI service's compact
+// base64 string ("emb1:f16:..."); both are sent back as-is.
+export const hasEmbedding = (vec) =>
+  (Array.isArray(vec) && vec.length > 0) || (typeof vec === "string" && vec.length > 0);
+
 // ---------------------------------------------------------
 // STUDENT PAYLOAD → SENT TO AI SERVICE
 // ---------------------------------------------------------
@@ -60,9 +67,9 @@ export const toAiStudentPayload = (student = {}) => {
   const extract = student.resumeExtract || {};
 
   const skills = extractSkillsFromStudent(student);
-  const skillEmbedding = Array.isArray(student.skillEmbedding)
+  const skillEmbedding = hasEmbedding(student.skillEmbedding)
     ? student.skillEmbedding
-    : Array.isArray(student.skill_embedding)
+    : hasEmbedding(student.skill_embedding)
     ? student.skill_embedding
     : [];
   const domains =
@@ -166,6 +173,10 @@ export const toAiJobPayload = (job = {}) => {
     education_requirement: job.educationRequirement || "",
     experience_requirement: job.experienceRequirement || job.requirementsText || "",
     responsibilities_text: job.responsibilitiesText || job.description || "",
+    // optional: reuse stored embedding so the AI service skips re-encoding this job
+    embedding: hasEmbedding(job.embedding) ? job.embedding : undefined,
+    // lets the AI service reuse its precomputed profile while the job is unchanged
+    version: job.updatedAt ? new Date(job.updatedAt).toISOString() : undefined,
   };
 };
 
@@ -185,6 +196,37 @@ export const callAiRecommender = async ({ student, jobs }) => {
   return res.data;
 };
 
+// ---------------------------------------------------------
+// RANK MANY STUDENTS (e.g. all applicants) FOR ONE JOB
+// ---------------------------------------------------------
+export const callAiRankCandidates = async ({ job, students, topK }) => {
+  const payload = {
+    job: toAiJobPayload(job),
+    students: students.map(toAiStudentPayload),
+    top_k: topK || undefined,
+  };
+
+  const res = await axios.post(RANK_CANDIDATES_ENDPOINT, payload, {
+    headers: { "Content-Type": "application/json" },
+  });
+
+  return res.data;
+};
+
+// ---------------------------------------------------------
+// UPSERT JOBS INTO THE AI SERVICE JOB STORE
+// (call when a job is created or edited)
+// ---------------------------------------------------------
+export const upsertAiJobs = async (jobs = []) => {
+  const res = await axios.post(
+    JOB_INDEX_ENDPOINT,
+    { jobs: jobs.map(toAiJobPayload) },
+    { headers: { "Content-Type": "application/json" } }
+  );
+
+  return res.data;
+};
+
 // ---------------------------------------------------------
 // PARSE RESUME VIA AI SERVICE
 // ---------------------------------------------------------